@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+clients.py
+- Adaptateurs qui redirigent Gemini (google.generativeai) et Twitter (tweepy)
+  vers le stand-in local : ces deux SDK imposent leurs propres hôtes HTTPS,
+  on remplace donc uniquement l'objet client, le code d'Aurore reste inchangé
+- Les appels passent par aurore.http_client : ils sont comptés et chronométrés
+  comme le reste du trafic
+"""
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Optional
+
+
+class StandInGenerativeModel:
+    """Remplace google.generativeai.GenerativeModel."""
+
+    base_url = ""
+
+    def __init__(self, model_name: str = "", generation_config: Optional[dict] = None, **kwargs: Any):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+
+    def generate_content(self, prompt: str, **kwargs: Any):
+        from aurore import http_client
+
+        r = http_client.post(
+            f"{self.base_url}/gemini/{self.model_name}:generateContent",
+            json={"prompt": prompt, "generation_config": self.generation_config},
+            timeout=30,
+        )
+        r.raise_for_status()
+        return SimpleNamespace(text=r.json().get("text", ""))
+
+    async def generate_content_async(self, prompt: str, **kwargs: Any):
+        return await asyncio.to_thread(self.generate_content, prompt)
+
+
+class StandInTwitterAPI:
+    """Remplace tweepy.API (seul update_status est utilisé par Aurore)."""
+
+    base_url = ""
+
+    def __init__(self, auth: Any = None, **kwargs: Any):
+        self.auth = auth
+
+    def update_status(self, status: str, **kwargs: Any):
+        from aurore import http_client
+
+        r = http_client.post(f"{self.base_url}/twitter/statuses/update.json", json={"status": status}, timeout=15)
+        r.raise_for_status()
+        return SimpleNamespace(**r.json())
+
+
+def install(base_url: str) -> None:
+    """Branche les adaptateurs sur le stand-in (à appeler avant le premier appel Gemini/Twitter)."""
+    import google.generativeai as genai
+    import tweepy
+
+    StandInGenerativeModel.base_url = base_url
+    StandInTwitterAPI.base_url = base_url
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel = StandInGenerativeModel
+    tweepy.API = StandInTwitterAPI
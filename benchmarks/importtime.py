@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+importtime.py
+- Coût de démarrage d'Aurore mesuré dans des processus neufs :
+  * `-X importtime` de chaque module (temps cumulé + dépendances les plus lourdes)
+  * chemin « aucun article » de python -m aurore (GNews sans résultat, aucun
+    accès réseau) : temps total du processus jusqu'à la sortie
+- Option --budget-ms : code retour 1 si l'import d'aurore.__main__ dépasse le budget
+
+Usage (depuis la racine du repo) :
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py --repeat 7 --top 8 --budget-ms 150
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+MODULES = ["aurore.__main__", "aurore.autotweet", "aurore.github_pr", "aurore.news_fetch"]
+
+# GNews ne renvoie rien : main() s'arrête sur « Aucun article publiable »
+NO_ARTICLE = (
+    "import gnews\n"
+    "gnews.GNews.get_news = lambda self, q: []\n"
+    "import aurore.__main__ as m\n"
+    "m.main()\n"
+)
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.join(ROOT, "src"), env.get("PYTHONPATH")]))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def _importtime(code: str) -> List[str]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    return proc.stderr.splitlines()
+
+
+def _startup_packages() -> set:
+    """Paquets déjà chargés par l'interpréteur seul (site, encodings, .pth...)."""
+    return {m.group(3).split(".")[0] for m in map(_LINE_RE.match, _importtime("pass")) if m}
+
+
+def import_profile(module: str, ignore: frozenset = frozenset()) -> Tuple[float, List[Tuple[str, float]]]:
+    """(cumulé du module en ms, [(paquet de premier niveau, cumulé ms)] triés)."""
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in _importtime(f"import {module}"):
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        cumulative_ms = int(m.group(2)) / 1000
+        name = m.group(3)
+        if name == module:
+            total = cumulative_ms
+        top = name.split(".")[0]
+        if top != "aurore" and top not in ignore:
+            # le plus grand cumulé d'un paquet = son import le plus externe
+            packages[top] = max(packages.get(top, 0.0), cumulative_ms)
+    return total, sorted(packages.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def run_no_article() -> float:
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", NO_ARTICLE],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    return (time.perf_counter() - t0) * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Coût de démarrage d'Aurore (imports, chemin sans article).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="dépendances les plus lourdes affichées par module")
+    parser.add_argument("--budget-ms", type=float, default=0.0, help="budget d'import pour aurore.__main__ (0 = aucun)")
+    args = parser.parse_args(argv)
+
+    # premier passage jetable : fichiers .pyc à jour
+    import_profile("aurore.__main__")
+
+    ignore = frozenset(_startup_packages())
+    main_ms = 0.0
+    for module in MODULES:
+        runs = [import_profile(module, ignore) for _ in range(args.repeat)]
+        median = statistics.median(t for t, _ in runs)
+        if module == "aurore.__main__":
+            main_ms = median
+        heavy = ", ".join(f"{name} {ms:.0f}" for name, ms in runs[-1][1][: args.top])
+        print(f"import {module:<20} {median:8.1f} ms   ({heavy})")
+
+    walls = [run_no_article() for _ in range(args.repeat)]
+    print(f"python -m aurore sans article  {statistics.median(walls):8.1f} ms (processus complet, médiane)")
+
+    if args.budget_ms and main_ms > args.budget_ms:
+        print(f"ÉCHEC : import aurore.__main__ {main_ms:.1f} ms > budget {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
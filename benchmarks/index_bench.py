@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+index_bench.py
+- indexpatch.patch sur des index.html de taille croissante (make_index_html
+  du stand-in), région trouvée par le sélecteur puis par les marqueurs
+- Vérifie que tout ce qui est hors de la liste est identique à l'octet près
+  et que la liste garde index_keep entrées
+- Linéarité : temps par Ko à peu près constant d'une taille à l'autre ;
+  référence BeautifulSoup (ancien patch, re-sérialisation complète) si bs4
+  est installé
+
+Usage (depuis la racine du repo) :
+    PYTHONPATH=src python benchmarks/index_bench.py
+    PYTHONPATH=src python benchmarks/index_bench.py --sizes 100,1000,10000,100000 --keep 10
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from standin import make_index_html  # noqa: E402
+
+from aurore import indexpatch, lazy  # noqa: E402
+
+ENTRY = {"title": "Réforme des collectivités : le projet de loi présenté", "filename": "bench.html", "date": "2026-10-17", "iso_date": "2026-10-17"}
+
+
+def with_markers(doc: str) -> str:
+    doc = doc.replace('<ul id="latest-articles">', '<ul id="latest-articles">' + indexpatch.MARK_START, 1)
+    return doc.replace("\n</ul>", "\n" + indexpatch.MARK_END + "</ul>", 1)
+
+
+def bs4_patch(doc: str, keep: int) -> str:
+    bs4 = lazy.optional("bs4")
+    soup = bs4.BeautifulSoup(doc, "html.parser")
+    ul = soup.select_one(indexpatch.DEFAULT_SELECTOR)
+    ul.insert(0, bs4.BeautifulSoup(indexpatch.entry_html(ENTRY), "html.parser"))
+    for li in ul.find_all("li")[keep:]:
+        li.decompose()
+    return str(soup)
+
+
+def timed(fn: Callable[[], str], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def check(doc: str, out: str, keep: int) -> bool:
+    """Hors de la région : octets identiques ; dans la région : keep entrées, la nouvelle en tête."""
+    start, end = indexpatch.find_region(doc)
+    start2, end2 = indexpatch.find_region(out)
+    inner = out[start2:end2]
+    return (
+        out[:start] == doc[:start]
+        and out[end2:] == doc[end:]
+        and inner.count("<li>") == min(keep, doc[start:end].count("<li>") + 1)
+        and inner.lstrip().startswith(indexpatch.entry_html(ENTRY))
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark du patch d'index.html (indexpatch.py).")
+    parser.add_argument("--sizes", default="100,1000,10000,50000", help="nombre d'entrées de index.html")
+    parser.add_argument("--keep", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-bs4", action="store_true", help="sans la référence BeautifulSoup (lente sur les gros fichiers)")
+    args = parser.parse_args(argv)
+
+    use_bs4 = not args.no_bs4 and lazy.optional("bs4") is not None
+    ok = True
+    print(f"{'entrées':>9}{'Ko':>9}{'sélecteur ms':>14}{'µs/Ko':>8}{'marqueurs ms':>14}{'µs/Ko':>8}" + (f"{'bs4 ms':>11}" if use_bs4 else "") + "  vérif")
+    for n in (int(x) for x in args.sizes.split(",") if x.strip()):
+        doc = make_index_html(n)
+        marked = with_markers(doc)
+        kb = len(doc.encode("utf-8")) / 1024
+        t_sel = timed(lambda: indexpatch.patch(doc, ENTRY, keep=args.keep), args.repeat)
+        t_mark = timed(lambda: indexpatch.patch(marked, ENTRY, selector="#absent", keep=args.keep), args.repeat)
+        good = check(doc, indexpatch.patch(doc, ENTRY, keep=args.keep), args.keep) and check(
+            marked, indexpatch.patch(marked, ENTRY, selector="#absent", keep=args.keep), args.keep
+        )
+        ok &= good
+        line = f"{n:>9}{kb:>9.0f}{t_sel * 1000:>14.3f}{t_sel * 1e6 / kb:>8.2f}{t_mark * 1000:>14.3f}{t_mark * 1e6 / kb:>8.2f}"
+        if use_bs4:
+            line += f"{timed(lambda: bs4_patch(doc, args.keep), 1) * 1000:>11.1f}"
+        print(line + ("  OK" if good else "  ÉCHEC"))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
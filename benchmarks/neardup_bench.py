@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+neardup_bench.py
+- Calage de neardup_threshold sur des titres Google News d'une même histoire
+  couverte par plusieurs médias (fixtures/neardup_stories.json) et sur des
+  titres du même thème mais d'une autre histoire
+- Distribution des similarités (même histoire / histoires distinctes) et,
+  pour chaque seuil essayé, doublons manqués et faux positifs
+- Cas des « cinq médias » : après publication d'un titre de chaque histoire,
+  les titres des autres médias doivent être écartés (check), les titres
+  distincts non ; code de sortie 1 sinon
+
+Usage (depuis la racine du repo) :
+    PYTHONPATH=src python benchmarks/neardup_bench.py
+    PYTHONPATH=src python benchmarks/neardup_bench.py --threshold 0.35
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+from typing import Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE = os.path.join(HERE, "fixtures", "neardup_stories.json")
+
+from aurore import neardup  # noqa: E402
+
+
+def sims(stories: List[List[str]], distinct: List[str]) -> Tuple[List[float], List[float]]:
+    """(similarités intra-histoire, similarités entre histoires différentes)."""
+    terms = {t: neardup.terms(t) for t in itertools.chain(distinct, *stories)}
+    same = [neardup.jaccard(terms[a], terms[b]) for g in stories for a, b in itertools.combinations(g, 2)]
+    groups = stories + [[t] for t in distinct]
+    other = [
+        neardup.jaccard(terms[a], terms[b])
+        for g, h in itertools.combinations(groups, 2)
+        for a in g
+        for b in h
+    ]
+    return same, other
+
+
+def run(stories: List[List[str]], distinct: List[str], threshold: float, first: int) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Titre n° `first` de chaque histoire publié ; (doublons manqués, faux positifs)."""
+    index = neardup.NearDupIndex(threshold=threshold)
+    for g in stories:
+        neardup.remember({"title": g[first], "url": f"https://example.invalid/{first}/{len(g)}"}, index)
+    missed = [t for g in stories for i, t in enumerate(g) if i != first and not neardup.check({"title": t}, index)]
+    wrong = []
+    for t in distinct:
+        match = neardup.check({"title": t}, index)
+        if match:
+            wrong.append((t, match["title"]))
+    return missed, wrong
+
+
+def summary(values: List[float]) -> str:
+    return f"min {min(values):.2f}  médiane {statistics.median(values):.2f}  max {max(values):.2f}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calage du seuil des quasi-doublons (neardup.py).")
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--threshold", type=float, default=neardup.DEFAULT_THRESHOLD)
+    parser.add_argument("--grid", default="0.2,0.25,0.3,0.35,0.4,0.5", help="seuils comparés")
+    args = parser.parse_args(argv)
+
+    with open(args.fixture, "r", encoding="utf-8") as f:
+        data: Dict = json.load(f)
+    stories, distinct = data["stories"], data["distinct"]
+    n_first = min(len(g) for g in stories)
+
+    same, other = sims(stories, distinct)
+    print(f"même histoire ({len(same)} paires)     : {summary(same)}")
+    print(f"histoires distinctes ({len(other)} paires) : {summary(other)}")
+    print(f"{'seuil':>6}{'manqués':>9}{'faux +':>8}")
+    for th in sorted({float(x) for x in args.grid.split(",") if x.strip()} | {args.threshold}):
+        missed = wrong = 0
+        for first in range(n_first):
+            m, w = run(stories, distinct, th, first)
+            missed, wrong = missed + len(m), wrong + len(w)
+        print(f"{th:>6.2f}{missed:>9}{wrong:>8}" + ("  <- retenu" if th == args.threshold else ""))
+
+    missed, wrong = run(stories, distinct, args.threshold, 0)
+    for t in missed:
+        print(f"ÉCHEC doublon non écarté : {t}")
+    for t, seen in wrong:
+        print(f"ÉCHEC faux positif : {t}  ~  {seen}")
+    ok = not missed and not wrong
+    print(f"cinq médias, seuil {args.threshold:.2f} : " + ("OK" if ok else "ÉCHEC"))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
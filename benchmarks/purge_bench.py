@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+purge_bench.py
+- purge_blobs.py contre le stand-in local (standin.py) : store peuplé de
+  clés processed:* anciennes et récentes + clés d'autres préfixes, liste
+  paginée, 429 injectés sur une partie des DELETE
+- Vérifie que seules les clés visées disparaissent (dry-run compris) et
+  compare le débit séquentiel (1 worker) au pool concurrent
+
+Usage (depuis la racine du repo) :
+    python benchmarks/purge_bench.py
+    python benchmarks/purge_bench.py --keys 2000 --workers 16 --latency 0.01 --throttle-every 9
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from email.utils import formatdate
+from typing import Dict, List, Optional, Set
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, ROOT)
+
+from standin import StandIn  # noqa: E402
+
+import purge_blobs  # noqa: E402
+
+STORE = "bench-purge"
+OLD_AGE_S = 120 * 86400
+
+
+def seed(standin: StandIn, n: int) -> Set[str]:
+    """Peuple le store ; renvoie les clés que le filtre (processed:, > 90 j) doit retenir."""
+    now = time.time()
+    data = standin.blobs.setdefault(STORE, {})
+    data.clear()
+    expected = set()
+    for i in range(n):
+        if i % 4 == 3:
+            key, age = f"processed-shard:{i:05x}", OLD_AGE_S  # autre préfixe : conservé
+        elif i % 2 == 0:
+            key, age = f"processed:{i:064x}", OLD_AGE_S
+            expected.add(key)
+        else:
+            key, age = f"processed:{i:064x}", 3600  # récent : conservé
+        data[key] = (b'{"processedAt": null}', formatdate(now - age, usegmt=True))
+    return expected
+
+
+def run_once(standin: StandIn, n: int, workers: int, dry_run: bool) -> Dict:
+    expected = seed(standin, n)
+    before = set(standin.blobs[STORE])
+    report = purge_blobs.purge_store(
+        STORE, prefix="processed:", older_than=90 * 86400, workers=workers, dry_run=dry_run, api_url=standin.base_url
+    )
+    gone = before - set(standin.blobs[STORE])
+    want = set() if dry_run else expected
+    report["ok"] = gone == want and report["matched"] == len(expected)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de purge_blobs.py contre le stand-in local.")
+    parser.add_argument("--keys", type=int, default=800)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.01, help="latence par requête blobs (s)")
+    parser.add_argument("--throttle-every", type=int, default=9, help="un DELETE sur N reçoit un 429 (0 = jamais)")
+    args = parser.parse_args(argv)
+
+    standin = StandIn(latency={"blobs": args.latency}, throttle_every=args.throttle_every).start()
+    os.environ.update({"NETLIFY_SITE_ID": "bench-site", "NETLIFY_BLOBS_TOKEN": "bench-token"})
+    try:
+        runs = [
+            ("dry-run", run_once(standin, args.keys, args.workers, dry_run=True)),
+            ("séquentiel", run_once(standin, args.keys, 1, dry_run=False)),
+            (f"pool[{args.workers}]", run_once(standin, args.keys, args.workers, dry_run=False)),
+        ]
+    finally:
+        standin.stop()
+
+    print(f"\n{'mode':<14}{'listées':>9}{'retenues':>10}{'supprimées':>12}{'retries':>9}{'durée s':>10}{'clés/s':>10}  vérif")
+    for name, r in runs:
+        print(
+            f"{name:<14}{r['listed']:>9}{r['matched']:>10}{r['deleted']:>12}{r['retries']:>9}"
+            f"{r['elapsed_s']:>10.2f}{r['keys_per_s']:>10.1f}  {'OK' if r['ok'] else 'ÉCHEC'}"
+        )
+    return 0 if all(r["ok"] for _, r in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
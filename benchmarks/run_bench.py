@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+run_bench.py
+- Benchmark hors-ligne du pipeline Aurore contre le stand-in local (standin.py)
+- Étapes : rss, enrich (froid / chaud), extract (par moteur), select,
+  select_lazy, dedup (Netlify / SQLite / blobs-proxy), compress, summarize, render, publish, index_patch, tweet,
+  puis un passage de bout en bout (pipeline)
+- Rapport : temps par étape (médiane / min), appels et octets HTTP,
+  appels par service émulé, pic mémoire (RSS du processus, tracemalloc en option)
+- Vérifie aussi la parité des moteurs d'extraction avec les sorties de référence
+  (fixtures/golden)
+
+Usage (depuis la racine du repo) :
+    PYTHONPATH=src python benchmarks/run_bench.py
+    PYTHONPATH=src python benchmarks/run_bench.py --repeat 5 --latency publisher=0.08,github=0.05 --json bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from standin import PROXY_TOKEN, StandIn, article_fixtures, make_index_html, read_fixture  # noqa: E402
+
+DEFAULT_LATENCY = "rss=0.02,publisher=0.04,blobs=0.03,functions=0.05,github=0.03,gemini=0.15,twitter=0.05"
+
+
+def _parse_latency(spec: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in filter(None, (spec or "").split(",")):
+        k, _, v = part.partition("=")
+        out[k.strip()] = float(v)
+    return out
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Bench:
+    def __init__(self, standin: StandIn, repeat: int, trace_memory: bool):
+        from aurore import http_client
+
+        self.standin = standin
+        self.repeat = repeat
+        self.trace_memory = trace_memory
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._http = Counter()
+        http_client.add_hook(self._on_http)
+
+    def _on_http(self, event: Dict[str, Any]) -> None:
+        self._http["calls"] += 1
+        self._http["bytes"] += int(event.get("bytes") or 0)
+
+    def stage(self, name: str, fn: Callable[[], Any], setup: Optional[Callable[[], None]] = None) -> Any:
+        times: List[float] = []
+        out = None
+        mem_peak = 0
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            self.standin.reset_counts()
+            self._http.clear()
+            if self.trace_memory:
+                tracemalloc.start()
+            t0 = time.perf_counter()
+            out = fn()
+            times.append(time.perf_counter() - t0)
+            if self.trace_memory:
+                mem_peak = max(mem_peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+        self.results[name] = {
+            "median_ms": statistics.median(times) * 1000,
+            "min_ms": min(times) * 1000,
+            "http_calls": self._http["calls"],
+            "http_bytes": self._http["bytes"],
+            "services": dict(self.standin.calls),
+        }
+        if self.trace_memory:
+            self.results[name]["py_peak_kb"] = mem_peak / 1024
+        return out
+
+    def report(self) -> str:
+        lines = [f"{'étape':<22}{'médiane ms':>12}{'min ms':>10}{'http':>7}{'octets':>11}  services"]
+        for name, r in self.results.items():
+            services = " ".join(f"{k}={v}" for k, v in sorted(r["services"].items()))
+            mem = f"  py_peak={r['py_peak_kb']:.0f}Ko" if "py_peak_kb" in r else ""
+            lines.append(
+                f"{name:<22}{r['median_ms']:>12.1f}{r['min_ms']:>10.1f}{r['http_calls']:>7}{r['http_bytes']:>11}  {services}{mem}"
+            )
+        lines.append(f"pic RSS du processus : {_peak_rss_mb():.1f} Mo")
+        return "\n".join(lines)
+
+
+def check_extraction_parity() -> List[str]:
+    """
+    Compare chaque moteur d'extraction aux sorties de référence, elles-mêmes
+    vérifiées contre text_from_soup(BeautifulSoup(html, "html.parser")).
+    """
+    from bs4 import BeautifulSoup
+
+    from aurore import extract
+
+    failures = []
+    for name in article_fixtures():
+        html_str = read_fixture("articles", name).decode("utf-8")
+        golden = read_fixture("golden", name[:-5] + ".txt").decode("utf-8")
+        if extract.text_from_soup(BeautifulSoup(html_str, "html.parser")) != golden:
+            failures.append(f"{name} [référence html.parser]")
+        for engine in extract.available_engines():
+            if extract.extract_text(html_str, engine=engine) != golden:
+                failures.append(f"{name} [{engine}]")
+            if extract.extract_page(html_str, engine=engine)["text"] != golden:
+                failures.append(f"{name} [{engine}, page]")
+    return failures
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    cache_root = tempfile.mkdtemp(prefix="aurore-bench-")
+    standin = StandIn(latency=_parse_latency(args.latency), index_entries=args.index_entries).start()
+
+    os.environ.update({
+        "AURORE_CACHE_DIR": os.path.join(cache_root, "cache"),
+        "GITHUB_API_URL": standin.base_url,
+        "NETLIFY_API_URL": standin.base_url,
+        "NETLIFY_SITE_ID": "bench-site",
+        "NETLIFY_BLOBS_TOKEN": "bench-token",
+        "BLOBS_PROXY_URL": f"{standin.base_url}/.netlify/functions/blobs-proxy",
+        "AURORE_BLOBS_TOKEN": PROXY_TOKEN,
+        "GH_TOKEN": "bench-token",
+        "GEMINI_API_KEY": "bench-key",
+        "GEMINI_RPM": "6000",  # le stand-in n'a pas de quota
+        "TWITTER_API_KEY": "k", "TWITTER_API_SECRET_KEY": "s",
+        "TWITTER_ACCESS_TOKEN": "t", "TWITTER_ACCESS_TOKEN_SECRET": "ts",
+    })
+    os.chdir(ROOT)  # github_pr lit templates/ relativement au répertoire courant
+
+    import clients
+    from aurore import autotweet, canonical, compress, dedup, extract, github_pr, httpcache, llmcache, neardup, news_fetch, pages, redirects, render, selection, summarize
+    from aurore import __main__ as aurore_main
+    from aurore.config import Settings
+    from jinja2 import Environment, FileSystemLoader
+
+    clients.install(standin.base_url)
+    with open(os.path.join(ROOT, "config.json"), "r", encoding="utf-8") as f:
+        site_cfg = dict(json.load(f)["libre"])
+    site_cfg.update({
+        "rss_url": f"{standin.base_url}/rss/search?q=bench",
+        "site_repo_name": standin.repo_name,
+        "blob_store_name": "bench-store",
+        "max_results": 8,
+    })
+
+    bench = Bench(standin, args.repeat, args.trace_memory)
+    fresh = {"n": 0}
+
+    def cold_caches():
+        # cache disque neuf + cache du run vidé
+        fresh["n"] += 1
+        Settings.CACHE_DIR = os.path.join(cache_root, f"cold-{fresh['n']}")
+        httpcache._default = None
+        llmcache._default = None
+        neardup._indexes.clear()
+        canonical.clear()
+        redirects._default = None
+        pages.clear()
+
+    def warm_caches():
+        pages.clear()
+
+    bench.stage("rss", lambda: news_fetch._rss_entries(site_cfg), setup=cold_caches)
+    items = bench.stage("enrich_cold", lambda: news_fetch.get_news_from_api(site_cfg), setup=cold_caches)
+    bench.stage("enrich_warm", lambda: news_fetch.get_news_from_api(site_cfg), setup=warm_caches)
+
+    docs = [read_fixture("articles", n).decode("utf-8") for n in article_fixtures()]
+    big = docs[0] * args.big_page_factor
+    for engine in extract.available_engines():
+        bench.stage(f"extract[{engine}]", lambda e=engine: [extract.extract_page(d, engine=e) for d in docs + [big]])
+
+    bench.stage("select", lambda: selection.pick_freshest_unique(items, set()))
+    bench.stage(
+        "select_lazy",
+        lambda: selection.pick_first_publishable(news_fetch.iter_candidates(site_cfg), set()),
+        setup=cold_caches,
+    )
+
+    # mémoire : quelques URLs déjà traitées pour forcer des positifs probables
+    for it in items[:3]:
+        dedup.mark_processed(it["url"], it["publishedAt"], site_cfg, it.get("canonical"))
+    bench.stage(
+        "dedup",
+        lambda: dedup.find_first_unique_article(items, set(), site_cfg),
+        setup=dedup.clear_run_cache,
+    )
+    # même recherche sur le backend SQLite local (aucun appel blobs)
+    sqlite_cfg = dict(site_cfg, memory_backend="sqlite", memory_path=os.path.join(cache_root, "memory.sqlite3"))
+    dedup.mark_many([{"url": it["url"], "canonical": it.get("canonical")} for it in items[:3]], sqlite_cfg)
+    bench.stage("dedup[sqlite]", lambda: dedup.find_first_unique_article(items, set(), sqlite_cfg))
+    # mêmes shards via la fonction blobs-proxy : une invocation par recherche, deux par marquage
+    proxy_cfg = dict(site_cfg, memory_backend="proxy")
+    bench.stage("dedup[proxy]", lambda: dedup.find_first_unique_article(items, set(), proxy_cfg), setup=dedup.clear_run_cache)
+    bench.stage("mark[proxy]", lambda: dedup.mark_many([{"url": it["url"]} for it in items[3:]], proxy_cfg))
+
+    # pré-compression extractive au budget du site (avant Gemini)
+    budget = compress.budget_for(site_cfg)
+    texts = [extract.extract_page(d)["text"] for d in docs]
+    texts.append("\n\n".join(texts * 4))
+    bench.stage("compress", lambda: [compress.compress(t, budget) for t in texts])
+    sizes = [(compress.estimate_tokens(t), compress.estimate_tokens(compress.compress(t, budget))) for t in texts]
+    print(f"compress : budget {budget} tokens, {sum(a for a, _ in sizes)} -> {sum(b for _, b in sizes)} tokens estimés")
+
+    text = items[0]["content"] if items else docs[0]
+    title, summary = bench.stage(
+        "summarize", lambda: summarize.summarize_article(text, site_cfg["gemini_prompt"], cfg=site_cfg), setup=cold_caches
+    )
+    bench.stage("summarize_cached", lambda: summarize.summarize_article(text, site_cfg["gemini_prompt"], cfg=site_cfg))
+    # plusieurs articles : appels en série vs llm.py (parallèle, débit borné)
+    batch = [d[:4000] for d in docs]
+    bench.stage(
+        f"summarize_serial[{len(batch)}]",
+        lambda: [summarize.summarize_article(t, site_cfg["gemini_prompt"], cfg=site_cfg) for t in batch],
+        setup=cold_caches,
+    )
+    bench.stage(
+        f"summarize_many[{len(batch)}]",
+        lambda: summarize.summarize_many(batch, site_cfg["gemini_prompt"], cfg=site_cfg),
+        setup=cold_caches,
+    )
+
+    index_entries = [
+        {"title": f"Article {i}", "filename": f"a-{i}.html", "date_human": "03/05/2025", "image_url": None}
+        for i in range(10)
+    ]
+    brand = {"brand_name": "Libre", "brand_color": "#2563EB", "production_url": "https://example.org", "logo_filename": ""}
+    render_jobs = [
+        ("article.html.j2", dict(brand, title=title, summary=summary, image_url=None, iso_date="2025-05-03T10:00:00+00:00",
+                                 date_human="03/05/2025", filename="a.html")),
+        ("index.html.j2", dict(brand, articles=index_entries)),
+    ]
+
+    def render_cold():
+        # ancien comportement : environnement neuf, templates recompilés à chaque appel
+        env = Environment(loader=FileSystemLoader("templates"))
+        return [env.get_template(name).render(**ctx) for name, ctx in render_jobs]
+
+    bench.stage("render_cold", render_cold)
+    bench.stage("render", lambda: render.render_many(render_jobs, "templates", autoescape=False))
+    bench.stage(
+        "publish",
+        lambda: github_pr.publish_article_and_update_index(title, summary, items[0].get("image") if items else None, site_cfg),
+    )
+
+    index_html = make_index_html(args.index_entries)
+    entry = {"title": title, "filename": "bench.html", "date": "2025-05-03", "iso_date": "2025-05-03"}
+    bench.stage(
+        "index_patch",
+        lambda: aurore_main.patch_index_html(index_html, entry, keep=site_cfg["index_keep"], selector=site_cfg["index_selector"]),
+    )
+
+    bench.stage("tweet", lambda: autotweet.tweet_from_prompt(site_cfg, title, summary, "bench", "https://example.org/a.html"))
+
+    def pipeline():
+        near = neardup.index_for(site_cfg)
+        picked = selection.pick_first_publishable(news_fetch.iter_candidates(site_cfg), set(), near_dups=near)
+        if not picked:
+            return
+        art, _ = picked
+        if dedup.find_first_unique_article([art], set(), site_cfg) is None:
+            return
+        t, s = summarize.summarize_article(art["content"], site_cfg["gemini_prompt"], cfg=site_cfg)
+        github_pr.publish_article_and_update_index(t, s, art.get("image"), site_cfg, art.get("publishedAt"))
+        dedup.mark_processed(art["url"], art.get("publishedAt"), site_cfg, art.get("canonical"))
+        neardup.remember(art, near)
+        autotweet.tweet_from_prompt(site_cfg, t, s, art.get("source", ""), art["url"])
+
+    def pipeline_setup():
+        cold_caches()
+        dedup.clear_run_cache()
+        standin.blobs.clear()
+
+    bench.stage("pipeline", pipeline, setup=pipeline_setup)
+
+    parity = check_extraction_parity()
+    standin.stop()
+    shutil.rmtree(cache_root, ignore_errors=True)
+
+    print(bench.report())
+    if parity:
+        print("ÉCHEC parité extraction : " + ", ".join(parity))
+    else:
+        print("Parité extraction : OK (" + ", ".join(extract.available_engines()) + ")")
+    return {"stages": bench.results, "peak_rss_mb": _peak_rss_mb(), "parity_failures": parity}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne du pipeline Aurore.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="latence par service en secondes, ex: publisher=0.05,github=0.03")
+    parser.add_argument("--index-entries", type=int, default=300, help="taille de index.html et du manifeste émulés")
+    parser.add_argument("--big-page-factor", type=int, default=60, help="taille de la page volumineuse (multiple d'une fixture)")
+    parser.add_argument("--trace-memory", action="store_true", help="pic mémoire Python par étape (tracemalloc, plus lent)")
+    parser.add_argument("--json", help="écrit le rapport complet dans ce fichier")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    return 1 if result["parity_failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
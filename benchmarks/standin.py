@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+"""
+standin.py
+- Serveur HTTP local qui émule tous les services externes du pipeline :
+  Google News (RSS + redirections), sites éditeurs, Netlify Blobs (API
+  directe et fonction blobs-proxy, lots compris), GitHub (contents + Git Data API), Gemini et Twitter
+- Latence configurable par service, compteurs d'appels par service et par route
+- Aucun accès réseau : tout est servi depuis benchmarks/fixtures
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SERVICES = ("rss", "publisher", "blobs", "functions", "github", "gemini", "twitter")
+LIST_PAGE_SIZE = 100
+PROXY_MAX_BATCH = 500
+PROXY_TOKEN = "bench-proxy-token"
+
+GEMINI_REPLY = (
+    "<TITRE>Réforme des collectivités : le projet de loi présenté</TITRE>"
+    "<RESUME>Le gouvernement a présenté mercredi un projet de loi de simplification.\n"
+    "Les communes de moins de 3 500 habitants pourront mutualiser certains services.\n"
+    "La ministre a défendu une réforme pragmatique.\n"
+    "Près de 70 % des maires jugent les procédures trop lourdes.</RESUME>"
+)
+
+
+def article_fixtures() -> List[str]:
+    d = os.path.join(FIXTURES, "articles")
+    return sorted(n for n in os.listdir(d) if n.endswith(".html"))
+
+
+def read_fixture(*parts: str) -> bytes:
+    with open(os.path.join(FIXTURES, *parts), "rb") as f:
+        return f.read()
+
+
+def make_index_html(n: int, brand: str = "Libre") -> str:
+    """index.html de site avec n entrées dans #latest-articles."""
+    lis = "\n".join(
+        f'<li><a href="/articles/2025-01-{1 + i % 28:02d}-article-{i}.html">Article numéro {i} sur la vie politique</a> '
+        f'<time datetime="2025-01-{1 + i % 28:02d}">2025-01-{1 + i % 28:02d}</time></li>'
+        for i in range(n)
+    )
+    return (
+        '<!DOCTYPE html>\n<html lang="fr">\n<head><meta charset="UTF-8"><title>' + brand + "</title></head>\n"
+        "<body>\n<header><nav><a href=\"/\">Accueil</a></nav></header>\n<main>\n"
+        '<section class="hero"><h1>À la une</h1><p>Dernières analyses de la rédaction.</p></section>\n'
+        '<ul id="latest-articles">\n' + lis + "\n</ul>\n"
+        "</main>\n<footer><p>&copy; 2025 Horizon Network.</p></footer>\n</body>\n</html>\n"
+    )
+
+
+def make_manifest(n: int) -> Dict[str, Any]:
+    arts = [
+        {
+            "title": f"Article numéro {i} sur la vie politique",
+            "iso_date": f"2025-01-{1 + i % 28:02d}T08:00:00+00:00",
+            "filename": f"2025-01-{1 + i % 28:02d}-article-{i}.html",
+            "image_url": f"https://img.example/{i}.jpg",
+        }
+        for i in range(n)
+    ]
+    arts.sort(key=lambda a: a["iso_date"], reverse=True)
+    return {"version": 1, "articles": arts}
+
+
+# -----------------------------
+# Dépôt Git en mémoire
+# -----------------------------
+class MemoryRepo:
+    def __init__(self, full_name: str, files: Dict[str, str]):
+        self.full_name = full_name
+        self.blobs: Dict[str, bytes] = {}
+        self.trees: Dict[str, Dict[str, str]] = {}
+        self.commits: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        tree = self._tree({p: self._blob(c.encode("utf-8")) for p, c in files.items()})
+        self.head = self._commit("initial", tree, [])
+
+    @staticmethod
+    def _sha(kind: str, data: bytes) -> str:
+        return hashlib.sha1(kind.encode() + b"\0" + data).hexdigest()
+
+    def _blob(self, data: bytes) -> str:
+        sha = self._sha("blob", data)
+        self.blobs[sha] = data
+        return sha
+
+    def _tree(self, entries: Dict[str, str]) -> str:
+        sha = self._sha("tree", json.dumps(entries, sort_keys=True).encode())
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def _commit(self, message: str, tree: str, parents: List[str]) -> str:
+        payload = json.dumps([message, tree, parents, time.time()]).encode()
+        sha = self._sha("commit", payload)
+        self.commits[sha] = {"message": message, "tree": tree, "parents": parents}
+        return sha
+
+    def files_at(self, ref: Optional[str]) -> Dict[str, str]:
+        sha = self.head if not ref or ref in ("main", "heads/main", "refs/heads/main") else ref
+        commit = self.commits.get(sha)
+        return self.trees[commit["tree"]] if commit else {}
+
+
+# -----------------------------
+# Handler
+# -----------------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, *args):
+        pass
+
+    # ---- utilitaires ----
+    def _send(self, status: int, body: bytes = b"", ctype: str = "application/json", headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _json(self, status: int, obj: Any):
+        self._send(status, json.dumps(obj).encode("utf-8"))
+
+    def _body(self) -> bytes:
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n) if n else b""
+
+    def _conditional(self, body: bytes, ctype: str):
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", ctype, {"ETag": etag})
+            return
+        self._send(200, body, ctype, {"ETag": etag, "Last-Modified": self.server.started_http})
+
+    def _route(self) -> Tuple[str, str]:
+        path = urlparse(self.path).path
+        for prefix, service in (
+            ("/rss/articles/", "rss"),
+            ("/rss/", "rss"),
+            ("/pub/", "publisher"),
+            ("/api/v1/sites/", "blobs"),
+            ("/.netlify/functions/", "functions"),
+            ("/repos/", "github"),
+            ("/gemini/", "gemini"),
+            ("/twitter/", "twitter"),
+        ):
+            if path.startswith(prefix):
+                return service, path
+        return "unknown", path
+
+    def _dispatch(self):
+        service, path = self._route()
+        st = self.server.standin
+        st.count(service, f"{self.command} {path}")
+        delay = st.latency.get(service, 0.0)
+        if delay:
+            time.sleep(delay)
+        handler = getattr(self, f"_{service}", None)
+        if handler is None:
+            self._json(404, {"message": "Not Found"})
+            return
+        handler(path)
+
+    do_GET = do_PUT = do_POST = do_PATCH = do_DELETE = do_HEAD = _dispatch
+
+    # ---- Google News ----
+    def _rss(self, path: str):
+        base = self.server.standin.base_url
+        if path.startswith("/rss/articles/"):
+            i = int(path.rsplit("/", 1)[1])
+            names = article_fixtures()
+            self._send(302, b"", "text/html", {"Location": f"{base}/pub/{i}/{names[i % len(names)]}"})
+            return
+        body = read_fixture("rss.xml").decode("utf-8").replace("{base}", base).encode("utf-8")
+        self._conditional(body, "application/rss+xml; charset=utf-8")
+
+    # ---- éditeurs ----
+    def _publisher(self, path: str):
+        name = path.rsplit("/", 1)[1]
+        if name not in article_fixtures():
+            self._send(404, b"not found", "text/html")
+            return
+        self._conditional(read_fixture("articles", name), "text/html; charset=utf-8")
+
+    # ---- Netlify Blobs ----
+    def _blobs(self, path: str):
+        st = self.server.standin
+        rest = path.split("/blobs/", 1)[1]
+        store, _, key = rest.partition("/")
+        key = unquote(key)
+        data = st.blobs.setdefault(store, {})
+        if not key:
+            if self.command != "GET":
+                self._json(405, {"message": "Method Not Allowed"})
+                return
+            qs = parse_qs(urlparse(self.path).query)
+            prefix = (qs.get("prefix") or [""])[0]
+            cursor = int((qs.get("cursor") or ["0"])[0] or 0)
+            keys = sorted(k for k in data if k.startswith(prefix))
+            page = keys[cursor : cursor + LIST_PAGE_SIZE]
+            out: Dict[str, Any] = {
+                "blobs": [{"key": k, "etag": hashlib.md5(data[k][0]).hexdigest(), "last_modified": data[k][1]} for k in page]
+            }
+            if cursor + LIST_PAGE_SIZE < len(keys):
+                out["next_cursor"] = str(cursor + LIST_PAGE_SIZE)
+            self._json(200, out)
+            return
+        if self.command in ("GET", "HEAD"):
+            if key in data:
+                self._send(200, data[key][0], "application/json", {"Last-Modified": data[key][1]})
+            else:
+                self._send(404, b"")
+        elif self.command == "PUT":
+            data[key] = (self._body(), formatdate(usegmt=True))
+            self._send(200, b"")
+        elif self.command == "DELETE":
+            if st.throttled():
+                self._send(429, b"", "application/json", {"Retry-After": "0"})
+                return
+            data.pop(key, None)
+            self._send(204, b"")
+        else:
+            self._json(405, {"message": "Method Not Allowed"})
+
+    # ---- Netlify Function blobs-proxy (même stockage que l'API directe) ----
+    def _functions(self, path: str):
+        st = self.server.standin
+        if path.rstrip("/") != "/.netlify/functions/blobs-proxy":
+            self._send(404, b"")
+            return
+        if self.headers.get("X-AURORE-TOKEN") != st.proxy_token:
+            self._send(401, b"Unauthorized", "text/plain")
+            return
+        qs = parse_qs(urlparse(self.path).query)
+        body = json.loads(self._body() or b"{}") if self.command == "POST" else {}
+        data = st.blobs.setdefault(body.get("store") or (qs.get("store") or ["aurore-memory"])[0], {})
+
+        def load(key):
+            return json.loads(data[key][0]) if key in data and data[key][0] else None
+
+        if self.command == "GET":
+            key = (qs.get("key") or [""])[0]
+            val = load(key) if key else None
+            if val:
+                self._send(200, json.dumps(val).encode("utf-8"))
+            else:
+                self._send(404 if key else 400, b"")
+        elif self.command == "POST" and (isinstance(body.get("get"), list) or isinstance(body.get("put"), list)):
+            gets, puts = body.get("get") or [], body.get("put") or []
+            if len(gets) + len(puts) > PROXY_MAX_BATCH:
+                self._send(413, b"Batch too large", "text/plain")
+                return
+            # clés de st.proxy_failing : erreur du store côté fonction (champ errors, comme blobs-proxy.js)
+            errors = {k: "store unavailable" for k in gets + [p["key"] for p in puts] if k in st.proxy_failing}
+            for p in puts:
+                if p["key"] not in errors:
+                    data[p["key"]] = (json.dumps(p.get("value", {})).encode("utf-8"), formatdate(usegmt=True))
+            self._json(200, {
+                "values": {k: load(k) for k in gets if k not in errors},
+                "written": [p["key"] for p in puts if p["key"] not in errors],
+                "errors": errors,
+            })
+        elif self.command == "POST":
+            data[body["key"]] = (json.dumps(body.get("meta") or {}).encode("utf-8"), formatdate(usegmt=True))
+            self._send(201, b"OK", "text/plain")
+        else:
+            self._send(405, b"Method Not Allowed", "text/plain")
+
+    # ---- GitHub ----
+    def _gh_url(self, repo: MemoryRepo, suffix: str) -> str:
+        return f"{self.server.standin.base_url}/repos/{repo.full_name}{suffix}"
+
+    def _gh_commit_json(self, repo: MemoryRepo, sha: str) -> Dict[str, Any]:
+        c = repo.commits[sha]
+        return {
+            "sha": sha,
+            "url": self._gh_url(repo, f"/git/commits/{sha}"),
+            "message": c["message"],
+            "tree": {"sha": c["tree"], "url": self._gh_url(repo, f"/git/trees/{c['tree']}")},
+            "parents": [{"sha": p, "url": self._gh_url(repo, f"/git/commits/{p}")} for p in c["parents"]],
+        }
+
+    def _gh_ref_json(self, repo: MemoryRepo) -> Dict[str, Any]:
+        return {
+            "ref": "refs/heads/main",
+            "url": self._gh_url(repo, "/git/refs/heads/main"),
+            "object": {"sha": repo.head, "type": "commit", "url": self._gh_url(repo, f"/git/commits/{repo.head}")},
+        }
+
+    def _github(self, path: str):
+        st = self.server.standin
+        parts = path.split("/")  # ['', 'repos', owner, name, ...]
+        full = "/".join(parts[2:4])
+        repo = st.repos.get(full)
+        if repo is None:
+            self._json(404, {"message": "Not Found"})
+            return
+        rest = "/".join(parts[4:])
+        qs = parse_qs(urlparse(self.path).query)
+
+        with repo.lock:
+            if rest == "":
+                owner, name = full.split("/")
+                self._json(200, {
+                    "id": 1, "name": name, "full_name": full, "default_branch": "main",
+                    "url": self._gh_url(repo, ""), "owner": {"login": owner},
+                })
+            elif rest.startswith("contents"):
+                self._gh_contents(repo, unquote(rest[len("contents"):].lstrip("/")), (qs.get("ref") or [None])[0])
+            elif rest in ("git/ref/heads/main", "git/refs/heads/main") and self.command == "GET":
+                self._json(200, self._gh_ref_json(repo))
+            elif rest == "git/refs/heads/main" and self.command == "PATCH":
+                body = json.loads(self._body() or b"{}")
+                new = body.get("sha")
+                commit = repo.commits.get(new)
+                if not commit or (not body.get("force") and repo.head not in commit["parents"]):
+                    self._json(422, {"message": "Update is not a fast forward"})
+                    return
+                repo.head = new
+                self._json(200, self._gh_ref_json(repo))
+            elif rest.startswith("git/commits/") and self.command == "GET":
+                sha = rest.rsplit("/", 1)[1]
+                if sha not in repo.commits:
+                    self._json(404, {"message": "Not Found"})
+                    return
+                self._json(200, self._gh_commit_json(repo, sha))
+            elif rest == "git/blobs" and self.command == "POST":
+                body = json.loads(self._body() or b"{}")
+                raw = body.get("content", "")
+                data = base64.b64decode(raw) if body.get("encoding") == "base64" else raw.encode("utf-8")
+                sha = repo._blob(data)
+                self._json(201, {"sha": sha, "url": self._gh_url(repo, f"/git/blobs/{sha}")})
+            elif rest == "git/trees" and self.command == "POST":
+                body = json.loads(self._body() or b"{}")
+                entries = dict(repo.trees.get(body.get("base_tree") or "", {}))
+                for el in body.get("tree", []):
+                    if el.get("content") is not None:
+                        entries[el["path"]] = repo._blob(el["content"].encode("utf-8"))
+                    elif el.get("sha"):
+                        entries[el["path"]] = el["sha"]
+                    else:
+                        entries.pop(el["path"], None)
+                sha = repo._tree(entries)
+                self._json(201, {"sha": sha, "url": self._gh_url(repo, f"/git/trees/{sha}"), "tree": []})
+            elif rest == "git/commits" and self.command == "POST":
+                body = json.loads(self._body() or b"{}")
+                sha = repo._commit(body.get("message", ""), body["tree"], list(body.get("parents") or []))
+                self._json(201, self._gh_commit_json(repo, sha))
+            else:
+                self._json(404, {"message": "Not Found"})
+
+    def _gh_contents(self, repo: MemoryRepo, path: str, ref: Optional[str]):
+        files = repo.files_at(ref)
+        if path in files:
+            data = repo.blobs[files[path]]
+            self._json(200, {
+                "type": "file", "encoding": "base64", "content": base64.b64encode(data).decode("ascii"),
+                "sha": files[path], "size": len(data), "name": path.rsplit("/", 1)[-1], "path": path,
+                "url": self._gh_url(repo, f"/contents/{path}"),
+            })
+            return
+        prefix = path.rstrip("/") + "/" if path else ""
+        children: Dict[str, str] = {}
+        for p in files:
+            if p.startswith(prefix):
+                head, sep, _ = p[len(prefix):].partition("/")
+                children[head] = "dir" if sep else "file"
+        if not children:
+            self._json(404, {"message": "Not Found"})
+            return
+        self._json(200, [
+            {"type": kind, "name": n, "path": prefix + n, "sha": files.get(prefix + n, ""),
+             "url": self._gh_url(repo, f"/contents/{prefix + n}")}
+            for n, kind in sorted(children.items())
+        ])
+
+    # ---- Gemini / Twitter ----
+    def _gemini(self, path: str):
+        body = json.loads(self._body() or b"{}")
+        prompt = body.get("prompt") or ""
+        text = GEMINI_REPLY if "<TEXTE_SOURCE>" in prompt else "Réforme des collectivités : le projet de loi présenté #Politique #Collectivités #France"
+        self._json(200, {"text": text, "prompt_chars": len(prompt)})
+
+    def _twitter(self, path: str):
+        body = self._body()
+        self._json(200, {"id": 1, "text": json.loads(body or b"{}").get("status", "")})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    standin: "StandIn"
+    started_http: str
+
+
+class StandIn:
+    """
+    with StandIn(latency={"publisher": 0.05}) as s:
+        s.base_url  # http://127.0.0.1:<port>
+    """
+
+    def __init__(
+        self,
+        latency: Optional[Dict[str, float]] = None,
+        index_entries: int = 300,
+        repo_name: str = "bench/site",
+        throttle_every: int = 0,
+    ):
+        self.latency = {k: float(v) for k, v in (latency or {}).items()}
+        self.calls: Counter = Counter()
+        self.routes: Counter = Counter()
+        self.blobs: Dict[str, Dict[str, Tuple[bytes, str]]] = {}
+        self.throttle_every = int(throttle_every)
+        self.proxy_token = PROXY_TOKEN
+        self.proxy_failing: set = set()
+        self._deletes = 0
+        self._lock = threading.Lock()
+        files = {
+            "index.html": make_index_html(index_entries),
+            "articles/manifest.json": json.dumps(make_manifest(index_entries), ensure_ascii=False),
+        }
+        for a in make_manifest(min(index_entries, 20))["articles"]:
+            files[f"articles/{a['filename']}"] = f"<html><head><meta property=\"og:title\" content=\"{a['title']}\"></head></html>"
+        self.repos = {repo_name: MemoryRepo(repo_name, files)}
+        self.repo_name = repo_name
+        self._httpd: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.base_url = ""
+
+    def count(self, service: str, route: str) -> None:
+        with self._lock:
+            self.calls[service] += 1
+            self.routes[route] += 1
+
+    def throttled(self) -> bool:
+        """Vrai une fois tous les `throttle_every` DELETE (réponse 429, test des retries)."""
+        if not self.throttle_every:
+            return False
+        with self._lock:
+            self._deletes += 1
+            return self._deletes % self.throttle_every == 0
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.routes.clear()
+
+    def start(self) -> "StandIn":
+        self._httpd = _Server(("127.0.0.1", 0), _Handler)
+        self._httpd.standin = self
+        self._httpd.started_http = formatdate(usegmt=True)
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self) -> "StandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
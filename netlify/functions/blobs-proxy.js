@@ -1,5 +1,48 @@
 const { getStore } = require("@netlify/blobs");
 
+// Lot : { store?, get: [clé...], put: [{ key, value }...] } -> { values: { clé: valeur | null }, written: [clé...], errors: { clé: message } }
+const MAX_BATCH = 500; // clés lues + écrites par invocation
+const CONCURRENCY = 16; // opérations simultanées sur le store dans une invocation
+
+async function mapLimit(items, limit, fn) {
+  const out = new Array(items.length);
+  let next = 0;
+  const workers = Array.from({ length: Math.min(limit, items.length) }, async () => {
+    while (next < items.length) {
+      const i = next++;
+      out[i] = await fn(items[i], i);
+    }
+  });
+  await Promise.all(workers);
+  return out;
+}
+
+async function runBatch(store, gets, puts) {
+  const values = {};
+  const written = [];
+  const errors = {};
+  const ops = [
+    ...gets.map((key) => async () => {
+      try {
+        const val = await store.get(key, { type: "json" });
+        values[key] = val === undefined ? null : val;
+      } catch (err) {
+        errors[key] = err.message;
+      }
+    }),
+    ...puts.map(({ key, value }) => async () => {
+      try {
+        await store.setJSON(key, value === undefined ? {} : value);
+        written.push(key);
+      } catch (err) {
+        errors[key] = err.message;
+      }
+    }),
+  ];
+  await mapLimit(ops, CONCURRENCY, (op) => op());
+  return { values, written, errors };
+}
+
 exports.handler = async (event) => {
   try {
     const secret = process.env.AURORE_BLOBS_TOKEN;
@@ -9,14 +52,16 @@ exports.handler = async (event) => {
       return { statusCode: 401, body: "Unauthorized" };
     }
 
+    const qs = event.queryStringParameters || {};
+    const body = event.httpMethod === "POST" ? JSON.parse(event.body || "{}") : {};
+
     const store = getStore({
-      name: "aurore-memory",
+      name: body.store || qs.store || "aurore-memory",
       siteID: process.env.NETLIFY_SITE_ID,
       token: process.env.NETLIFY_API_TOKEN,
     });
 
     if (event.httpMethod === "GET") {
-      const qs = event.queryStringParameters || {};
       const key = qs.key;
       if (!key) return { statusCode: 400, body: "Missing key" };
       const val = await store.getJSON(key);
@@ -24,8 +69,17 @@ exports.handler = async (event) => {
       return { statusCode: 200, body: JSON.stringify(val) };
     }
 
+    if (event.httpMethod === "POST" && (Array.isArray(body.get) || Array.isArray(body.put))) {
+      const gets = [...new Set((body.get || []).filter((k) => typeof k === "string" && k))];
+      const puts = (body.put || []).filter((p) => p && typeof p.key === "string" && p.key);
+      if (gets.length + puts.length > MAX_BATCH) {
+        return { statusCode: 413, body: `Batch too large (max ${MAX_BATCH})` };
+      }
+      const result = await runBatch(store, gets, puts);
+      return { statusCode: 200, headers: { "Content-Type": "application/json" }, body: JSON.stringify(result) };
+    }
+
     if (event.httpMethod === "POST") {
-      const body = JSON.parse(event.body || "{}");
       const { key, meta } = body;
       if (!key) return { statusCode: 400, body: "Missing key" };
       await store.setJSON(key, meta || {});
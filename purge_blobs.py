@@ -1,6 +1,31 @@
 # -*- coding: utf-8 -*-
+"""
+purge_blobs.py
+- Maintenance des stores Netlify Blobs : liste complète (pagination par
+  curseur), filtres par préfixe et par âge, suppressions concurrentes
+  (pool borné, retry sur 429 / 503 en respectant Retry-After), mode dry-run
+- Rapport final : clés listées / retenues / supprimées / en échec, retries,
+  durée et débit
+- NETLIFY_API_URL permet de viser un autre hôte (stand-in local des benchmarks)
+
+Usage :
+    python purge_blobs.py                                   # purge complète des STORE_NAMES
+    python purge_blobs.py --store aurore-memory --prefix processed: --older-than 90d --dry-run
+    python purge_blobs.py --store aurore-memory --prefix processed: --older-than 90d --workers 16
+"""
 import os
+import re
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 # --- CONFIGURATION ---
@@ -8,53 +33,179 @@ from dotenv import load_dotenv
 STORE_NAMES = ["aurore-libre-store", "aurore-tech-store", "aurore-memory"]
 # ---------------------
 
-def purge_store(store_name):
-    print(f"\n--- Nettoyage du store : {store_name} ---")
-    
-    # Construction de l'URL de base pour le store
-    base_url = f"https://api.netlify.com/api/v1/sites/{os.environ['NETLIFY_SITE_ID']}/blobs/{store_name}"
-    headers = {
-        "Authorization": f"Bearer {os.environ['NETLIFY_BLOBS_TOKEN']}"
-    }
+DEFAULT_WORKERS = 8
+MAX_ATTEMPTS = 6
+RETRY_STATUSES = (429, 503)
+TIMEOUT = 15
+
+_AGE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$")
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400, "": 86400}
+
+
+def parse_age(spec):
+    """'90d', '12h', '2w', '30' (jours) -> secondes."""
+    m = _AGE_RE.match(spec or "")
+    if not m:
+        raise argparse.ArgumentTypeError(f"âge invalide : {spec!r} (ex. 90d, 12h, 2w)")
+    return float(m.group(1)) * _AGE_UNITS[m.group(2)]
+
 
+def _parse_date(value):
+    if not value:
+        return None
     try:
-        # Étape 1 : Lister toutes les clés dans le store
-        response = requests.get(base_url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        keys_to_delete = [entry['key'] for entry in data.get('keys', [])]
-        
-        if not keys_to_delete:
-            print("Le store est déjà vide. Rien à faire.")
-            return
-
-        print(f"Trouvé {len(keys_to_delete)} clé(s) à supprimer.")
-
-        # Étape 2 : Supprimer chaque clé
-        for key in keys_to_delete:
-            print(f"Suppression de la clé : {key} ...", end='')
-            delete_response = requests.delete(f"{base_url}/{key}", headers=headers)
-            delete_response.raise_for_status()
-            print(" OK")
-            
-        print(f">>> SUCCÈS : Le store '{store_name}' a été purgé.")
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class BlobStore:
+    def __init__(self, store_name, api_url=None, site_id=None, token=None, workers=DEFAULT_WORKERS):
+        api_url = (api_url or os.environ.get("NETLIFY_API_URL") or "https://api.netlify.com").rstrip("/")
+        site_id = site_id or os.environ["NETLIFY_SITE_ID"]
+        self.store_name = store_name
+        self.base_url = f"{api_url}/api/v1/sites/{site_id}/blobs/{store_name}"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Authorization"] = f"Bearer {token or os.environ['NETLIFY_BLOBS_TOKEN']}"
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def _request(self, method, url, **kwargs):
+        """Requête avec retry sur 429 / 503 (Retry-After, sinon backoff exponentiel borné)."""
+        kwargs.setdefault("timeout", TIMEOUT)
+        for attempt in range(MAX_ATTEMPTS):
+            r = self.session.request(method, url, **kwargs)
+            if r.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                return r
+            with self._lock:
+                self.retries += 1
+            try:
+                wait = float(r.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                wait = min(10.0, 0.5 * 2 ** attempt)
+            time.sleep(max(0.0, wait))
+        return r
+
+    def list_entries(self, prefix=""):
+        """Toutes les entrées {key, last_modified?} du store, page après page (curseur)."""
+        cursor = None
+        while True:
+            params = {"prefix": prefix} if prefix else {}
+            if cursor:
+                params["cursor"] = cursor
+            r = self._request("GET", self.base_url, params=params)
+            r.raise_for_status()
+            data = r.json() or {}
+            for entry in data.get("blobs") or data.get("keys") or []:
+                if not isinstance(entry, dict):
+                    entry = {"key": entry}
+                if entry.get("key", "").startswith(prefix):
+                    yield entry
+            cursor = data.get("next_cursor") or data.get("cursor")
+            if not cursor:
+                return
+
+    def modified_at(self, entry):
+        """Horodatage de la dernière écriture : champ de la liste, sinon en-tête Last-Modified (HEAD)."""
+        ts = _parse_date(entry.get("last_modified") or entry.get("lastModified") or entry.get("updated_at"))
+        if ts is not None:
+            return ts
+        r = self._request("HEAD", f"{self.base_url}/{quote(entry['key'], safe=':')}")
+        return _parse_date(r.headers.get("Last-Modified")) if r.ok else None
+
+    def delete(self, key):
+        r = self._request("DELETE", f"{self.base_url}/{quote(key, safe=':')}")
+        # 404 : déjà supprimée (autre purge, run concurrent)
+        return r.status_code in (200, 204, 404)
+
 
+def purge_store(store_name, prefix="", older_than=None, workers=DEFAULT_WORKERS, dry_run=False, api_url=None):
+    """Purge un store ; renvoie le rapport (dict)."""
+    print(f"\n--- Nettoyage du store : {store_name} ---")
+    t0 = time.perf_counter()
+    report = {"store": store_name, "listed": 0, "matched": 0, "unknown_age": 0, "deleted": 0, "failed": 0, "retries": 0}
+    store = BlobStore(store_name, api_url=api_url, workers=workers)
+
+    try:
+        entries = list(store.list_entries(prefix))
     except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
+        if e.response is not None and e.response.status_code == 404:
             print(f"Le store '{store_name}' n'a pas été trouvé. On l'ignore.")
-        else:
-            print(f"\nERREUR HTTP: {e}")
-            print(f"Réponse de l'API: {e.response.text}")
-    except Exception as e:
-        print(f"\nERREUR inattendue : {e}")
+            return report
+        raise
+    report["listed"] = len(entries)
+
+    keys = [e["key"] for e in entries]
+    if older_than is not None:
+        cutoff = time.time() - older_than
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            stamps = list(pool.map(store.modified_at, entries))
+        report["unknown_age"] = sum(ts is None for ts in stamps)
+        # âge inconnu : la clé est conservée
+        keys = [e["key"] for e, ts in zip(entries, stamps) if ts is not None and ts < cutoff]
+    report["matched"] = len(keys)
+
+    if dry_run:
+        for key in keys[:20]:
+            print(f"[dry-run] {key}")
+        if len(keys) > 20:
+            print(f"[dry-run] … et {len(keys) - 20} autre(s)")
+    elif keys:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(store.delete, keys))
+        report["deleted"] = sum(results)
+        report["failed"] = len(results) - report["deleted"]
+
+    report["retries"] = store.retries
+    report["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    done = report["matched"] if dry_run else report["deleted"]
+    report["keys_per_s"] = round(done / report["elapsed_s"], 1) if report["elapsed_s"] else 0.0
+    print(
+        ("[dry-run] " if dry_run else "")
+        + f"{report['listed']} listée(s), {report['matched']} retenue(s), {report['deleted']} supprimée(s), "
+        f"{report['failed']} en échec, {report['retries']} retry(s), "
+        f"{report['elapsed_s']:.2f} s ({report['keys_per_s']} clés/s)"
+    )
+    if report["unknown_age"]:
+        print(f"WARN {report['unknown_age']} clé(s) sans date de modification : conservées.")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Purge (filtrée) des stores Netlify Blobs.")
+    parser.add_argument("--store", action="append", help=f"store à purger (répétable ; défaut : {', '.join(STORE_NAMES)})")
+    parser.add_argument("--prefix", default="", help="seulement les clés commençant par ce préfixe (ex. processed:)")
+    parser.add_argument("--older-than", type=parse_age, default=None, help="seulement les clés modifiées il y a plus de (ex. 90d, 12h)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="suppressions simultanées")
+    parser.add_argument("--dry-run", action="store_true", help="liste ce qui serait supprimé, sans rien supprimer")
+    parser.add_argument("--api-url", default=None, help="hôte de l'API (défaut : NETLIFY_API_URL ou api.netlify.com)")
+    args = parser.parse_args(argv)
 
-if __name__ == "__main__":
     print("Chargement des secrets depuis le fichier .env...")
     load_dotenv()
-
     if not os.getenv("NETLIFY_SITE_ID") or not os.getenv("NETLIFY_BLOBS_TOKEN"):
         print("ERREUR : Les secrets NETLIFY_SITE_ID et NETLIFY_BLOBS_TOKEN doivent être définis dans le fichier .env")
-    else:
-        for store in STORE_NAMES:
-            purge_store(store)
+        return 1
+
+    failed = 0
+    for store in args.store or STORE_NAMES:
+        try:
+            report = purge_store(store, args.prefix, args.older_than, args.workers, args.dry_run, args.api_url)
+            failed += report["failed"]
+        except Exception as e:
+            print(f"\nERREUR sur '{store}' : {e}")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,27 +4,21 @@ import sys
 import json
 import base64
 import re
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Optional, Tuple, List, Dict
 
-from github import Github, Auth
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from . import gitdata, indexpatch, lazy, manifest, metrics, neardup, redirects, render
+from .config import Settings
 
-# Dépendances optionnelles (on gère l'absence proprement)
-try:
-    import tweepy
-except Exception:
-    tweepy = None
+# Dépendances lourdes : importées à la première utilisation (lazy.py).
+# Optionnelles (tweepy, gnews, bs4) : lazy.optional -> None si absentes.
+github = lazy.module("github")
 
-try:
-    from gnews import GNews
-except Exception:
-    GNews = None
-
-try:
-    from bs4 import BeautifulSoup
-except Exception:
-    BeautifulSoup = None
+# Mode multi-site : site du thread courant (préfixe des logs)
+_ctx = threading.local()
 
 
 # -----------------------------
@@ -37,7 +31,8 @@ def log(msg: str, level: str = "info"):
         "warn": "⚠️  ",
         "error": "❌ ",
     }.get(level, "")
-    print(f"{prefix}{msg}")
+    site = getattr(_ctx, "site", None)
+    print(f"[{site}] {prefix}{msg}" if site else f"{prefix}{msg}")
 
 
 def get_env(name: str, default: Optional[str] = None) -> Optional[str]:
@@ -56,21 +51,27 @@ def load_config(path: str = "config.json") -> Dict:
         return json.load(f)
 
 
-def jinja_env() -> Environment:
-    templates_dir = os.path.join(os.path.dirname(__file__), "templates")
-    env = Environment(
-        loader=FileSystemLoader(templates_dir),
-        autoescape=select_autoescape(["html", "xml"]),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
-    return env
+def jinja_env():
+    return render.get_env(render.PIPELINE_TEMPLATES, **render.PIPELINE_OPTIONS)
 
 
 # -----------------------------
 # GitHub helpers
 # -----------------------------
+_gh_client = None
+_gh_lock = threading.Lock()
+
+
 def get_github_client():
+    """Client GitHub du processus (partagé entre les sites en mode --sites all)."""
+    global _gh_client
+    with _gh_lock:
+        if _gh_client is None:
+            _gh_client = _new_github_client()
+    return _gh_client
+
+
+def _new_github_client():
     token = (
         get_env("A_GH_TOKEN")
         or get_env("GH_TOKEN")
@@ -78,66 +79,77 @@ def get_github_client():
     )
     if not token:
         raise RuntimeError("Aucun token GitHub (A_GH_TOKEN / GH_TOKEN / GITHUB_TOKEN).")
-    return Github(auth=Auth.Token(token))
+    return github.Github(auth=github.Auth.Token(token), base_url=Settings.GITHUB_API_URL)
 
 
-def get_repo_for_site(site: str):
+def get_repo_for_site(site: str, cfg: Optional[Dict] = None):
     if site == "tech":
         full = get_env("A_TECH_REPO")
     elif site == "libre":
         full = get_env("A_LIBRE_REPO")
+    elif cfg and site in cfg:
+        full = None
     else:
         raise RuntimeError(f"Site inconnu: {site}")
+    # à défaut de variable d'env : site_repo_name de config.json
+    full = full or ((cfg or {}).get(site) or {}).get("site_repo_name")
 
     if not full or "/" not in full:
         raise RuntimeError(
             f"Repo pour site='{site}' introuvable. "
-            f"Attendu env A_{site.upper()}_REPO sous forme owner/repo."
+            f"Attendu env A_{site.upper()}_REPO (ou site_repo_name dans config.json) sous forme owner/repo."
         )
     gh = get_github_client()
     return gh.get_repo(full), full
 
 
-def gh_read_text(repo, path: str) -> Tuple[Optional[str], Optional[str]]:
+def gh_read_text(repo, path: str, ref: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
     try:
-        f = repo.get_contents(path)
+        f = repo.get_contents(path, ref=ref) if ref else repo.get_contents(path)
         content = base64.b64decode(f.content).decode("utf-8")
         return content, f.sha
     except Exception:
         return None, None
 
 
-def gh_write_text(repo, path: str, text: str, message: str, sha: Optional[str] = None):
-    encoded = text.encode("utf-8")
-    content = base64.b64encode(encoded).decode("ascii")
-
-    if sha:
-        repo.update_file(path, message, text, sha, branch=repo.default_branch)
-    else:
-        repo.create_file(path, message, text, branch=repo.default_branch)
-
-
 # -----------------------------
 # NEWS → sélection minimale
 # -----------------------------
+# FR, tech/crypto/IA — mêmes requêtes pour tous les sites
+GNEWS_QUERIES = [
+    "intelligence artificielle",
+    "IA",
+    "crypto IA",
+    "open source IA",
+    "machine learning",
+    "blockchain IA",
+]
+
+# En mode multi-site, un même jeu de requêtes n'est interrogé qu'une fois par run
+_cands_cache: Dict[Tuple, List[Dict]] = {}
+_cands_lock = threading.Lock()
+
+
 def fetch_candidates(site: str, max_items: int = 8) -> List[Dict]:
     """Retourne une petite liste d’items (titre, url, date, source).
     Utilise GNews si dispo, sinon renvoie une liste vide -> le job sortira proprement."""
+    key = (tuple(GNEWS_QUERIES), max_items)
+    with _cands_lock:
+        if key not in _cands_cache:
+            _cands_cache[key] = _fetch_gnews(GNEWS_QUERIES, max_items)
+        else:
+            log("Candidats déjà collectés par un autre site — réutilisés.")
+        return [dict(it) for it in _cands_cache[key]]
+
+
+def _fetch_gnews(queries: List[str], max_items: int) -> List[Dict]:
     items: List[Dict] = []
-    if GNews is None:
+    gnews = lazy.optional("gnews")
+    if gnews is None:
         log("GNews indisponible (module non importé).", "warn")
         return items
 
-    # FR, tech/crypto/IA
-    g = GNews(language="fr", country="FR", period="1d", max_results=max_items)
-    queries = [
-        "intelligence artificielle",
-        "IA",
-        "crypto IA",
-        "open source IA",
-        "machine learning",
-        "blockchain IA",
-    ]
+    g = gnews.GNews(language="fr", country="FR", period="1d", max_results=max_items)
     for q in queries:
         try:
             res = g.get_news(q)
@@ -170,9 +182,16 @@ def fetch_candidates(site: str, max_items: int = 8) -> List[Dict]:
     return dedup[:max_items]
 
 
-def choose_latest_not_posted(cands: List[Dict]) -> Optional[Dict]:
-    # Ici on prend le premier (déjà filtré par fraicheur via GNews).
-    return cands[0] if cands else None
+def choose_latest_not_posted(cands: List[Dict], near_dups: Optional[neardup.NearDupIndex] = None) -> Optional[Dict]:
+    # Ici on prend le premier (déjà filtré par fraicheur via GNews),
+    # sauf histoire proche d'un article publié récemment (titres, neardup.py).
+    for c in cands:
+        match = neardup.check(c, near_dups)
+        if match:
+            log(f"Histoire proche déjà publiée ({match['similarity']:.2f}) : {c['title']}")
+            continue
+        return c
+    return None
 
 
 # -----------------------------
@@ -184,53 +203,11 @@ def render_article_html(article: Dict) -> str:
     return tpl.render(article=article)
 
 
-def patch_index_html(index_html: str, new_entry: Dict, keep: int = 10) -> str:
-    """Insère dans #latest-articles un <li><a>…</a> …</li>, max keep.
-    Si BeautifulSoup n’est pas dispo, on fait un patch naïf basé sur regex."""
-    href = f"/articles/{new_entry['filename']}"
-    li_html = f'<li><a href="{href}">{new_entry["title"]}</a> <time datetime="{new_entry["iso_date"]}">{new_entry["date"]}</time></li>'
-
-    if BeautifulSoup:
-        soup = BeautifulSoup(index_html, "html.parser")
-        ul = soup.select_one("#latest-articles")
-        if not ul:
-            # crée la liste si absente
-            container = soup.body or soup
-            new_ul = soup.new_tag("ul", id="latest-articles")
-            container.insert(0, new_ul)
-            ul = new_ul
-
-        # prepend
-        ul.insert(0, BeautifulSoup(li_html, "html.parser"))
-
-        # trim
-        lis = ul.find_all("li")
-        for li in lis[keep:]:
-            li.decompose()
-
-        return str(soup)
-
-    # fallback regex si BS4 absent
-    pat = re.compile(r'(<ul[^>]*id="latest-articles"[^>]*>)(.*?)(</ul>)', re.S | re.I)
-    m = pat.search(index_html)
-    if not m:
-        # injecte une UL au début du body
-        index_html = re.sub(
-            r"(<body[^>]*>)",
-            r'\1\n<ul id="latest-articles">\n' + li_html + "\n</ul>\n",
-            index_html,
-            count=1,
-            flags=re.I,
-        )
-        return index_html
-
-    head, inner, tail = m.group(1), m.group(2), m.group(3)
-    # prends les <li> existants
-    existing = re.findall(r"<li>.*?</li>", inner, re.S | re.I)
-    new_list = [li_html] + existing
-    new_list = new_list[:keep]
-    patched = head + "\n" + "\n".join(new_list) + "\n" + tail
-    return index_html[: m.start()] + patched + index_html[m.end() :]
+def patch_index_html(index_html: str, new_entry: Dict, keep: int = indexpatch.DEFAULT_KEEP,
+                     selector: str = indexpatch.DEFAULT_SELECTOR) -> str:
+    """Insère un <li><a>…</a> …</li> en tête de la liste (marqueurs aurore:latest, sinon `selector`), max keep.
+    Seule la plage de la liste est réécrite (indexpatch.py)."""
+    return indexpatch.patch(index_html, new_entry, selector=selector, keep=keep)
 
 
 # -----------------------------
@@ -247,6 +224,7 @@ def maybe_tweet(title: str, url: str):
         log("Clés Twitter manquantes — tweet ignoré.", "warn")
         return
 
+    tweepy = lazy.optional("tweepy")
     if tweepy is None:
         log("tweepy indisponible — tweet ignoré.", "warn")
         return
@@ -265,18 +243,74 @@ def maybe_tweet(title: str, url: str):
 # -----------------------------
 # MAIN PIPELINE
 # -----------------------------
-def main():
-    site = get_env("SITE", "tech").strip().lower()
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m aurore")
+    parser.add_argument(
+        "--sites",
+        default=None,
+        help="site(s) à traiter : un nom, une liste séparée par des virgules, ou 'all' (tous ceux de config.json). "
+             "Défaut : variable SITE.",
+    )
+    return parser.parse_args(argv)
+
+
+def resolve_sites(spec: Optional[str], cfg: Dict) -> List[str]:
+    spec = (spec or get_env("SITE", "tech")).strip().lower()
+    if spec == "all":
+        return list(cfg)
+    return [s.strip() for s in spec.split(",") if s.strip()]
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
     print(f"  ")
     log(f"Démarrage du bot Aurore (mode SAFE index).")
 
-    # Lecture config (juste pour valider le JSON)
+    # Lecture config (valide le JSON et liste les sites)
     cfg = load_config()
-    _ = cfg  # si on n'utilise pas tout, au moins on valide le fichier
     log("config.json OK", "ok")
 
+    sites = resolve_sites(args.sites, cfg)
+    metrics.annotate(site=",".join(sites))
+    if len(sites) == 1:
+        metrics.annotate(outcome=run_site(sites[0], cfg))
+        return
+
+    # Plusieurs sites dans le même processus : pool HTTP, caches de pages,
+    # environnement Jinja et client GitHub partagés ; dépôts séparés.
+    log(f"Mode multi-site : {', '.join(sites)}")
+    outcomes: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=len(sites), thread_name_prefix="site") as pool:
+        futures = {site: pool.submit(_run_site_scoped, site, cfg) for site in sites}
+        for site, fut in futures.items():
+            try:
+                outcomes[site] = fut.result()
+            except Exception as e:
+                import traceback
+                log(f"[{site}] Erreur: {e}\n{traceback.format_exc()}", "error")
+                outcomes[site] = "error"
+    distinct = set(outcomes.values())
+    metrics.annotate(outcome=distinct.pop() if len(distinct) == 1 else "mixed", outcomes=outcomes)
+    log("Bilan : " + ", ".join(f"{s}={o}" for s, o in outcomes.items()))
+    failed = [s for s, o in outcomes.items() if o == "error"]
+    if failed:
+        raise RuntimeError(f"Échec pour : {', '.join(failed)}")
+
+
+def _run_site_scoped(site: str, cfg: Dict) -> str:
+    _ctx.site = site
+    try:
+        with metrics.scope(site):
+            return run_site(site, cfg)
+    finally:
+        _ctx.site = None
+
+
+def run_site(site: str, cfg: Dict) -> str:
+    """Pipeline complet pour un site ; renvoie 'published' ou 'no_article'."""
     # 1) fetch cands
-    cands = fetch_candidates(site, max_items=8)
+    with metrics.span("fetch"):
+        cands = fetch_candidates(site, max_items=8)
     log(f"{len(cands)} bruts collectés.")
 
     # 2) mémoire legacy (non utilisée ici, juste info)
@@ -284,10 +318,12 @@ def main():
 
     # 3) sélection
     log("Sélection du plus récent non traité…")
-    chosen = choose_latest_not_posted(cands)
+    near_dups = neardup.index_for(cfg.get(site) or {})
+    with metrics.span("select"):
+        chosen = choose_latest_not_posted(cands, near_dups)
     if not chosen:
         log("Aucun article publiable après filtrage.")
-        return
+        return "no_article"
 
     title = chosen["title"].strip()
     source_url = chosen["url"].strip()
@@ -314,39 +350,66 @@ def main():
     }
 
     # 5) rendu HTML
-    html = render_article_html(article)
+    with metrics.span("render"):
+        html = render_article_html(article)
 
     # 6) push sur repo du site
-    repo, repo_full = get_repo_for_site(site)
+    repo, repo_full = get_repo_for_site(site, cfg)
     article_path = f"articles/{filename}"
     log(f"Publication article → {repo_full}:{article_path}")
 
-    old, sha = gh_read_text(repo, article_path)
-    commit_msg = f"chore({site}): publication {filename}"
-    gh_write_text(repo, article_path, html, commit_msg, sha=sha)
-
-    # 7) patch index.html (prepend dans #latest-articles, keep=10)
-    idx_html, idx_sha = gh_read_text(repo, "index.html")
-    if idx_html:
-        entry = {
-            "title": title,
-            "filename": filename,
-            "date": now.strftime("%Y-%m-%d"),
-            "iso_date": now.date().isoformat(),
-        }
-        new_idx = patch_index_html(idx_html, entry, keep=10)
-        if new_idx != idx_html:
-            gh_write_text(repo, "index.html", new_idx, f"chore({site}): index patch", sha=idx_sha)
-            log("Index: patch OK via sélecteur '#latest-articles' (keep=10).", "ok")
+    branch = repo.default_branch
+    entry = {
+        "title": title,
+        "filename": filename,
+        "date": now.strftime("%Y-%m-%d"),
+        "iso_date": now.date().isoformat(),
+    }
+
+    def build_files(base_sha: str) -> Dict[str, str]:
+        files = {article_path: html}
+
+        # 6b) manifeste des articles (articles/manifest.json)
+        data, _ = manifest.load_manifest(repo, ref=base_sha)
+        if data is None:
+            log("Manifeste absent — reconstruction depuis articles/.", "warn")
+            data = manifest.rebuild(repo)
+        manifest.add_entry(
+            data,
+            {"title": title, "iso_date": now.isoformat(), "filename": filename, "image_url": None},
+        )
+        files[manifest.MANIFEST_PATH] = manifest.dumps(data)
+
+        # 7) patch index.html (prepend dans index_selector, keep=index_keep)
+        idx_html, _ = gh_read_text(repo, "index.html", ref=base_sha)
+        if idx_html:
+            site_cfg = cfg.get(site) or {}
+            selector = site_cfg.get("index_selector") or indexpatch.DEFAULT_SELECTOR
+            keep = int(site_cfg.get("index_keep") or indexpatch.DEFAULT_KEEP)
+            with metrics.span("index"):
+                new_idx = patch_index_html(idx_html, entry, keep=keep, selector=selector)
+            if new_idx != idx_html:
+                files["index.html"] = new_idx
+                log(f"Index: patch OK via sélecteur '{selector}' (keep={keep}).", "ok")
+            else:
+                log("Index: aucun changement détecté.", "warn")
         else:
-            log("Index: aucun changement détecté.", "warn")
-    else:
-        log("Index: fichier index.html introuvable — patch ignoré.", "warn")
+            log("Index: fichier index.html introuvable — patch ignoré.", "warn")
+        return files
+
+    # article + manifeste + index : un seul commit (Git Data API)
+    commit_msg = f"chore({site}): publication {filename}"
+    with metrics.span("publish"):
+        commit_sha = gitdata.commit_files(repo, build_files, commit_msg, branch=branch)
+    log(f"Commit {commit_sha[:7]} publié sur {branch}.", "ok")
+    neardup.remember(chosen, near_dups)
 
     # 8) Tweet (si clés présentes)
-    maybe_tweet(title, f"https://{repo.owner.login}.github.io/{repo.name}/articles/{filename}")
+    with metrics.span("tweet"):
+        maybe_tweet(title, f"https://{repo.owner.login}.github.io/{repo.name}/articles/{filename}")
 
     log("OK – Run terminé (SAFE).", "ok")
+    return "published"
 
 
 if __name__ == "__main__":
@@ -356,4 +419,10 @@ if __name__ == "__main__":
         import traceback
         tb = traceback.format_exc()
         log(f"Erreur fatale: {e}\n{tb}", level="error")
+        metrics.annotate(outcome="error")
         sys.exit(1)
+    finally:
+        # résolutions arrivées après l'enrichissement (workers non attendus)
+        redirects.flush()
+        # lignes JSON + Prometheus / résumé de job si configurés
+        metrics.emit()
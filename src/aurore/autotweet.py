@@ -1,14 +1,72 @@
 # -*- coding: utf-8 -*-
+from __future__ import annotations
+
 import os
-import tweepy
-import google.generativeai as genai
+
+from . import lazy, llm, llmcache, metrics
+
+tweepy = lazy.module("tweepy")
+
+TWEET_MODEL = "gemini-1.5-flash"
+TWEET_CONFIG = {"temperature": 0.6, "response_mime_type": "text/plain"}
 
 def _compact(s: str) -> str:
     return " ".join((s or "").split())
 
-def tweet_from_prompt(cfg: dict, title: str, summary: str, source_name: str, url: str) -> bool:
+def _tweet_prompt(cfg: dict, title: str, summary: str, source_name: str, url: str) -> str:
+    gemini_tweet_prompt = (cfg.get("gemini_tweet_prompt") or "").strip()
+    return (
+        f"{gemini_tweet_prompt}\n\n"
+        f"Données:\n"
+        f"- Titre: {title}\n"
+        f"- Résumé: {summary}\n"
+        f"- Source: {source_name}\n"
+        f"- Lien: {url}\n\n"
+        f"Rends UNE LIGNE unique. Max 280 caractères. Pas d'emojis."
+    )
+
+def _fallback_line(cfg: dict, title: str, source_name: str, url: str) -> str:
+    # fallback déterministe ultra simple
+    brand = (cfg.get("brand_name") or "").strip()
+    return f"{title} ({source_name}) {url} #{brand or 'Horizon'}"
+
+def tweet_lines(cfg: dict, items: list, deadline_s: float | None = None) -> list:
+    """
+    Une ligne (<= 280 chars) par item {title, summary, source_name, url}.
+    Cache llmcache d'abord (une relance ne regénère pas la ligne), puis les
+    manquantes en parallèle via llm.py ; repli déterministe en cas d'échec.
+    """
+    prompts = [_tweet_prompt(cfg, it["title"], it["summary"], it["source_name"], it["url"]) for it in items]
+    cache = llmcache.default_cache()
+    keys = [llmcache.make_key(TWEET_MODEL, TWEET_CONFIG, p) for p in prompts]
+    lines = [cache.get(k) for k in keys]
+
+    todo = [i for i, line in enumerate(lines) if not line]
+    if todo and os.environ.get("GEMINI_API_KEY"):
+        try:
+            outs = llm.generate_many(TWEET_MODEL, TWEET_CONFIG, [prompts[i] for i in todo], deadline_s)
+        except Exception as e:
+            outs = [e] * len(todo)
+        for i, out in zip(todo, outs):
+            if isinstance(out, BaseException):
+                print(f"WARN tweet LLM: {type(out).__name__} {out}")
+                continue
+            text = _compact(out)
+            if text:
+                cache.put(keys[i], text)
+                lines[i] = text
+
+    out = []
+    for it, text in zip(items, lines):
+        text = text or _fallback_line(cfg, it["title"], it["source_name"], it["url"])
+        out.append(text[:277] + "…" if len(text) > 280 else text)
+    return out
+
+@metrics.span("tweet")
+def tweet_from_prompt(cfg: dict, title: str, summary: str, source_name: str, url: str, text: str | None = None) -> bool:
     """
     Utilise TON 'gemini_tweet_prompt' + contexte, génère 1 ligne (< 280 chars), et tweet.
+    `text` : ligne déjà générée (tweet_lines pour plusieurs articles d'un coup).
     Si Twitter n'est pas configuré, on log et on sort sans échec.
     """
     api_key = os.environ.get("TWITTER_API_KEY")
@@ -20,35 +78,9 @@ def tweet_from_prompt(cfg: dict, title: str, summary: str, source_name: str, url
         print("Twitter non configuré — tweet sauté.")
         return False
 
-    gemini_tweet_prompt = (cfg.get("gemini_tweet_prompt") or "").strip()
-    brand = (cfg.get("brand_name") or "").strip()
-
-    text = None
-    try:
-        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-        model = genai.GenerativeModel(
-            "gemini-1.5-flash",
-            generation_config={"temperature": 0.6, "response_mime_type": "text/plain"},
-        )
-        prompt = (
-            f"{gemini_tweet_prompt}\n\n"
-            f"Données:\n"
-            f"- Titre: {title}\n"
-            f"- Résumé: {summary}\n"
-            f"- Source: {source_name}\n"
-            f"- Lien: {url}\n\n"
-            f"Rends UNE LIGNE unique. Max 280 caractères. Pas d'emojis."
-        )
-        resp = model.generate_content(prompt)
-        text = _compact(getattr(resp, "text", "") or "")
-    except Exception as e:
-        print(f"WARN tweet LLM: {e}")
-
     if not text:
-        # fallback déterministe ultra simple
-        text = f"{title} ({source_name}) {url} #{brand or 'Horizon'}"
-    if len(text) > 280:
-        text = text[:277] + "…"
+        item = {"title": title, "summary": summary, "source_name": source_name, "url": url}
+        text = tweet_lines(cfg, [item])[0]
 
     try:
         auth = tweepy.OAuth1UserHandler(api_key, api_secret, access_token, access_secret)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+blobs_proxy.py
+- Client de la Netlify Function blobs-proxy (X-AURORE-TOKEN) : lectures et
+  écritures de plusieurs clés en une seule invocation (POST {get, put}),
+  exécutées en parallèle côté fonction
+- Lots découpés à MAX_BATCH clés (limite de la fonction) ; les clés en erreur
+  côté fonction sont renvoyées à part (batch) : une lecture en échec n'est
+  pas une clé absente, get_many lève dans ce cas
+- BLOBS_PROXY_URL et AURORE_BLOBS_TOKEN (config.Settings), surchargeables par
+  site dans config.json : blobs_proxy_url
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import http_client, metrics
+from .config import Settings
+
+
+MAX_BATCH = 500  # = MAX_BATCH de netlify/functions/blobs-proxy.js
+TIMEOUT = 20
+
+
+class BlobsProxy:
+    def __init__(self, store: str, url: Optional[str] = None, token: Optional[str] = None, max_batch: int = MAX_BATCH):
+        self.store = store
+        self.url = url or Settings.BLOBS_PROXY_URL
+        self.token = token or Settings.AURORE_BLOBS_TOKEN
+        self.max_batch = max(1, int(max_batch))
+        if not self.url or not self.token:
+            raise RuntimeError("BLOBS_PROXY_URL et AURORE_BLOBS_TOKEN sont requis pour le proxy blobs")
+
+    def _post(self, gets: List[str], puts: List[Dict]) -> Dict:
+        r = http_client.post(
+            self.url,
+            headers={"X-AURORE-TOKEN": self.token, "Content-Type": "application/json"},
+            json={"store": self.store, "get": gets, "put": puts},
+            timeout=TIMEOUT,
+        )
+        r.raise_for_status()
+        metrics.incr("blobs_proxy_calls")
+        data = r.json() or {}
+        for key, err in (data.get("errors") or {}).items():
+            print(f"WARN blobs-proxy {key}: {err}")
+        return data
+
+    def batch(
+        self, get: Iterable[str] = (), put: Optional[Dict[str, object]] = None
+    ) -> Tuple[Dict[str, Optional[object]], List[str], Dict[str, str]]:
+        """
+        Lit les clés `get` et écrit les paires `put` ; une invocation par
+        tranche de max_batch opérations. Renvoie ({clé: valeur ou None si
+        absente}, clés écrites, {clé: erreur}) ; une clé en erreur n'apparaît
+        pas dans les valeurs.
+        """
+        ops = [("get", k) for k in dict.fromkeys(get)] + [("put", k) for k in (put or {})]
+        values: Dict[str, Optional[object]] = {}
+        written: List[str] = []
+        errors: Dict[str, str] = {}
+        for i in range(0, len(ops), self.max_batch):
+            chunk = ops[i:i + self.max_batch]
+            gets = [k for op, k in chunk if op == "get"]
+            puts = [{"key": k, "value": put[k]} for op, k in chunk if op == "put"]
+            data = self._post(gets, puts)
+            got = data.get("values") or {}
+            errors.update(data.get("errors") or {})
+            values.update({k: got.get(k) for k in gets if k not in errors})
+            written.extend(k for k in data.get("written") or [] if k not in errors)
+        return values, written, errors
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[object]]:
+        """Valeurs des clés (None = absente) ; lève si une lecture a échoué."""
+        values, _, errors = self.batch(get=keys)
+        if errors:
+            raise RuntimeError(f"blobs-proxy: lecture en échec pour {', '.join(sorted(errors))}")
+        return values
+
+    def put_many(self, items: Dict[str, object]) -> bool:
+        """Vrai si toutes les clés ont été écrites."""
+        if not items:
+            return True
+        _, written, _ = self.batch(put=items)
+        return set(written) >= set(items)
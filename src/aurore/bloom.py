@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+bloom.py
+- Filtre de Bloom compact (bytearray) sérialisable en JSON
+- Pas de faux négatifs : "absent" est une réponse sûre, "présent" est probable
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import math
+from typing import Any, Dict, Iterable, Iterator
+
+
+class BloomFilter:
+    def __init__(self, m_bits: int, k: int, bits: bytearray | None = None, count: int = 0, capacity: int = 0):
+        self.m = max(8, int(m_bits))
+        self.k = max(1, int(k))
+        self.bits = bits if bits is not None else bytearray((self.m + 7) // 8)
+        self.count = int(count)
+        self.capacity = int(capacity) or max(1, round(self.m * math.log(2) / self.k))
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        n = max(1, int(capacity))
+        m = math.ceil(-n * math.log(error_rate) / (math.log(2) ** 2))
+        k = max(1, round(m / n * math.log(2)))
+        return cls(m, k, capacity=n)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        # double hachage (Kirsch-Mitzenmacher) sur un seul sha256
+        d = hashlib.sha256(key.encode("utf-8")).digest()
+        h1 = int.from_bytes(d[:8], "big")
+        h2 = int.from_bytes(d[8:16], "big") | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def merge(self, other: "BloomFilter") -> bool:
+        """OU bit à bit avec un filtre de même géométrie. Renvoie False si incompatible."""
+        if (other.m, other.k) != (self.m, self.k):
+            return False
+        n = len(self.bits)
+        merged = int.from_bytes(self.bits, "big") | int.from_bytes(other.bits, "big")
+        self.bits = bytearray(merged.to_bytes(n, "big"))
+        self.count = max(self.count, other.count)
+        return True
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "m": self.m,
+            "k": self.k,
+            "count": self.count,
+            "capacity": self.capacity,
+            "bits": base64.b64encode(bytes(self.bits)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "BloomFilter":
+        bits = bytearray(base64.b64decode(d["bits"]))
+        return cls(int(d["m"]), int(d["k"]), bits=bits, count=int(d.get("count") or 0), capacity=int(d.get("capacity") or 0))
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+canonical.py
+- Forme canonique unique d'une URL, partagée par selection (hash des
+  candidats) et dedup (clés processed:* du store) :
+  schéma et hôte en minuscules, sans « www. » ni port par défaut, paramètres
+  de suivi retirés (utm_*, gclid, fbclid...), paramètres triés, sans fragment
+- <link rel=canonical> de la page si connu (champ 'canonical' de l'article,
+  sinon enregistrement du cache de pages)
+- Mémoïsé pour le run (clear() entre deux runs d'un même processus)
+- lookup_keys() : clé actuelle + clés des anciens formats (selection.normalize_url
+  et dedup._normalize_url d'avant l'unification), pour que la mémoire écrite
+  par l'un ou l'autre chemin soit toujours retrouvée
+"""
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from . import pages
+
+
+TRACKING_PARAMS = frozenset({
+    "gclid",
+    "dclid",
+    "fbclid",
+    "msclkid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+})
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def _is_tracking(param: str) -> bool:
+    p = param.lower()
+    return p.startswith("utm_") or p in TRACKING_PARAMS
+
+
+@lru_cache(maxsize=8192)
+def normalize_url(u: str) -> str:
+    try:
+        p = urlparse((u or "").strip())
+        scheme = p.scheme.lower()
+        host = (p.hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        netloc = host
+        if p.port and str(p.port) != DEFAULT_PORTS.get(scheme):
+            netloc = f"{host}:{p.port}"
+        q = sorted((k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if not _is_tracking(k))
+        return urlunparse((scheme, netloc, p.path or "/", p.params, urlencode(q, doseq=True), ""))
+    except Exception:
+        return u
+
+
+def canonical_url(u: str, canonical: Optional[str] = None) -> str:
+    """URL canonique : rel=canonical (fourni ou lu dans le cache de pages), sinon l'URL elle-même."""
+    if not canonical:
+        record = pages.get_cached(u)
+        canonical = (record or {}).get("canonical")
+    if canonical:
+        c = urljoin(u, canonical.strip())
+        if urlparse(c).scheme in ("http", "https"):
+            return normalize_url(c)
+    return normalize_url(u)
+
+
+def _sha(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def url_key(u: str, canonical: Optional[str] = None) -> str:
+    """Clé (sha256 hex) de l'URL canonique."""
+    return _sha(canonical_url(u, canonical))
+
+
+def plain_key(u: str) -> str:
+    """Clé de l'URL seule, sans rel=canonical (recherches faites avant le téléchargement)."""
+    return _sha(normalize_url(u))
+
+
+# --- anciens formats (avant unification), lus pour la compatibilité ---
+
+def _legacy_selection(u: str) -> str:
+    p = urlparse(u)
+    q = sorted(
+        (k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+        if k not in {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "gclid", "fbclid"}
+    )
+    return urlunparse((p.scheme.lower(), p.netloc.lower(), p.path, p.params, urlencode(q, doseq=True), ""))
+
+
+def _legacy_dedup(u: str) -> str:
+    p = urlparse(u)
+    q = [(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if not k.lower().startswith("utm_")]
+    return urlunparse((p.scheme, p.netloc.replace("www.", ""), p.path, "", urlencode(q), ""))
+
+
+@lru_cache(maxsize=8192)
+def legacy_keys(u: str) -> tuple:
+    out = []
+    for fn in (_legacy_dedup, _legacy_selection):
+        try:
+            out.append(_sha(fn(u)))
+        except Exception:
+            continue
+    return tuple(out)
+
+
+def lookup_keys(u: str, canonical: Optional[str] = None) -> List[str]:
+    """Clés à consulter, de la plus probable à la moins probable, sans doublon."""
+    keys = [url_key(u, canonical), plain_key(u), *legacy_keys(u)]
+    return list(dict.fromkeys(keys))
+
+
+def clear() -> None:
+    normalize_url.cache_clear()
+    legacy_keys.cache_clear()
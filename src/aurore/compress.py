@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+compress.py
+- Pré-compression extractive du texte source avant Gemini : les paragraphes
+  sont classés localement et les meilleurs gardés jusqu'au budget de tokens
+  du site (config.json : "source_token_budget"), dans leur ordre d'origine
+- Score = similarité TF-IDF du paragraphe au document entier (le sujet
+  principal) + bonus de position (les premiers paragraphes portent les faits)
+  - pénalité pour les restes de page (« Lire aussi », abonnement, cookies...)
+- NumPy si disponible (calcul matriciel, importé au premier usage via lazy.py),
+  sinon Python pur : même classement
+Métriques : source_chars_in / source_chars_out, source_tokens_in / source_tokens_out.
+"""
+from __future__ import annotations
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from . import lazy, metrics
+
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("AURORE_SOURCE_TOKEN_BUDGET", "1800"))
+CHARS_PER_TOKEN = 4  # même estimation que llm.estimate_tokens
+POSITION_WEIGHT = 0.35
+BOILERPLATE_PENALTY = 0.5
+
+_WORD_RE = re.compile(r"[a-zàâäçéèêëîïôöùûüÿœæ0-9]{3,}", re.I)
+_BOILERPLATE_RE = re.compile(
+    r"lire aussi|à lire|abonn|newsletter|cookies?|publicité|partager|commentaires?|"
+    r"tous droits réservés|inscrivez|s'inscrire|sur le même sujet|publié le|mis à jour le|read more|subscribe",
+    re.I,
+)
+STOPWORDS = frozenset(
+    "les des une dans pour par sur avec est sont été qui que quoi dont aux ces ses leur leurs "
+    "plus mais ont pas ne cette cet son sa ils elles nous vous tout tous toute entre comme "
+    "aussi fait être avoir était sera selon après avant lors deux très the and for with that this".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text or "") // CHARS_PER_TOKEN
+
+
+def budget_for(cfg: Optional[Dict]) -> int:
+    """Budget du site (config.json), sinon AURORE_SOURCE_TOKEN_BUDGET ; 0 = pas de compression."""
+    value = (cfg or {}).get("source_token_budget")
+    return DEFAULT_TOKEN_BUDGET if value is None else int(value)
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in (m.lower() for m in _WORD_RE.findall(text)) if w not in STOPWORDS]
+
+
+def _scores_python(docs: List[List[str]]) -> List[float]:
+    n = len(docs)
+    df = Counter(t for d in docs for t in set(d))
+    idf = {t: math.log((1 + n) / (1 + c)) + 1.0 for t, c in df.items()}
+    vecs = []
+    for d in docs:
+        tf = Counter(d)
+        vecs.append({t: c * idf[t] for t, c in tf.items()})
+    centroid: Counter = Counter()
+    for v in vecs:
+        centroid.update(v)
+    c_norm = math.sqrt(sum(x * x for x in centroid.values())) or 1.0
+    out = []
+    for v in vecs:
+        norm = math.sqrt(sum(x * x for x in v.values())) or 1.0
+        out.append(sum(x * centroid.get(t, 0.0) for t, x in v.items()) / (norm * c_norm))
+    return out
+
+
+def _scores_numpy(np, docs: List[List[str]]) -> List[float]:
+    vocab = {t: i for i, t in enumerate(sorted({t for d in docs for t in d}))}
+    if not vocab:
+        return [0.0] * len(docs)
+    tf = np.zeros((len(docs), len(vocab)))
+    for row, d in enumerate(docs):
+        for t, c in Counter(d).items():
+            tf[row, vocab[t]] = c
+    df = (tf > 0).sum(axis=0)
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1.0
+    m = tf * idf
+    centroid = m.sum(axis=0)
+    norms = np.linalg.norm(m, axis=1) * (np.linalg.norm(centroid) or 1.0)
+    norms[norms == 0] = 1.0
+    return list((m @ centroid) / norms)
+
+
+def rank_paragraphs(paragraphs: List[str]) -> List[float]:
+    docs = [_terms(p) for p in paragraphs]
+    np = lazy.optional("numpy")
+    sims = _scores_numpy(np, docs) if np is not None else _scores_python(docs)
+    scores = []
+    for i, (p, sim) in enumerate(zip(paragraphs, sims)):
+        score = float(sim) + POSITION_WEIGHT / (1.0 + 0.25 * i)
+        if _BOILERPLATE_RE.search(p):
+            score -= BOILERPLATE_PENALTY
+        scores.append(score)
+    return scores
+
+
+def compress(text: str, token_budget: int) -> str:
+    """Garde les paragraphes les mieux classés jusqu'au budget, dans l'ordre du texte."""
+    text = (text or "").strip()
+    if token_budget <= 0 or estimate_tokens(text) <= token_budget:
+        return text
+    paragraphs = [p.strip() for p in re.split(r"\n{2,}", text) if p.strip()]
+    max_chars = token_budget * CHARS_PER_TOKEN
+
+    scores = rank_paragraphs(paragraphs)
+    keep = set()
+    used = 0
+    for i in sorted(range(len(paragraphs)), key=lambda i: scores[i], reverse=True):
+        size = len(paragraphs[i]) + 2
+        if used + size <= max_chars:
+            keep.add(i)
+            used += size
+    if not keep:
+        # un seul paragraphe géant : coupe au dernier espace avant le budget
+        best = paragraphs[max(range(len(paragraphs)), key=lambda i: scores[i])]
+        return best[:max_chars].rsplit(" ", 1)[0]
+    return "\n\n".join(paragraphs[i] for i in sorted(keep))
+
+
+def compress_for_prompt(text: str, token_budget: Optional[int]) -> str:
+    """compress() + métriques de taille (avant / après)."""
+    budget = DEFAULT_TOKEN_BUDGET if token_budget is None else int(token_budget)
+    out = compress(text, budget)
+    metrics.incr("source_chars_in", len(text or ""))
+    metrics.incr("source_chars_out", len(out))
+    metrics.incr("source_tokens_in", estimate_tokens(text))
+    metrics.incr("source_tokens_out", estimate_tokens(out))
+    return out
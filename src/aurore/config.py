@@ -10,12 +10,24 @@ class Settings:
     GH_AUTHOR_NAME = os.environ.get("GH_AUTHOR_NAME", "Aurore Bot")
     GH_AUTHOR_EMAIL = os.environ.get("GH_AUTHOR_EMAIL", "bot@horizon-libre.example")
     
+    # Points d'entrée des API (surchargeables : GitHub Enterprise, stand-in local des benchmarks)
+    GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+    NETLIFY_API_URL = os.environ.get("NETLIFY_API_URL", "https://api.netlify.com")
+
     BLOBS_PROXY_URL = os.environ.get("BLOBS_PROXY_URL")
     AURORE_BLOBS_TOKEN = os.environ.get("AURORE_BLOBS_TOKEN")
     
-    USER_AGENT = "Aurore/1.0 (+https://l-horizon-libre.fr)"
+    CACHE_DIR = os.environ.get("AURORE_CACHE_DIR", ".cache/aurore")
+
+    USER_AGENT = os.environ.get("AURORE_USER_AGENT", "Aurore/1.0 (+https://l-horizon-libre.fr)")
     MAX_ARTICLES_PER_RUN = int(os.environ.get("MAX_ARTICLES_PER_RUN", "1"))
 
+    # Gemini (llm.py) : limites partagées par tout le processus
+    GEMINI_RPM = float(os.environ.get("GEMINI_RPM", "15"))
+    GEMINI_TPM = float(os.environ.get("GEMINI_TPM", "1000000"))
+    GEMINI_CONCURRENCY = int(os.environ.get("GEMINI_CONCURRENCY", "4"))
+    GEMINI_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT", "60"))
+
     @classmethod
     def validate(cls):
         missing = []
@@ -1,24 +1,32 @@
 # -*- coding: utf-8 -*-
-import os, json, hashlib, requests
-from typing import Set, Dict, Optional
-from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+import os, sys, json, time, threading, argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Set, Dict, Optional, Iterator, Iterable, List
+
+from . import blobs_proxy, canonical, http_client, memory
+from .bloom import BloomFilter
+from .config import Settings
 
 BLOB_KEY   = "processed_urls"
 KEY_PREFIX = "processed:"
 
-def _normalize_url(u: str) -> str:
-    try:
-        p = urlparse(u)
-        netloc = p.netloc.replace("www.", "")
-        q = [(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if not k.lower().startswith("utm_")]
-        return urlunparse((p.scheme, netloc, p.path, "", urlencode(q), ""))
-    except Exception:
-        return u
+# Instantané Bloom de toutes les clés processed:* (1 GET pour tout le run)
+SNAPSHOT_KEY        = "processed_bloom"
+SNAPSHOT_CAPACITY   = 20000
+SNAPSHOT_ERROR_RATE = 0.01
+
+_snapshots: Dict[str, BloomFilter] = {}
+_snapshots_lock = threading.Lock()
+
+# Forme canonique partagée avec selection (canonical.py)
+_normalize_url = canonical.normalize_url
+
+def _key_for(u: str, canonical_link: Optional[str] = None) -> str:
+    return KEY_PREFIX + canonical.url_key(u, canonical_link)
 
-def _key_for(u: str) -> str:
-    n = _normalize_url(u)
-    h = hashlib.sha256(n.encode("utf-8")).hexdigest()
-    return KEY_PREFIX + h
+def _lookup_keys(u: str, canonical_link: Optional[str] = None) -> List[str]:
+    """Clé actuelle d'abord, puis celles des anciens formats (écrites avant l'unification)."""
+    return [KEY_PREFIX + k for k in canonical.lookup_keys(u, canonical_link)]
 
 def _store_name(config: dict) -> str:
     return config.get("blob_store_name", "aurore-memory")
@@ -30,15 +38,203 @@ def _token_direct() -> str:
     return os.environ["NETLIFY_BLOBS_TOKEN"]
 
 def _base_direct(config: dict) -> str:
-    return f"https://api.netlify.com/api/v1/sites/{_site_id()}/blobs/{_store_name(config)}"
+    return f"{Settings.NETLIFY_API_URL.rstrip('/')}/api/v1/sites/{_site_id()}/blobs/{_store_name(config)}"
 
 def _headers_direct() -> dict:
-    return {"Authorization": f"Bearer {_token_direct()}", "Content-Type": "application/json", "User-Agent": "Aurore/1.0"}
+    return {"Authorization": f"Bearer {_token_direct()}", "Content-Type": "application/json"}
 
-def get_processed_urls(config: dict) -> Set[str]:
+def _list_keys(config: dict, prefix: str = "") -> Iterator[str]:
+    """Liste paginée (curseur) des clés du store."""
+    cursor = None
+    while True:
+        params = {"prefix": prefix} if prefix else {}
+        if cursor:
+            params["cursor"] = cursor
+        r = http_client.get(_base_direct(config), headers=_headers_direct(), params=params, timeout=15)
+        r.raise_for_status()
+        data = r.json() or {}
+        for entry in data.get("blobs") or data.get("keys") or []:
+            key = entry.get("key") if isinstance(entry, dict) else entry
+            if key and key.startswith(prefix):
+                yield key
+        cursor = data.get("next_cursor") or data.get("cursor")
+        if not cursor:
+            return
+
+def _snapshot_path(config: dict) -> str:
+    return os.path.join(Settings.CACHE_DIR, "membership", f"{_store_name(config)}.bloom.json")
+
+def _write_local_snapshot(bf: BloomFilter, config: dict) -> None:
+    try:
+        path = _snapshot_path(config)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(bf.to_dict(), f)
+    except Exception as e:
+        print(f"WARN snapshot local: {e}")
+
+def _read_local_snapshot(config: dict) -> Optional[BloomFilter]:
+    try:
+        with open(_snapshot_path(config), "r", encoding="utf-8") as f:
+            return BloomFilter.from_dict(json.load(f))
+    except Exception:
+        return None
+
+def _fetch_remote_snapshot(config: dict) -> Optional[BloomFilter]:
+    r = http_client.get(_base_direct(config) + f"/{SNAPSHOT_KEY}", headers=_headers_direct(), timeout=10)
+    if r.status_code == 200 and r.text:
+        return BloomFilter.from_dict(r.json())
+    return None
+
+def _push_snapshot(bf: BloomFilter, config: dict) -> None:
+    r = http_client.put(_base_direct(config) + f"/{SNAPSHOT_KEY}", headers=_headers_direct(), json=bf.to_dict(), timeout=10)
+    r.raise_for_status()
+
+def _rebuild_snapshot(config: dict, capacity: int = SNAPSHOT_CAPACITY) -> BloomFilter:
+    keys = list(_list_keys(config, KEY_PREFIX))
+    bf = BloomFilter.for_capacity(max(capacity, 2 * len(keys)), SNAPSHOT_ERROR_RATE)
+    bf.update(keys)
+    print(f"Snapshot Bloom reconstruit: {len(keys)} clés")
+    return bf
+
+def sync_snapshot(config: dict) -> Optional[BloomFilter]:
+    """
+    Charge l'instantané Bloom du store (1 requête). S'il est absent ou saturé,
+    on le reconstruit depuis la liste des clés processed:* puis on le publie.
+    En cas d'erreur réseau, on retombe sur la copie locale du run précédent.
+    """
+    name = _store_name(config)
+    with _snapshots_lock:
+        if name in _snapshots:
+            return _snapshots[name]
+    try:
+        bf = _fetch_remote_snapshot(config)
+        if bf is None or bf.saturated:
+            bf = _rebuild_snapshot(config, capacity=2 * bf.capacity if bf else SNAPSHOT_CAPACITY)
+            _push_snapshot(bf, config)
+    except Exception as e:
+        print(f"WARN snapshot Bloom: {e}")
+        bf = _read_local_snapshot(config)
+        if bf is None:
+            return None
+    _write_local_snapshot(bf, config)
+    with _snapshots_lock:
+        _snapshots[name] = bf
+    return bf
+
+def probably_processed(url: str, config: dict, canonical_link: Optional[str] = None) -> bool:
+    """False = certainement jamais traité. True = à confirmer (Netlify : shards + snapshot Bloom des anciens blobs)."""
+    if backend_for(config).name != "netlify":
+        return has_processed(url, config, canonical_link)
+    keys = _lookup_keys(url, canonical_link)
+    if _in_shards(keys, config):
+        return True
+    bf = sync_snapshot(config)
+    if bf is None:
+        return True
+    return any(k in bf for k in keys)
+
+# Mémoire segmentée : 16 shards processed-shard:<0-f> (1er caractère hex du
+# hash) de la forme {"entries": {hash: horodatage}}. Un run ne lit que les
+# shards des clés qu'il cherche (une fois chacun), une écriture ne réécrit que
+# le shard de la clé ; les entrées plus vieilles que memory_ttl_days sont
+# ignorées puis retirées à la réécriture et par la compaction.
+SHARD_PREFIX   = "processed-shard:"
+SHARD_CHARS    = "0123456789abcdef"
+META_KEY       = "processed-meta"
+DEFAULT_TTL_DAYS = memory.DEFAULT_TTL_DAYS
+COMPACT_EVERY_S  = 24 * 3600
+
+_shards: Dict[tuple, Dict[str, float]] = {}
+_shards_lock = threading.Lock()
+_compaction: Optional[threading.Thread] = None
+_compaction_checked: Set[str] = set()
+
+def _hash_of(key: str) -> str:
+    return key[len(KEY_PREFIX):] if key.startswith(KEY_PREFIX) else key
+
+def _shard_of(key: str) -> str:
+    return _hash_of(key)[:1]
+
+def _ttl_s(config: dict) -> float:
+    return float(config.get("memory_ttl_days", DEFAULT_TTL_DAYS)) * 86400
+
+def _fresh(entries: Dict[str, float], config: dict, now: Optional[float] = None) -> Dict[str, float]:
+    cutoff = (now or time.time()) - _ttl_s(config)
+    return {h: ts for h, ts in entries.items() if float(ts) >= cutoff}
+
+def _fetch_shard(shard: str, config: dict) -> Dict[str, float]:
+    data = _get_key(SHARD_PREFIX + shard, config) or {}
+    return dict(data.get("entries") or {})
+
+def _load_shard(shard: str, config: dict) -> Dict[str, float]:
+    """Shard lu au plus une fois par run (copie locale tenue à jour par nos écritures)."""
+    ck = (_store_name(config), shard)
+    with _shards_lock:
+        if ck in _shards:
+            return _shards[ck]
+    entries = _fetch_shard(shard, config)
+    with _shards_lock:
+        return _shards.setdefault(ck, entries)
+
+def _write_shard_entries(shard: str, new: Dict[str, float], config: dict) -> bool:
+    """
+    Relit le shard (écritures concurrentes), ajoute `new`, retire l'expiré,
+    réécrit. Relecture en échec : pas d'écriture (elle écraserait le shard).
+    """
+    try:
+        entries = _fetch_shard(shard, config)
+    except Exception as e:
+        print(f"WARN lecture shard {shard}: {e} — écriture annulée")
+        return False
+    entries.update(new)
+    entries = _fresh(entries, config)
+    ok = _put_key(SHARD_PREFIX + shard, {"v": 1, "entries": entries}, config)
+    if ok:
+        with _shards_lock:
+            _shards[(_store_name(config), shard)] = entries
+    return ok
+
+def _mark_hashes(hashes: Iterable[str], config: dict, ts: Optional[float] = None) -> bool:
+    """Vrai si tous les shards touchés ont été écrits."""
+    now = ts or time.time()
+    by_shard: Dict[str, Dict[str, float]] = {}
+    for h in hashes:
+        by_shard.setdefault(_shard_of(h), {})[_hash_of(h)] = now
+    ok = True
+    for shard, new in sorted(by_shard.items()):
+        ok = _write_shard_entries(shard, new, config) and ok
+    return ok
+
+def _in_shards(keys: List[str], config: dict) -> Optional[str]:
+    """Première clé présente (et non expirée) dans les shards, sinon None."""
+    cutoff = time.time() - _ttl_s(config)
+    for k in keys:
+        ts = _load_shard(_shard_of(k), config).get(_hash_of(k))
+        if ts is not None and float(ts) >= cutoff:
+            return k
+    return None
+
+def _prefetch_shards(keys: Iterable[str], config: dict, workers: int = 8) -> None:
+    """Charge en parallèle les shards nécessaires à un lot de clés."""
+    store = _store_name(config)
+    with _shards_lock:
+        todo = sorted({_shard_of(k) for k in keys} - {sh for (st, sh) in _shards if st == store})
+    if len(todo) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            list(pool.map(lambda sh: _load_shard(sh, config), todo))
+
+def clear_run_cache() -> None:
+    with _snapshots_lock:
+        _snapshots.clear()
+    with _shards_lock:
+        _shards.clear()
+
+def _legacy_processed_urls(config: dict) -> Set[str]:
+    """Ancien blob monolithique processed_urls (vide une fois replié dans les shards par la compaction)."""
     try:
         url = _base_direct(config) + f"/{BLOB_KEY}"
-        r = requests.get(url, headers=_headers_direct(), timeout=10)
+        r = http_client.get(url, headers=_headers_direct(), timeout=10)
         if r.status_code == 200:
             arr = r.json() or []
             urls = set(_normalize_url(u) for u in arr if isinstance(u, str))
@@ -49,45 +245,345 @@ def get_processed_urls(config: dict) -> Set[str]:
         print(f"WARN lecture legacy: {e}")
         return set()
 
-def save_processed_urls(urls_set: Set[str], config: dict) -> None:
+def _get_key(key: str, config: dict) -> Optional[dict]:
+    """None seulement si la clé est absente (404) ; toute autre erreur lève (lecture incertaine ≠ clé vide)."""
+    r = http_client.get(_base_direct(config) + f"/{key}", headers=_headers_direct(), timeout=10)
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    if not r.text:
+        return None
     try:
-        payload = [_normalize_url(u) for u in urls_set]
-        url = _base_direct(config) + f"/{BLOB_KEY}"
-        r = requests.put(url, headers=_headers_direct(), json=payload, timeout=10)
-        r.raise_for_status()
-        print(f"Legacy sauvegardée: {len(payload)} URLs")
-    except Exception as e:
-        print(f"WARN sauvegarde legacy: {e}")
+        return r.json() or {}
+    except ValueError:
+        return {}
+
+def _put_key(key: str, meta: dict, config: dict) -> bool:
+    r = http_client.put(_base_direct(config) + f"/{key}", headers=_headers_direct(), json=meta, timeout=10)
+    if r.status_code not in (200, 201):
+        print(f"WARN setJSON {r.status_code} – {r.text}")
+        return False
+    return True
+
+def _delete_key(key: str, config: dict) -> bool:
+    r = http_client.delete(_base_direct(config) + f"/{key}", headers=_headers_direct(), timeout=10)
+    return r.status_code in (200, 204, 404)
+
+class NetlifyMemory(memory.MemoryBackend):
+    """Backend par défaut : shards processed-shard:* du store Netlify Blobs (+ anciens blobs unitaires)."""
+
+    name = "netlify"
+
+    def __init__(self, config: dict):
+        super().__init__(float(config.get("memory_ttl_days", DEFAULT_TTL_DAYS)))
+        self.config = config
+
+    def has_many(self, keys):
+        """
+        Shards d'abord (lus en parallèle, une fois par run), puis les blobs
+        processed:* unitaires pas encore compactés, seulement si le snapshot
+        Bloom les juge probables.
+        """
+        keys = list(dict.fromkeys(keys))
+        _prefetch_shards(keys, self.config)
+        cutoff = time.time() - _ttl_s(self.config)
+        found = set()
+        for k in keys:
+            ts = _load_shard(_shard_of(k), self.config).get(_hash_of(k))
+            if ts is not None and float(ts) >= cutoff:
+                found.add(k)
+        rest = [k for k in keys if k not in found]
+        if rest:
+            bf = sync_snapshot(self.config)
+            for k in rest:
+                if (bf is None or k in bf) and _get_key(k, self.config) is not None:
+                    found.add(k)
+        return found
+
+    def mark_many(self, keys, url=None, ts=None):
+        _mark_hashes(keys, self.config, ts)
+
+    def processed_urls(self):
+        return _legacy_processed_urls(self.config)
+
+    def compact(self):
+        return compact_memory(self.config)
+
+class ProxyMemory(NetlifyMemory):
+    """
+    Mêmes shards, via la fonction blobs-proxy : une invocation pour vérifier
+    tous les candidats (shards manquants + anciens blobs unitaires lus dans le
+    même lot), deux pour un marquage (relecture des shards touchés, écriture).
+    La compaction (liste + suppressions) reste sur l'API directe.
+    """
+
+    name = "proxy"
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.client = blobs_proxy.BlobsProxy(_store_name(config), url=config.get("blobs_proxy_url"))
+
+    def _cache_shards(self, values: Dict[str, Optional[dict]]) -> None:
+        store = _store_name(self.config)
+        with _shards_lock:
+            for key, data in values.items():
+                if key.startswith(SHARD_PREFIX):
+                    _shards[(store, key[len(SHARD_PREFIX):])] = dict((data or {}).get("entries") or {})
+
+    def has_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return set()
+        store = _store_name(self.config)
+        with _shards_lock:
+            missing = sorted({_shard_of(k) for k in keys} - {sh for (st, sh) in _shards if st == store})
+        values, _, errors = self.client.batch(get=[SHARD_PREFIX + sh for sh in missing] + keys)
+        self._cache_shards(values)  # clés en erreur absentes de `values` : jamais mises en cache
+        if errors:
+            raise RuntimeError(f"blobs-proxy: lecture en échec pour {', '.join(sorted(errors))}")
+        cutoff = time.time() - _ttl_s(self.config)
+        found = set()
+        for k in keys:
+            ts = _load_shard(_shard_of(k), self.config).get(_hash_of(k))
+            if (ts is not None and float(ts) >= cutoff) or values.get(k) is not None:
+                found.add(k)
+        return found
+
+    def mark_many(self, keys, url=None, ts=None):
+        now = ts or time.time()
+        by_shard: Dict[str, Dict[str, float]] = {}
+        for k in keys:
+            by_shard.setdefault(_shard_of(k), {})[_hash_of(k)] = now
+        if not by_shard:
+            return
+        # relecture des shards touchés (écritures concurrentes), fusion, une seule écriture groupée ;
+        # un shard dont la relecture a échoué n'est pas réécrit (l'écriture l'écraserait)
+        current, _, errors = self.client.batch(get=[SHARD_PREFIX + sh for sh in sorted(by_shard)])
+        if errors:
+            print(f"WARN blobs-proxy: shard(s) non relu(s), non écrit(s) : {', '.join(sorted(errors))}")
+        out = {}
+        for sh, new in by_shard.items():
+            if SHARD_PREFIX + sh not in current:
+                continue
+            entries = dict((current.get(SHARD_PREFIX + sh) or {}).get("entries") or {})
+            entries.update(new)
+            out[SHARD_PREFIX + sh] = {"v": 1, "entries": _fresh(entries, self.config, now)}
+        if not out:
+            return
+        _, written, _ = self.client.batch(put=out)
+        if len(written) < len(out):
+            print("WARN blobs-proxy: shards partiellement écrits")
+        self._cache_shards({k: out[k] for k in written if k in out})
+
+    def processed_urls(self):
+        try:
+            arr = self.client.get_many([BLOB_KEY]).get(BLOB_KEY) or []
+        except Exception as e:
+            print(f"WARN lecture legacy: {e}")
+            return set()
+        return set(_normalize_url(u) for u in arr if isinstance(u, str))
+
+def backend_for(config: dict) -> memory.MemoryBackend:
+    """Backend du site (config.json : memory_backend = netlify | proxy | sqlite | memory)."""
+    kind = (config.get("memory_backend") or "netlify").lower()
+    if kind == "netlify":
+        return NetlifyMemory(config)
+    if kind == "proxy":
+        return ProxyMemory(config)
+    return memory.open_backend(config)
+
+def get_processed_urls(config: dict) -> Set[str]:
+    return backend_for(config).processed_urls()
+
+def save_processed_urls(urls_set: Set[str], config: dict) -> None:
+    """Ajoute les URLs à la mémoire en un lot (Netlify : seuls les shards touchés sont réécrits)."""
+    mark_many([{"url": u} for u in urls_set], config)
+    print(f"Mémoire sauvegardée: {len(urls_set)} URLs")
 
-def has_processed(url: str, config: dict) -> bool:
+def has_many(articles: List[Dict], config: dict) -> List[bool]:
+    """
+    Pour chaque article {url, canonical?} : déjà traité ? Toutes les clés
+    (actuelle + anciens formats) sont vérifiées en un seul appel au backend ;
+    un hit hors clé actuelle est recopié sous la clé actuelle.
+    """
+    b = backend_for(config)
+    per_article = [
+        _lookup_keys((a.get("url") or "").strip(), a.get("canonical")) if (a.get("url") or "").strip() else []
+        for a in articles
+    ]
+    found = b.has_many([k for keys in per_article for k in keys])
+    out, copies = [], []
+    for keys in per_article:
+        hit = any(k in found for k in keys)
+        if hit and keys[0] not in found:
+            copies.append(keys[0])
+        out.append(hit)
+    if copies:
+        b.mark_many(copies)
+    return out
+
+def has_processed(url: str, config: dict, canonical_link: Optional[str] = None) -> bool:
     try:
-        k = _key_for(url)
-        u = _base_direct(config) + f"/{k}"
-        r = requests.get(u, headers=_headers_direct(), timeout=10)
-        return r.status_code == 200 and bool(r.text)
+        return has_many([{"url": url, "canonical": canonical_link}], config)[0]
     except Exception:
         return False
 
-def mark_processed(url: str, published_iso: Optional[str], config: dict) -> None:
+def _mark_keys(url: str, canonical_link: Optional[str] = None) -> List[str]:
+    # clé canonique (rel=canonical si connu) + clé de l'URL seule si elle diffère,
+    # pour les recherches faites avant le téléchargement de la page
+    return list(dict.fromkeys([_key_for(url, canonical_link), KEY_PREFIX + canonical.plain_key(url)]))
+
+def mark_many(articles: List[Dict], config: dict) -> None:
+    """Marque plusieurs articles {url, canonical?} ; un lot par backend (une transaction SQLite)."""
+    b = backend_for(config)
     try:
-        k = _key_for(url)
-        meta = {"processedAt": published_iso or None}
-        u = _base_direct(config) + f"/{k}"
-        r = requests.put(u, headers=_headers_direct(), json=meta, timeout=10)
-        if r.status_code not in (200, 201):
-            print(f"WARN setJSON {r.status_code} – {r.text}")
+        if isinstance(b, NetlifyMemory):  # shards : un seul lot pour toutes les clés
+            b.mark_many([k for a in articles for k in _mark_keys(a["url"], a.get("canonical"))])
+        else:
+            for a in articles:
+                b.mark_many(_mark_keys(a["url"], a.get("canonical")), canonical.canonical_url(a["url"], a.get("canonical")))
     except Exception as e:
         print(f"WARN mark_processed: {e}")
+        return
+    if b.name == "netlify":
+        maybe_compact(config)
+
+def mark_processed(url: str, published_iso: Optional[str], config: dict, canonical_link: Optional[str] = None) -> None:
+    """Marque une URL traitée (Netlify : compaction lancée en arrière-plan si due)."""
+    mark_many([{"url": url, "canonical": canonical_link}], config)
 
-def find_first_unique_article(articles: list, processed_urls: Set[str]) -> Optional[Dict]:
+def find_first_unique_article(articles: list, processed_urls: Set[str], config: Optional[dict] = None) -> Optional[Dict]:
+    """Tous les candidats vérifiés en un lot (has_many) ; le premier inédit est renvoyé."""
+    config = config or {}
     print(f"Recherche d'un article unique parmi {len(articles)} candidats…")
-    for article in articles:
-        url = (article.get('url') or "").strip()
-        if not url:
-            continue
-        n = _normalize_url(url)
-        if n not in processed_urls and not has_processed(n, {}):
+    cands = [a for a in articles if (a.get('url') or "").strip()]
+    if processed_urls:
+        cands = [
+            a for a in cands
+            if canonical.canonical_url(a['url'].strip(), a.get('canonical')) not in processed_urls
+            and _normalize_url(a['url'].strip()) not in processed_urls
+        ]
+    try:
+        seen = has_many(cands, config)
+    except Exception as e:
+        print(f"WARN mémoire: {e}")
+        seen = [False] * len(cands)
+    for article, done in zip(cands, seen):
+        if not done:
             print(f"Article unique trouvé : {article.get('title', '')}")
             return article
     print("Aucun article unique trouvé.")
     return None
+
+def migrate_memory(config: dict, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Replie le blob legacy processed_urls dans les shards (clés canoniques,
+    canonical.py) puis le supprime. Les blobs processed:* unitaires sont
+    repliés par compact_memory.
+    """
+    legacy = _legacy_processed_urls(config)
+    stats = {"legacy_urls": len(legacy)}
+    if legacy and not dry_run:
+        # le blob legacy n'est supprimé qu'une fois toutes ses URLs écrites dans les shards
+        if _mark_hashes((canonical.plain_key(u) for u in legacy), config):
+            _delete_key(BLOB_KEY, config)
+        else:
+            print("WARN migration: shards non écrits, blob legacy conservé")
+    print(("[dry-run] " if dry_run else "") + f"Migration mémoire: {stats}")
+    return stats
+
+def compact_memory(config: dict, dry_run: bool = False) -> Dict[str, int]:
+    """
+    - retire les entrées expirées de chaque shard
+    - replie les blobs processed:* unitaires (format d'avant les shards) dans
+      leur shard puis les supprime ; le snapshot Bloom est alors remis à zéro
+    - replie le blob legacy processed_urls (migrate_memory)
+    Un shard illisible interrompt la compaction (rien n'est supprimé) ; un blob
+    unitaire n'est supprimé que si l'écriture de son shard a réussi.
+    """
+    stats = {"expired": 0, "folded": 0}
+    now = time.time()
+    folded: Dict[str, Dict[str, float]] = {}
+    unit_keys = list(_list_keys(config, KEY_PREFIX))
+    for k in unit_keys:
+        folded.setdefault(_shard_of(k), {})[_hash_of(k)] = now
+    stats["folded"] = len(unit_keys)
+
+    written: Set[str] = set()
+    for shard in SHARD_CHARS:
+        entries = _fetch_shard(shard, config)
+        fresh = _fresh(entries, config, now)
+        stats["expired"] += len(entries) - len(fresh)
+        new = folded.get(shard) or {}
+        if dry_run or (len(fresh) == len(entries) and not new):
+            continue
+        fresh.update(new)
+        if _put_key(SHARD_PREFIX + shard, {"v": 1, "entries": fresh}, config):
+            written.add(shard)
+            with _shards_lock:
+                _shards[(_store_name(config), shard)] = fresh
+
+    if not dry_run:
+        deleted = [k for k in unit_keys if _shard_of(k) in written and _delete_key(k, config)]
+        stats["kept"] = len(unit_keys) - len(deleted)
+        if stats["kept"]:
+            # des blobs unitaires restent : snapshot Bloom conservé, compaction retentée au prochain run
+            print(f"WARN compaction: {stats['kept']} blob(s) processed:* conservé(s) (shard non écrit)")
+        else:
+            if unit_keys:
+                bf = BloomFilter.for_capacity(SNAPSHOT_CAPACITY, SNAPSHOT_ERROR_RATE)
+                _push_snapshot(bf, config)
+                with _snapshots_lock:
+                    _snapshots[_store_name(config)] = bf
+            _put_key(META_KEY, {"compacted_at": now}, config)
+    stats.update(migrate_memory(config, dry_run=dry_run))
+    print(("[dry-run] " if dry_run else "") + f"Compaction mémoire: {stats}")
+    return stats
+
+def maybe_compact(config: dict) -> Optional[threading.Thread]:
+    """
+    Compaction en arrière-plan (thread non démon : le processus l'attend avant
+    de sortir), au plus une fois par COMPACT_EVERY_S et par store ; l'horodatage
+    distant n'est relu qu'une fois par processus.
+    """
+    global _compaction
+    name = _store_name(config)
+    if name in _compaction_checked:
+        return None
+    _compaction_checked.add(name)
+    try:
+        meta = _get_key(META_KEY, config) or {}
+    except Exception:
+        return None
+    if time.time() - float(meta.get("compacted_at") or 0) < COMPACT_EVERY_S:
+        return None
+    if _compaction is not None and _compaction.is_alive():
+        return _compaction
+
+    def _run():
+        try:
+            compact_memory(config)
+        except Exception as e:
+            print(f"WARN compaction mémoire: {e}")
+
+    _compaction = threading.Thread(target=_run, name="memory-compaction")
+    _compaction.start()
+    return _compaction
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m aurore.dedup", description="Maintenance de la mémoire des URLs traitées.")
+    parser.add_argument("command", choices=["migrate", "compact"])
+    parser.add_argument("--site", required=True, help="site de config.json (blob_store_name)")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)[args.site]
+    if args.command == "compact":
+        compact_memory(config, dry_run=args.dry_run)
+    else:
+        migrate_memory(config, dry_run=args.dry_run)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
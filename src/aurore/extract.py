@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+extract.py
+- Moteur d'extraction HTML -> texte + métadonnées, à parseurs interchangeables :
+  selectolax (lexbor) > lxml > BeautifulSoup (repli, toujours disponible)
+- Mêmes règles pour tous les moteurs : zone <article> prioritaire, sinon
+  <main> / <div role="main">, sinon toute la page ; seuls les <p> de plus de
+  30 caractères sont gardés
+- Entrée bornée (MAX_HTML_BYTES) ; BeautifulSoup parse l'arbre complet
+- Référence = text_from_soup(BeautifulSoup(html, "html.parser")). lexbor et
+  libxml2 construisent un autre arbre sur certaines constructions : <p>
+  fermé implicitement (bloc, <li>, <dd>, <dt>, <p> dans un <p>), mise en
+  forme mal imbriquée, <p> hors cellule dans un <table>, contenu brut
+  (<textarea>, <iframe>, <noembed>, <noframes>, <xmp>, <template>, CDATA),
+  <p> dans du SVG/MathML, contenu après </html>, entités historiques sans
+  « ; ». Un balayage linéaire avant le parse confie ces pages à
+  BeautifulSoup ; fixtures de parité : benchmarks/fixtures/golden
+Le moteur se force via AURORE_HTML_ENGINE=selectolax|lxml|bs4.
+"""
+from __future__ import annotations
+
+import os
+import re
+from html import entities as html_entities
+from typing import Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except Exception:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html as lxml_html
+    from lxml import etree as lxml_etree
+except Exception:
+    lxml_html = None
+    lxml_etree = None
+
+
+PageRecord = Dict[str, Optional[str]]
+
+DROP_TAGS = ["script", "style", "noscript", "svg", "picture", "source"]
+MIN_PARA_CHARS = 30
+# au-delà, le reste de la page (commentaires, pieds de page...) n'est pas parsé
+MAX_HTML_BYTES = int(os.environ.get("AURORE_MAX_HTML_BYTES", str(4 * 1024 * 1024)))
+
+IMAGE_METAS = [("property", "og:image"), ("name", "twitter:image"), ("name", "twitter:image:src")]
+TITLE_METAS = [("property", "og:title"), ("name", "twitter:title")]
+TIME_METAS = [("property", "article:published_time"), ("name", "pubdate"), ("itemprop", "datePublished")]
+
+_ROLE_MAIN_RE = re.compile(r"""role\s*=\s*["']?main""", re.I)
+_XML_DECL_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+# Constructions où un parseur HTML5 (lexbor, libxml2) bâtit un autre arbre
+# que html.parser ; les pages qui en contiennent vont à BeautifulSoup.
+# - dans un <p> ouvert : balises qui le ferment (blocs, <li>, <dd>, <dt>...),
+#   <button> (portée du </p>), </br>
+_P_TAG_RE = re.compile(r"<(/?)[pP](?=[\s/>])")
+_P_CLOSER_RE = re.compile(
+    r"<(?:div|address|article|aside|blockquote|center|details|dialog|dir|dl|dd|dt|fieldset|figcaption|figure|footer|form|"
+    r"h[1-6]|header|hgroup|hr|li|listing|main|menu|nav|ol|pre|search|section|summary|table|ul|xmp|plaintext|button|/br)"
+    r"(?=[\s/>])",
+    re.I,
+)
+# - fermeture d'une balise de mise en forme ouverte avant le <p> (algorithme
+#   « adoption agency » : le texte qui suit reste dans le <p> en HTML5)
+_FORMAT_RE = re.compile(r"<(/?)(a|b|big|code|em|font|i|nobr|s|small|strike|strong|tt|u)(?=[\s/>])", re.I)
+# - éléments à contenu brut en HTML5 (html.parser y lit des balises) ; <template>
+#   (contenu hors de l'arbre pour lexbor, gardé par libxml2)
+_RAW_RE = re.compile(r"<(textarea|iframe|noembed|noframes|xmp|template)(?=[\s/>])[^>]*>", re.I)
+# - <p> dans du SVG / MathML (hors <foreignObject>) : il en sort en HTML5, il
+#   est retiré avec le <svg> sinon
+_FOREIGN_RE = re.compile(r"<(svg|math)(?=[\s/>])[^>]*>", re.I)
+# - CDATA, <plaintext>, <frameset> : toujours divergents
+_ALWAYS_RE = re.compile(r"<!\[CDATA\[|<(?:plaintext|frameset)(?=[\s/>])", re.I)
+# - <p> placé dans un tableau hors cellule (déplacé avant le tableau en HTML5)
+_TABLE_RE = re.compile(r"<(/?)(table|td|th|caption|p)(?=[\s/>])", re.I)
+# - libxml2 ignore ce qui suit </html>
+_HTML_END_RE = re.compile(r"</html\s*>", re.I)
+# - entités : HTML5 décode un préfixe historique sans « ; » (&copyright, &notx;)
+_ENTITY_RE = re.compile(r"&([a-zA-Z][a-zA-Z0-9]*;?)")
+_LEGACY_ENTITIES = frozenset(k for k in html_entities.html5 if not k.endswith(";"))
+_LEGACY_MAX = max(len(k) for k in _LEGACY_ENTITIES)
+
+
+def _bounded(html_str: str) -> str:
+    html_str = html_str or ""
+    return html_str[:MAX_HTML_BYTES] if len(html_str) > MAX_HTML_BYTES else html_str
+
+
+def _join_paragraphs(paras: List[str]) -> str:
+    text = "\n\n".join(p for p in paras if p and len(p) > MIN_PARA_CHARS).strip()
+    # mini nettoyage
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def _format_misnested(html_str: str, start: int, end: int) -> bool:
+    """Vrai si le contenu du <p> ferme une mise en forme ouverte avant lui."""
+    depth: Dict[str, int] = {}
+    for m in _FORMAT_RE.finditer(html_str, start, end):
+        name = m.group(2).lower()
+        if not m.group(1):
+            depth[name] = depth.get(name, 0) + 1
+        elif depth.get(name):
+            depth[name] -= 1
+        else:
+            return True
+    return False
+
+
+def _p_nesting_diverges(html_str: str) -> bool:
+    """
+    Vrai si un parseur HTML5 fermerait un <p> là où html.parser le garde
+    ouvert (ou l'inverse) : <p> dans un <p>, bloc dans un <p>, </p> orphelin,
+    mise en forme mal imbriquée. Seules les balises <p> et le contenu des
+    paragraphes sont balayés. Un faux positif (balise dans un script...) ne
+    coûte qu'un repli BeautifulSoup.
+    """
+    open_end = None
+    for m in _P_TAG_RE.finditer(html_str):
+        if m.group(1):
+            if open_end is None or _P_CLOSER_RE.search(html_str, open_end, m.start()):
+                return True
+            if _format_misnested(html_str, open_end, m.start()):
+                return True
+            open_end = None
+        elif open_end is not None:
+            return True
+        else:
+            open_end = m.end()
+    if open_end is None:
+        return False
+    return _P_CLOSER_RE.search(html_str, open_end) is not None or _format_misnested(html_str, open_end, len(html_str))
+
+
+def _element_end(html_str: str, name: str, start: int) -> int:
+    m = re.compile(r"</%s\s*>" % name, re.I).search(html_str, start)
+    return m.start() if m else len(html_str)
+
+
+def _table_fosters_p(html_str: str) -> bool:
+    """Vrai si un <p> est ouvert dans un <table> hors de toute cellule."""
+    stack: List[str] = []
+    for m in _TABLE_RE.finditer(html_str):
+        name = m.group(2).lower()
+        if name == "p":
+            if not m.group(1) and stack and stack[-1] == "table":
+                return True
+        elif not m.group(1):
+            stack.append("table" if name == "table" else "cell")
+        elif stack:
+            # </td> ferme la cellule, </table> ce qui reste ouvert dans le tableau
+            if name == "table":
+                while stack and stack.pop() != "table":
+                    pass
+            elif stack[-1] == "cell":
+                stack.pop()
+    return False
+
+
+def _entities_diverge(html_str: str) -> bool:
+    for m in _ENTITY_RE.finditer(html_str):
+        ref = m.group(1)
+        if ref in html_entities.html5:
+            continue
+        if any(ref[:n] in _LEGACY_ENTITIES for n in range(2, min(len(ref), _LEGACY_MAX + 1))):
+            return True
+    return False
+
+
+def _tree_diverges(html_str: str) -> bool:
+    """Vrai si la page contient une construction où HTML5 et html.parser divergent (cf. en-tête)."""
+    if _ALWAYS_RE.search(html_str) or _p_nesting_diverges(html_str):
+        return True
+    for m in _RAW_RE.finditer(html_str):
+        if "<" in html_str[m.end():_element_end(html_str, m.group(1), m.end())]:
+            return True
+    for m in _FOREIGN_RE.finditer(html_str):
+        end = _element_end(html_str, m.group(1), m.end())
+        for p in _P_TAG_RE.finditer(html_str, m.end(), end):
+            # dans <foreignObject>, le HTML reste dans le SVG (retiré avec lui)
+            head = html_str[m.end():p.start()].lower()
+            if head.rfind("<foreignobject") <= head.rfind("</foreignobject"):
+                return True
+    end = _HTML_END_RE.search(html_str)
+    if end and _P_TAG_RE.search(html_str, end.end()):
+        return True
+    return _table_fosters_p(html_str) or _entities_diverge(html_str)
+
+
+def _record(text: str, title, image, canonical, published_time) -> PageRecord:
+    return {
+        "title": title or None,
+        "image": image or None,
+        "canonical": canonical or None,
+        "published_time": published_time or None,
+        "text": text,
+    }
+
+
+# -----------------------------
+# BeautifulSoup (repli)
+# -----------------------------
+def _bs4_meta(soup: BeautifulSoup, candidates) -> Optional[str]:
+    for attr_name, attr_value in candidates:
+        try:
+            tag = soup.find("meta", attrs={attr_name: attr_value})
+            if tag and tag.get("content"):
+                val = tag.get("content").strip()
+                if val:
+                    return val
+        except Exception:
+            pass
+    return None
+
+
+def text_from_soup(soup: BeautifulSoup) -> str:
+    """Extraction simple : priorité aux <article>, sinon concat <p>."""
+    for tag in soup(DROP_TAGS):
+        tag.decompose()
+
+    # zone article prioritaire
+    main = soup.find("article")
+    if not main:
+        # fallback : gros container de contenu possible
+        main = soup.find("main") or soup.find("div", attrs={"role": "main"}) or soup
+
+    return _join_paragraphs([p.get_text(" ", strip=True) for p in main.find_all("p")])
+
+
+def _bs4_soup(html_str: str) -> BeautifulSoup:
+    # arbre complet : filtrer par nom de tag perdrait les conteneurs (</div>...)
+    # qui ferment un <p> ouvert, et le texte du <p> déborderait sur la suite
+    return BeautifulSoup(html_str, "html.parser")
+
+
+def _page_bs4(html_str: str, with_meta: bool = True) -> PageRecord:
+    soup = _bs4_soup(html_str)
+    if not with_meta:
+        return _record(text_from_soup(soup), None, None, None, None)
+
+    title = _bs4_meta(soup, TITLE_METAS)
+    if not title and soup.title and soup.title.string:
+        title = soup.title.string.strip()
+    tag = soup.find("link", rel=lambda v: v and "canonical" in (v if isinstance(v, list) else v.split()))
+    canonical = (tag.get("href") or "").strip() if tag else None
+    image = _bs4_meta(soup, IMAGE_METAS)
+    published = _bs4_meta(soup, TIME_METAS)
+    return _record(text_from_soup(soup), title, image, canonical, published)
+
+
+# -----------------------------
+# lxml
+# -----------------------------
+def _lxml_meta(tree, candidates) -> Optional[str]:
+    for attr_name, attr_value in candidates:
+        for tag in tree.xpath(f"//meta[@{attr_name}=$v]", v=attr_value):
+            val = (tag.get("content") or "").strip()
+            if val:
+                return val
+            break
+    return None
+
+
+def _page_lxml(html_str: str, with_meta: bool = True) -> PageRecord:
+    # lxml refuse une chaîne str portant une déclaration d'encodage
+    tree = lxml_html.document_fromstring(_XML_DECL_RE.sub("", html_str, count=1))
+
+    title = image = canonical = published = None
+    if with_meta:
+        title = _lxml_meta(tree, TITLE_METAS)
+        if not title:
+            t = tree.find(".//title")
+            if t is not None and len(t) == 0 and t.text:
+                title = t.text.strip()
+        for link in tree.xpath("//link[@rel]"):
+            if "canonical" in link.get("rel", "").split():
+                canonical = (link.get("href") or "").strip()
+                break
+        image = _lxml_meta(tree, IMAGE_METAS)
+        published = _lxml_meta(tree, TIME_METAS)
+
+    lxml_etree.strip_elements(tree, *DROP_TAGS, with_tail=False)
+
+    main = tree.find(".//article")
+    if main is None:
+        main = tree.find(".//main")
+        if main is None:
+            found = tree.xpath("//div[@role='main']")
+            main = found[0] if found else tree
+
+    paras = []
+    for p in main.iter("p"):
+        paras.append(" ".join(s.strip() for s in p.itertext() if s.strip()))
+    return _record(_join_paragraphs(paras), title, image, canonical, published)
+
+
+# -----------------------------
+# selectolax (lexbor)
+# -----------------------------
+def _sx_meta(tree, candidates) -> Optional[str]:
+    for attr_name, attr_value in candidates:
+        tag = tree.css_first(f'meta[{attr_name}="{attr_value}"]')
+        if tag is not None:
+            val = (tag.attributes.get("content") or "").strip()
+            if val:
+                return val
+    return None
+
+
+def _sx_text(node) -> str:
+    parts = []
+    for n in node.traverse(include_text=True):
+        if n.tag == "-text":
+            s = (n.text_content or "").strip()
+            if s:
+                parts.append(s)
+    return " ".join(parts)
+
+
+def _page_selectolax(html_str: str, with_meta: bool = True) -> PageRecord:
+    tree = LexborHTMLParser(html_str)
+
+    title = image = canonical = published = None
+    if with_meta:
+        title = _sx_meta(tree, TITLE_METAS)
+        if not title:
+            t = tree.css_first("title")
+            if t is not None:
+                title = (t.text() or "").strip()
+        link = tree.css_first("link[rel~=canonical]")
+        if link is not None:
+            canonical = (link.attributes.get("href") or "").strip()
+        image = _sx_meta(tree, IMAGE_METAS)
+        published = _sx_meta(tree, TIME_METAS)
+
+    tree.strip_tags(DROP_TAGS)
+    main = None
+    for selector in ("article", "main", 'div[role="main"]'):
+        main = tree.css_first(selector)
+        if main is not None:
+            break
+    if main is None:
+        main = tree.root
+    paras = [_sx_text(p) for p in main.css("p")] if main is not None else []
+    return _record(_join_paragraphs(paras), title, image, canonical, published)
+
+
+# -----------------------------
+# Sélection du moteur
+# -----------------------------
+_ENGINES: Dict[str, Callable[..., PageRecord]] = {}
+if LexborHTMLParser is not None:
+    _ENGINES["selectolax"] = _page_selectolax
+if lxml_html is not None:
+    _ENGINES["lxml"] = _page_lxml
+_ENGINES["bs4"] = _page_bs4
+
+
+def available_engines() -> List[str]:
+    return list(_ENGINES)
+
+
+def engine_name(engine: Optional[str] = None) -> str:
+    wanted = (engine or os.environ.get("AURORE_HTML_ENGINE") or "").strip().lower()
+    if wanted in _ENGINES:
+        return wanted
+    return next(iter(_ENGINES))
+
+
+def _engine_for(html_str: str, engine: Optional[str]) -> str:
+    name = engine_name(engine)
+    if name != "bs4" and _tree_diverges(html_str):
+        return "bs4"
+    return name
+
+
+def extract_page(html_str: str, url: str = "", engine: Optional[str] = None) -> PageRecord:
+    """Enregistrement complet (texte + métadonnées). Repli sur BeautifulSoup si le moteur échoue."""
+    html_str = _bounded(html_str)
+    if not html_str.strip():
+        return dict(_record("", None, None, None, None), url=url)
+    name = _engine_for(html_str, engine)
+    try:
+        record = _ENGINES[name](html_str)
+    except Exception as e:
+        if name == "bs4":
+            raise
+        print(f"WARN extraction {name}: {e} — repli BeautifulSoup")
+        record = _page_bs4(html_str)
+    record["url"] = url
+    return record
+
+
+def extract_text(html_str: str, engine: Optional[str] = None) -> str:
+    html_str = _bounded(html_str)
+    if not html_str.strip():
+        return ""
+    name = _engine_for(html_str, engine)
+    try:
+        return _ENGINES[name](html_str, with_meta=False)["text"]
+    except Exception as e:
+        if name == "bs4":
+            raise
+        print(f"WARN extraction {name}: {e} — repli BeautifulSoup")
+        return _page_bs4(html_str, with_meta=False)["text"]
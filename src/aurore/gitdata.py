@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+gitdata.py
+- Publication atomique via la Git Data API : un seul arbre, un seul commit,
+  une seule mise à jour de ref (=> un seul déploiement du site)
+- Concurrence optimiste : si la branche a bougé entre-temps, on relit la base,
+  on reconstruit les fichiers et on réessaie
+"""
+from __future__ import annotations
+
+import base64
+import random
+import time
+from typing import Callable, Dict, Optional, Union
+
+from . import lazy
+
+github = lazy.module("github")
+
+
+FileContent = Union[str, bytes]
+FilesBuilder = Callable[[str], Dict[str, FileContent]]
+
+CONFLICT_STATUSES = (409, 422)
+
+
+def _element(repo, path: str, content: FileContent) -> "github.InputGitTreeElement":
+    if isinstance(content, bytes):
+        # binaire (images) : blob explicite en base64
+        blob = repo.create_git_blob(base64.b64encode(content).decode("ascii"), "base64")
+        return github.InputGitTreeElement(path, "100644", "blob", sha=blob.sha)
+    return github.InputGitTreeElement(path, "100644", "blob", content=content)
+
+
+def commit_files(
+    repo,
+    files: Union[Dict[str, FileContent], FilesBuilder],
+    message: str,
+    branch: Optional[str] = None,
+    retries: int = 4,
+) -> str:
+    """
+    Écrit tous les fichiers dans un seul commit et renvoie son sha.
+    `files` peut être un dict {chemin: contenu} ou une fonction qui reçoit le
+    sha du commit de base et renvoie ce dict : elle est rappelée à chaque
+    conflit, pour recalculer index/manifeste depuis la nouvelle base.
+    """
+    branch = branch or repo.default_branch
+    for attempt in range(retries + 1):
+        ref = repo.get_git_ref(f"heads/{branch}")
+        base = repo.get_git_commit(ref.object.sha)
+        content = files(base.sha) if callable(files) else files
+        if not content:
+            return base.sha
+
+        tree = repo.create_git_tree([_element(repo, p, c) for p, c in content.items()], base.tree)
+        commit = repo.create_git_commit(message, tree, [base])
+        try:
+            ref.edit(commit.sha, force=False)
+            return commit.sha
+        except github.GithubException as e:
+            if e.status not in CONFLICT_STATUSES or attempt == retries:
+                raise
+            delay = (0.5 * 2 ** attempt) * (1 + random.random())
+            print(f"WARN ref {branch} modifiée pendant la publication, nouvel essai dans {delay:.1f}s")
+            time.sleep(delay)
+    raise RuntimeError("commit_files: nombre d'essais épuisé")
@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 import os, sys, datetime
-from github import Github, GithubException
-from jinja2 import Environment, FileSystemLoader
-from bs4 import BeautifulSoup
+
+from . import gitdata, lazy, manifest, metrics, render
+from .config import Settings
+from .manifest import to_human as _to_human
+
+github = lazy.module("github")
+bs4 = lazy.module("bs4")
 
 def slugify(text: str) -> str:
     text = (text or "").lower()
@@ -23,13 +27,6 @@ def _parse_iso(iso_str: str | None, fallback_dt: datetime.datetime) -> str:
             pass
     return fallback_dt.isoformat()
 
-def _to_human(iso_str: str) -> str:
-    try:
-        dt = datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
-        return dt.astimezone(datetime.timezone.utc).strftime('%d/%m/%Y')
-    except Exception:
-        return datetime.datetime.now(datetime.timezone.utc).strftime('%d/%m/%Y')
-
 def get_existing_articles(repo):
     articles = []
     try:
@@ -43,7 +40,7 @@ def get_existing_articles(repo):
             if not item.name.lower().endswith('.html'):
                 continue
             file_content = item.decoded_content.decode('utf-8', errors='ignore')
-            soup = BeautifulSoup(file_content, 'html.parser')
+            soup = bs4.BeautifulSoup(file_content, 'html.parser')
             date_tag = soup.find('meta', attrs={'property': 'article:published_time'})
             iso_date = date_tag['content'].strip() if date_tag and date_tag.has_attr('content') else None
             if not iso_date:
@@ -63,70 +60,74 @@ def get_existing_articles(repo):
                 'filename': item.name,
                 'image_url': (image_tag['content'].strip() if image_tag and image_tag.has_attr('content') else None),
             })
-    except GithubException as e:
+    except github.GithubException as e:
         if e.status == 404:
             return []
         else:
             raise e
     return articles
 
+@metrics.span("publish")
 def publish_article_and_update_index(title: str, summary: str, image_url: str | None, config: dict, published_at: str | None = None):
     try:
         token = os.environ.get('GH_TOKEN') or os.environ['GITHUB_TOKEN']  # A_GH_TOKEN mappé sur GH_TOKEN dans le workflow
         repo_name = config['site_repo_name']
-        g = Github(token)
+        g = github.Github(token, base_url=Settings.GITHUB_API_URL)
         repo = g.get_repo(repo_name)
 
         now_utc = datetime.datetime.now(datetime.timezone.utc)
         slug = slugify(title)
         filename = f"{now_utc.strftime('%Y-%m-%d')}-{slug}.html"
 
-        env = Environment(loader=FileSystemLoader('templates'))
+        env = render.get_env('templates', autoescape=False)
         summary_html = (summary or "").replace('\n', '<br>')
         iso_pub = _parse_iso(published_at, now_utc)
 
-        article_template = env.get_template('article.html.j2')
-        article_html = article_template.render(
-            title=title,
-            summary=summary_html,
-            image_url=image_url,
-            iso_date=iso_pub,
-            date_human=_to_human(iso_pub),
-
-            brand_name=config.get('brand_name'),
-            brand_color=config.get('brand_color'),
-            production_url=config.get('production_url'),
-            logo_filename=config.get('logo_filename'),
-
-            filename=filename
-        )
-        repo.create_file(f"articles/{filename}", f"feat: article '{title}'", article_html, branch="main")
-        print(f"Article publié: {filename}")
-
-        # Index
-        all_articles = get_existing_articles(repo)
-        all_articles.sort(key=lambda x: x['iso_date'], reverse=True)
-        latest = all_articles[:10]
+        with metrics.span("render"):
+            article_html = env.get_template('article.html.j2').render(
+                title=title,
+                summary=summary_html,
+                image_url=image_url,
+                iso_date=iso_pub,
+                date_human=_to_human(iso_pub),
+
+                brand_name=config.get('brand_name'),
+                brand_color=config.get('brand_color'),
+                production_url=config.get('production_url'),
+                logo_filename=config.get('logo_filename'),
 
+                filename=filename
+            )
+        article_path = f"articles/{filename}"
+        entry = {'title': title, 'iso_date': iso_pub, 'filename': filename, 'image_url': image_url}
         index_template = env.get_template('index.html.j2')
-        index_html = index_template.render(
-            articles=latest,
-            brand_name=config.get('brand_name'),
-            brand_color=config.get('brand_color'),
-            production_url=config.get('production_url'),
-            logo_filename=config.get('logo_filename'),
-        )
 
-        try:
-            contents = repo.get_contents("index.html", ref="main")
-            repo.update_file(contents.path, "chore: update index", index_html, contents.sha, branch="main")
-            print("Index mis à jour.")
-        except GithubException as e:
-            if e.status == 404:
-                repo.create_file("index.html", "feat: create index", index_html, branch="main")
-                print("Index créé.")
-            else:
-                raise e
+        def build_files(base_sha: str) -> dict:
+            # Manifeste : mise à jour incrémentale (reconstruit une seule fois s'il n'existe pas)
+            manifest_data, _ = manifest.load_manifest(repo, ref=base_sha)
+            if manifest_data is None:
+                print("Manifeste absent: reconstruction depuis articles/.")
+                manifest_data = manifest.rebuild(repo)
+            manifest.add_entry(manifest_data, entry)
+
+            # Index
+            with metrics.span("index"):
+                index_html = index_template.render(
+                    articles=manifest.latest(manifest_data, 10),
+                    brand_name=config.get('brand_name'),
+                    brand_color=config.get('brand_color'),
+                    production_url=config.get('production_url'),
+                    logo_filename=config.get('logo_filename'),
+                )
+            return {
+                article_path: article_html,
+                manifest.MANIFEST_PATH: manifest.dumps(manifest_data),
+                "index.html": index_html,
+            }
+
+        # Article + manifeste + index : un seul commit, un seul déploiement
+        gitdata.commit_files(repo, build_files, f"feat: article '{title}'", branch="main")
+        print(f"Article publié: {filename} (index et manifeste inclus dans le même commit)")
 
         article_url = f"{config['production_url'].rstrip('/')}/articles/{filename}"
         return "Article et index publiés.", title, article_url
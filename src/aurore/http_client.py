@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+http_client.py
+- Session HTTP partagée (pool de connexions par hôte, keep-alive)
+- Retries avec backoff + jitter sur 429/5xx ; Retry-After respecté mais
+  plafonné (MAX_RETRY_AFTER) : un « Retry-After: 3600 » ne bloque pas un
+  worker (ni la sortie du processus, qui joint les threads) pendant une heure
+- User-Agent unique (Settings.USER_AGENT)
+- Hooks de mesure appelés après chaque requête
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import Settings
+
+
+DEFAULT_TIMEOUT = 15.0
+POOL_CONNECTIONS = 16   # nombre d'hôtes gardés en pool
+POOL_MAXSIZE = 8        # connexions simultanées par hôte
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRY_AFTER = 5.0   # secondes d'attente max sur Retry-After
+
+Hook = Callable[[Dict[str, Any]], None]
+
+_hooks: List[Hook] = []
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+
+
+class _CappedRetry(Retry):
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+
+def _retry_policy() -> Retry:
+    return _CappedRetry(
+        total=3,
+        connect=2,
+        read=2,
+        status=3,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def session() -> requests.Session:
+    """Retourne la session du processus (créée à la première utilisation)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=_retry_policy(),
+                )
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers["User-Agent"] = Settings.USER_AGENT
+                _session = s
+    return _session
+
+
+def add_hook(fn: Hook) -> None:
+    """Enregistre un hook appelé avec un dict {method, url, status, elapsed, bytes, error}."""
+    if fn not in _hooks:
+        _hooks.append(fn)
+
+
+def remove_hook(fn: Hook) -> None:
+    try:
+        _hooks.remove(fn)
+    except ValueError:
+        pass
+
+
+def _emit(event: Dict[str, Any]) -> None:
+    for fn in list(_hooks):
+        try:
+            fn(event)
+        except Exception as e:
+            print(f"WARN http hook: {e}")
+
+
+def _size(resp: requests.Response, streamed: bool) -> int:
+    if not streamed:
+        return len(resp.content or b"")
+    try:
+        return int(resp.headers.get("Content-Length") or 0)
+    except ValueError:
+        return 0
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    streamed = bool(kwargs.get("stream"))
+    event: Dict[str, Any] = {"method": method.upper(), "url": url, "status": None, "bytes": 0, "error": None}
+    t0 = time.perf_counter()
+    try:
+        resp = session().request(method, url, **kwargs)
+        event["status"] = resp.status_code
+        event["bytes"] = _size(resp, streamed)
+        return resp
+    except Exception as e:
+        event["error"] = type(e).__name__
+        raise
+    finally:
+        event["elapsed"] = time.perf_counter() - t0
+        _emit(event)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    return request("HEAD", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request("PUT", url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request("DELETE", url, **kwargs)
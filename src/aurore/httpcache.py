@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+httpcache.py
+- Cache HTTP sur disque persistant entre les runs (dossier restauré par actions/cache)
+- Revalidation conditionnelle (If-None-Match / If-Modified-Since)
+- Corps stockés par hash de contenu, éviction LRU par taille totale
+- Données dérivées (ex: extraction HTML) rattachées au hash du corps :
+  un 304 évite à la fois le téléchargement et la ré-extraction
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import http_client, metrics
+from .config import Settings
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class CachedResponse:
+    def __init__(self, url: str, status: int, content: bytes, encoding: Optional[str], body_hash: Optional[str], not_modified: bool):
+        self.url = url
+        self.status_code = status
+        self.content = content
+        self.encoding = encoding
+        self.body_hash = body_hash
+        self.not_modified = not_modified
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code} pour {self.url}")
+
+
+class HttpCache:
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._bodies = os.path.join(root, "bodies")
+        self._derived = os.path.join(root, "derived")
+        self._index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    # ---- index ----
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._index is None:
+            try:
+                with open(self._index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f) or {}
+            except Exception:
+                self._index = {}
+        return self._index
+
+    def _save(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index or {}, f)
+        os.replace(tmp, self._index_path)
+
+    def _body_path(self, h: str) -> str:
+        return os.path.join(self._bodies, h[:2], h)
+
+    def _derived_path(self, h: str, kind: str) -> str:
+        return os.path.join(self._derived, h[:2], f"{h}.{kind}.json")
+
+    # ---- corps ----
+    def _read_body(self, h: str) -> Optional[bytes]:
+        try:
+            with open(self._body_path(h), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_body(self, content: bytes) -> str:
+        h = hashlib.sha256(content).hexdigest()
+        path = self._body_path(h)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        return h
+
+    def _evict(self) -> None:
+        """LRU : supprime les entrées les moins récemment utilisées au-delà du budget."""
+        index = self._load()
+        sizes: Dict[str, int] = {}
+        last_use: Dict[str, float] = {}
+        for meta in index.values():
+            h = meta.get("body")
+            if not h:
+                continue
+            sizes[h] = int(meta.get("size") or 0)
+            last_use[h] = max(last_use.get(h, 0.0), float(meta.get("atime") or 0.0))
+
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        for h in sorted(last_use, key=last_use.get):
+            if total <= self.max_bytes:
+                break
+            for u in [u for u, m in index.items() if m.get("body") == h]:
+                del index[u]
+            for path in [self._body_path(h)] + self._derived_files(h):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= sizes[h]
+            self.stats["evictions"] += 1
+
+    def _derived_files(self, h: str):
+        d = os.path.dirname(self._derived_path(h, "x"))
+        try:
+            return [os.path.join(d, n) for n in os.listdir(d) if n.startswith(h + ".")]
+        except OSError:
+            return []
+
+    # ---- API ----
+    def get(self, url: str, timeout: float = 15.0) -> CachedResponse:
+        """
+        GET conditionnel. Renvoie un CachedResponse dont not_modified=True
+        si le serveur a répondu 304 (corps relu depuis le disque).
+        Les erreurs HTTP (>= 400) ne sont pas mises en cache.
+        """
+        with self._lock:
+            meta = dict(self._load().get(url) or {})
+
+        headers = {}
+        cached_body = self._read_body(meta["body"]) if meta.get("body") else None
+        if cached_body is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with http_client.get(url, headers=headers, timeout=timeout, allow_redirects=True) as r:
+            if r.status_code == 304 and cached_body is not None:
+                with self._lock:
+                    self.stats["hits"] += 1
+                    entry = self._load().get(url)
+                    if entry is not None:
+                        entry["atime"] = time.time()
+                        self._save()
+                metrics.incr("http_cache_hits")
+                return CachedResponse(meta.get("final_url") or url, 200, cached_body, meta.get("encoding"), meta["body"], True)
+
+            content = r.content or b""
+            encoding = r.encoding or r.apparent_encoding
+            status = r.status_code
+            final_url = r.url or url
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+
+        with self._lock:
+            self.stats["misses"] += 1
+            if status < 400 and not (etag or last_modified) and self._load().pop(url, None) is not None:
+                self._save()
+        metrics.incr("http_cache_misses")
+        if status >= 400 or not (etag or last_modified):
+            return CachedResponse(final_url, status, content, encoding, None, False)
+
+        with self._lock:
+            h = self._write_body(content)
+            self._load()[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "body": h,
+                "size": len(content),
+                "encoding": encoding,
+                "final_url": final_url,
+                "atime": time.time(),
+            }
+            self.stats["stores"] += 1
+            self._evict()
+            self._save()
+        return CachedResponse(final_url, status, content, encoding, h, False)
+
+    def load_derived(self, body_hash: Optional[str], kind: str) -> Optional[Any]:
+        if not body_hash:
+            return None
+        try:
+            with open(self._derived_path(body_hash, kind), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def save_derived(self, body_hash: Optional[str], kind: str, value: Any) -> None:
+        if not body_hash:
+            return
+        path = self._derived_path(body_hash, kind)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"WARN httpcache derived: {e}")
+
+
+_default: Optional[HttpCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> HttpCache:
+    """Cache du processus, sous Settings.CACHE_DIR/http."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                max_mb = int(os.environ.get("AURORE_HTTP_CACHE_MB", "64"))
+                _default = HttpCache(os.path.join(Settings.CACHE_DIR, "http"), max_bytes=max_mb * 1024 * 1024)
+    return _default
+
+
+def cached_get(url: str, timeout: float = 15.0) -> CachedResponse:
+    return default_cache().get(url, timeout=timeout)
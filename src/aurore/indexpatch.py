@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+indexpatch.py
+- Ajout d'une entrée en tête de la liste des derniers articles d'index.html
+  sans parser le document : seule la plage d'octets de la liste est réécrite,
+  le reste du fichier ressort identique à l'octet près
+- Région : entre les marqueurs <!-- aurore:latest:start --> et
+  <!-- aurore:latest:end --> s'ils sont présents, sinon contenu de l'élément
+  désigné par index_selector (config.json ; formes #id, .classe, tag,
+  tag#id, tag.classe) ; un sélecteur d'une autre forme est signalé (WARN)
+  et remplacé par DEFAULT_SELECTOR, la publication continue
+- Les <li> de premier niveau au-delà de index_keep sont retirés
+- Travail linéaire en la taille du fichier : recherches de chaînes et
+  balayages de balises par expressions compilées, sans retour arrière
+"""
+from __future__ import annotations
+
+import html
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+MARK_START = "<!-- aurore:latest:start -->"
+MARK_END = "<!-- aurore:latest:end -->"
+DEFAULT_SELECTOR = "#latest-articles"
+DEFAULT_KEEP = 10
+
+_SELECTOR_RE = re.compile(r"^\s*([a-zA-Z][\w-]*)?(?:([#.])([\w-]+))?\s*$")
+_LI_RE = re.compile(r"<(/?)li\b[^>]*>", re.I)
+_BODY_RE = re.compile(r"<body\b[^>]*>", re.I)
+
+
+def entry_html(entry: Dict) -> str:
+    href = f"/articles/{entry['filename']}"
+    return (
+        f'<li><a href="{html.escape(href)}">{html.escape(entry["title"], quote=False)}</a> '
+        f'<time datetime="{html.escape(entry["iso_date"])}">{html.escape(entry["date"], quote=False)}</time></li>'
+    )
+
+
+@lru_cache(maxsize=32)
+def _selector_re(selector: str) -> Tuple[re.Pattern, Optional[str]]:
+    """Expression de la balise ouvrante désignée par le sélecteur (+ nom de balise si imposé)."""
+    m = _SELECTOR_RE.match(selector or "")
+    if not m or not (m.group(1) or m.group(3)):
+        raise ValueError(f"sélecteur non pris en charge : {selector!r} (#id, .classe, tag, tag#id, tag.classe)")
+    tag, kind, name = m.group(1), m.group(2), m.group(3)
+    tag_pat = re.escape(tag) if tag else r"[a-zA-Z][\w-]*"
+    if kind == "#":
+        attr = r"""[^>]*?\sid\s*=\s*(?:"%s"|'%s'|%s(?=[\s/>]))""" % ((re.escape(name),) * 3)
+    elif kind == ".":
+        attr = r"""[^>]*?\sclass\s*=\s*(?:"(?:[^"]*\s)?%s(?:\s[^"]*)?"|'(?:[^']*\s)?%s(?:\s[^']*)?'|%s(?=[\s/>]))""" % ((re.escape(name),) * 3)
+    else:
+        attr = ""
+    return re.compile(r"<(%s)\b%s[^>]*>" % (tag_pat, attr), re.I), tag
+
+
+def _usable(selector: str) -> str:
+    """Le sélecteur s'il est pris en charge, sinon DEFAULT_SELECTOR (avec un avertissement)."""
+    try:
+        _selector_re(selector)
+        return selector
+    except ValueError as e:
+        print(f"WARN index_selector: {e} — repli sur {DEFAULT_SELECTOR}")
+        return DEFAULT_SELECTOR
+
+
+@lru_cache(maxsize=32)
+def _tag_re(tag: str) -> re.Pattern:
+    return re.compile(r"<(/?)%s\b[^>]*>" % re.escape(tag), re.I)
+
+
+def _element_inner(doc: str, selector: str) -> Optional[Tuple[int, int]]:
+    """(début, fin) du contenu du premier élément correspondant, fermeture appariée (imbrication comprise)."""
+    pat, _ = _selector_re(selector)
+    m = pat.search(doc)
+    if not m:
+        return None
+    depth = 1
+    for t in _tag_re(m.group(1).lower()).finditer(doc, m.end()):
+        if t.group(1):
+            depth -= 1
+            if depth == 0:
+                return m.end(), t.start()
+        elif not t.group(0).endswith("/>"):
+            depth += 1
+    return None
+
+
+def find_region(doc: str, selector: str = DEFAULT_SELECTOR) -> Optional[Tuple[int, int]]:
+    """Plage (début, fin) à réécrire : marqueurs d'abord, sinon sélecteur ; None si introuvable."""
+    start = doc.find(MARK_START)
+    if start >= 0:
+        end = doc.find(MARK_END, start)
+        if end >= 0:
+            return start + len(MARK_START), end
+    return _element_inner(doc, _usable(selector))
+
+
+def _items(inner: str) -> List[Tuple[int, int]]:
+    """Plages des <li> de premier niveau (les listes imbriquées restent dans leur <li>)."""
+    spans, depth, open_at = [], 0, 0
+    for t in _LI_RE.finditer(inner):
+        if t.group(1):
+            if depth:
+                depth -= 1
+                if depth == 0:
+                    spans.append((open_at, t.end()))
+        else:
+            if depth == 0:
+                open_at = t.start()
+            depth += 1
+    return spans
+
+
+def splice_inner(inner: str, item: str, keep: int = DEFAULT_KEEP) -> str:
+    """Contenu de la région avec `item` en tête et au plus `keep` entrées."""
+    spans = _items(inner)
+    if not spans:
+        body = inner.strip()
+        return "\n" + item + ("\n" + body if body else "") + "\n"
+    first = spans[0][0]
+    sep = inner[spans[0][1]:spans[1][0]] if len(spans) > 1 else "\n"
+    kept = spans[: max(0, keep - 1)]
+    if kept:
+        # de la première entrée gardée à la dernière : octets inchangés
+        middle = sep + inner[first:kept[-1][1]]
+    else:
+        middle = ""
+    return inner[:first] + item + middle + inner[spans[-1][1]:]
+
+
+def patch(doc: str, entry: Dict, selector: str = DEFAULT_SELECTOR, keep: int = DEFAULT_KEEP) -> str:
+    """
+    index.html avec l'entrée ajoutée. Région absente : la liste est créée
+    (avec ses marqueurs) au début du <body>, ou en tête du document.
+    """
+    item = entry_html(entry)
+    selector = _usable(selector)
+    region = find_region(doc, selector)
+    if region is None:
+        _, tag = _selector_re(selector)
+        m = _SELECTOR_RE.match(selector)
+        attr = f' id="{m.group(3)}"' if m.group(2) == "#" else (f' class="{m.group(3)}"' if m.group(2) == "." else "")
+        block = f"\n<{tag or 'ul'}{attr}>{MARK_START}\n{item}\n{MARK_END}</{tag or 'ul'}>\n"
+        body = _BODY_RE.search(doc)
+        at = body.end() if body else 0
+        return doc[:at] + block + doc[at:]
+    start, end = region
+    return doc[:start] + splice_inner(doc[start:end], item, keep) + doc[end:]
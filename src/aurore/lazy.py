@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+lazy.py
+- Registre des dépendances lourdes ou optionnelles (PyGithub, Jinja2, tweepy,
+  Gemini, GNews, BeautifulSoup, NumPy) : importées à la première utilisation et non au
+  chargement d'aurore, pour qu'un run sans article à publier ne les paie pas
+- module(nom) : proxy résolu au premier accès d'attribut (les attributs sont
+  relus à chaque accès, un monkeypatch du vrai module reste visible)
+- optional(nom) : le module, ou None s'il n'est pas installé
+Mesure : python benchmarks/importtime.py
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import types
+from typing import Any, Dict, Optional
+
+
+# alias court -> module réel
+REGISTRY: Dict[str, str] = {
+    "github": "github",
+    "jinja2": "jinja2",
+    "tweepy": "tweepy",
+    "genai": "google.generativeai",
+    "gnews": "gnews",
+    "bs4": "bs4",
+    "numpy": "numpy",
+}
+
+_loaded: Dict[str, types.ModuleType] = {}
+_lock = threading.Lock()
+
+
+def load(name: str) -> types.ModuleType:
+    """Importe (une fois) le module enregistré sous `name` ; lève ImportError s'il manque."""
+    mod = _loaded.get(name)
+    if mod is None:
+        with _lock:
+            mod = _loaded.get(name)
+            if mod is None:
+                mod = _loaded[name] = importlib.import_module(REGISTRY.get(name, name))
+    return mod
+
+
+def optional(name: str) -> Optional[types.ModuleType]:
+    try:
+        return load(name)
+    except Exception:
+        return None
+
+
+class LazyModule(types.ModuleType):
+    """Proxy de module : rien n'est importé avant le premier accès d'attribut."""
+
+    def __init__(self, name: str):
+        super().__init__(REGISTRY.get(name, name))
+        self._lazy_name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(load(self._lazy_name), attr)
+
+    def __repr__(self) -> str:
+        state = "chargé" if self._lazy_name in _loaded else "non chargé"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def module(name: str) -> LazyModule:
+    return LazyModule(name)
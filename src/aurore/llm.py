@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+llm.py
+- Client Gemini asynchrone pour les runs à plusieurs articles : résumés et
+  lignes de tweet générés en parallèle plutôt qu'en série
+- Seaux à jetons (requêtes / min et tokens / min) partagés par tout le
+  processus, y compris entre sites en mode --sites all
+- Concurrence bornée, délai par appel et échéance globale : un appel en
+  retard est annulé, l'appelant bascule sur son repli
+Réglages : GEMINI_RPM, GEMINI_TPM, GEMINI_CONCURRENCY, GEMINI_TIMEOUT (voir config.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from . import lazy
+from .config import Settings
+
+genai = lazy.module("genai")
+
+
+class TokenBucket:
+    """
+    Seau à jetons thread-safe (utilisable depuis plusieurs boucles asyncio).
+    Les jetons sont réservés à l'appel (quitte à passer en négatif) : l'attente
+    est calculée une fois, les demandes sont servies dans l'ordre d'arrivée.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = max(float(per_minute), 1e-9) / 60.0
+        self.capacity = float(capacity if capacity is not None else per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n: float = 1.0) -> float:
+        """Réserve n jetons et renvoie l'attente nécessaire (s)."""
+        n = min(float(n), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= n
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self, n: float = 1.0) -> None:
+        wait = self.reserve(n)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def shared_buckets() -> Dict[str, TokenBucket]:
+    """Seaux du processus : 'requests' (GEMINI_RPM) et 'tokens' (GEMINI_TPM)."""
+    with _buckets_lock:
+        if not _buckets:
+            _buckets["requests"] = TokenBucket(Settings.GEMINI_RPM)
+            _buckets["tokens"] = TokenBucket(Settings.GEMINI_TPM)
+        return _buckets
+
+
+def estimate_tokens(prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> int:
+    # ~4 caractères par token en français, + la sortie maximale demandée
+    return len(prompt) // 4 + int((generation_config or {}).get("max_output_tokens") or 256)
+
+
+class AsyncLLM:
+    """Un modèle + sa config ; une instance par boucle asyncio."""
+
+    def __init__(
+        self,
+        model: str,
+        generation_config: Optional[Dict[str, Any]] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        buckets: Optional[Dict[str, TokenBucket]] = None,
+    ):
+        self.model_name = model
+        self.generation_config = dict(generation_config or {})
+        self.timeout = float(timeout or Settings.GEMINI_TIMEOUT)
+        self.buckets = buckets or shared_buckets()
+        self._sem = asyncio.Semaphore(max(1, int(concurrency or Settings.GEMINI_CONCURRENCY)))
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+            self._model = genai.GenerativeModel(self.model_name, generation_config=dict(self.generation_config))
+        return self._model
+
+    async def _call(self, prompt: str) -> str:
+        async with self._sem:
+            await self.buckets["requests"].acquire(1)
+            await self.buckets["tokens"].acquire(estimate_tokens(prompt, self.generation_config))
+            resp = await asyncio.wait_for(self._get_model().generate_content_async(prompt), self.timeout)
+            return (getattr(resp, "text", None) or "").strip()
+
+    async def generate(self, prompt: str, deadline: Optional[float] = None) -> str:
+        """
+        Texte généré. `deadline` (time.monotonic) couvre aussi l'attente des
+        seaux et du sémaphore ; au-delà, l'appel est annulé (TimeoutError).
+        """
+        if deadline is None:
+            return await self._call(prompt)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        return await asyncio.wait_for(self._call(prompt), remaining)
+
+    async def generate_many(
+        self, prompts: Sequence[str], deadline: Optional[float] = None
+    ) -> List[Union[str, BaseException]]:
+        """Génère tout en parallèle ; une erreur n'interrompt pas les autres appels."""
+        return await asyncio.gather(*(self.generate(p, deadline) for p in prompts), return_exceptions=True)
+
+
+def generate_many(
+    model: str,
+    generation_config: Optional[Dict[str, Any]],
+    prompts: Sequence[str],
+    deadline_s: Optional[float] = None,
+) -> List[Union[str, BaseException]]:
+    """Appel synchrone (nouvelle boucle) ; deadline_s est relatif à maintenant."""
+    if not prompts:
+        return []
+    deadline = time.monotonic() + deadline_s if deadline_s else None
+
+    async def _run():
+        return await AsyncLLM(model, generation_config).generate_many(prompts, deadline)
+
+    return asyncio.run(_run())
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+llmcache.py
+- Cache disque des générations Gemini, adressé par contenu :
+  clé = sha256(modèle, generation_config, prompt, texte source)
+- Un run qui échoue après le résumé (conflit GitHub, tweet...) ou une relance
+  manuelle ne repaie pas la même génération
+- Expiration (TTL) + éviction LRU par taille totale ; statistiques hits/misses
+Réglages : AURORE_LLM_CACHE_TTL_H (défaut 72 h), AURORE_LLM_CACHE_MB (défaut 16).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import metrics
+from .config import Settings
+
+
+DEFAULT_TTL_S = 72 * 3600
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def make_key(model: str, generation_config: Optional[Dict[str, Any]], prompt: str, text: str = "") -> str:
+    payload = json.dumps(
+        {"model": model, "config": generation_config or {}, "prompt": prompt, "text": text},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, root: str, ttl_s: float = DEFAULT_TTL_S, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.ttl_s = float(ttl_s)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "expired": 0, "evictions": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except Exception:
+            entry = None
+
+        if entry is not None and time.time() - float(entry.get("created") or 0) > self.ttl_s:
+            self._remove(path)
+            with self._lock:
+                self.stats["expired"] += 1
+            entry = None
+
+        with self._lock:
+            self.stats["hits" if entry is not None else "misses"] += 1
+        metrics.incr("llm_cache_hits" if entry is not None else "llm_cache_misses")
+        if entry is None:
+            return None
+        try:
+            os.utime(path)  # dernier accès, pour l'éviction LRU
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "value": value}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"WARN llmcache: {e}")
+            return
+        with self._lock:
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        out = []
+        for dirpath, _, names in os.walk(self.root):
+            for n in names:
+                if n.endswith(".json"):
+                    p = os.path.join(dirpath, n)
+                    try:
+                        st = os.stat(p)
+                    except OSError:
+                        continue
+                    out.append((p, st.st_mtime, st.st_size))
+        return out
+
+    def _evict(self) -> None:
+        """LRU : supprime les entrées les moins récemment lues au-delà du budget."""
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        for path, _, size in sorted(entries, key=lambda e: e[1]):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self.stats["evictions"] += 1
+
+
+_default: Optional[LLMCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> LLMCache:
+    """Cache du processus, sous Settings.CACHE_DIR/llm."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                ttl_h = float(os.environ.get("AURORE_LLM_CACHE_TTL_H", "72"))
+                max_mb = int(os.environ.get("AURORE_LLM_CACHE_MB", "16"))
+                _default = LLMCache(os.path.join(Settings.CACHE_DIR, "llm"), ttl_s=ttl_h * 3600, max_bytes=max_mb * 1024 * 1024)
+    return _default
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+manifest.py
+- Manifeste JSON des articles publiés (articles/manifest.json dans le repo du site)
+- Mis à jour incrémentalement à chaque publication : l'index se rend sans
+  relister ni reparser articles/
+- Reconstruction ponctuelle depuis les fichiers existants :
+    python -m aurore.manifest --site libre
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import lazy
+from .config import Settings
+
+github = lazy.module("github")
+
+
+MANIFEST_PATH = "articles/manifest.json"
+MANIFEST_VERSION = 1
+ENTRY_FIELDS = ("title", "iso_date", "filename", "image_url")
+
+
+def to_human(iso_str: str) -> str:
+    try:
+        dt = datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
+        return dt.astimezone(datetime.timezone.utc).strftime('%d/%m/%Y')
+    except Exception:
+        return datetime.datetime.now(datetime.timezone.utc).strftime('%d/%m/%Y')
+
+
+def empty_manifest() -> Dict[str, Any]:
+    return {"version": MANIFEST_VERSION, "articles": []}
+
+
+def add_entry(manifest: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Ajoute (ou remplace, par filename) une entrée et garde le tri date décroissante."""
+    clean = {k: entry.get(k) for k in ENTRY_FIELDS}
+    articles = [a for a in manifest.get("articles", []) if a.get("filename") != clean["filename"]]
+    articles.append(clean)
+    articles.sort(key=lambda a: a.get("iso_date") or "", reverse=True)
+    manifest["articles"] = articles
+    return manifest
+
+
+def from_entries(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    manifest = empty_manifest()
+    for e in entries:
+        add_entry(manifest, e)
+    return manifest
+
+
+def latest(manifest: Dict[str, Any], n: int = 10) -> List[Dict[str, Any]]:
+    """Les n plus récents, prêts pour index.html.j2 (date_human calculée à la volée)."""
+    out = []
+    for a in manifest.get("articles", [])[:n]:
+        item = dict(a)
+        item["date_human"] = to_human(a.get("iso_date") or "")
+        out.append(item)
+    return out
+
+
+def dumps(manifest: Dict[str, Any]) -> str:
+    return json.dumps(manifest, ensure_ascii=False, indent=1) + "\n"
+
+
+def load_manifest(repo, ref: str = "main") -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Renvoie (manifeste, sha) ; (None, None) si le fichier n'existe pas encore."""
+    try:
+        f = repo.get_contents(MANIFEST_PATH, ref=ref)
+        return json.loads(f.decoded_content.decode("utf-8")), f.sha
+    except github.GithubException as e:
+        if e.status == 404:
+            return None, None
+        raise
+
+
+def save_manifest(repo, manifest: Dict[str, Any], sha: Optional[str], message: str, branch: str = "main") -> None:
+    if sha:
+        repo.update_file(MANIFEST_PATH, message, dumps(manifest), sha, branch=branch)
+    else:
+        repo.create_file(MANIFEST_PATH, message, dumps(manifest), branch=branch)
+
+
+def rebuild(repo) -> Dict[str, Any]:
+    """Reconstruit le manifeste en parcourant articles/ (coûteux : à lancer une fois)."""
+    from .github_pr import get_existing_articles
+
+    return from_entries(get_existing_articles(repo))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reconstruit articles/manifest.json depuis les articles existants.")
+    parser.add_argument("--site", required=True, help="clé du site dans config.json (ex: libre, tech)")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--dry-run", action="store_true", help="affiche le manifeste sans l'écrire")
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)[args.site]
+
+    token = os.environ.get("GH_TOKEN") or os.environ.get("A_GH_TOKEN") or os.environ["GITHUB_TOKEN"]
+    repo = github.Github(token, base_url=Settings.GITHUB_API_URL).get_repo(config["site_repo_name"])
+
+    manifest = rebuild(repo)
+    print(f"Manifeste reconstruit: {len(manifest['articles'])} articles")
+    if args.dry_run:
+        print(dumps(manifest))
+        return 0
+
+    _, sha = load_manifest(repo)
+    save_manifest(repo, manifest, sha, "chore: rebuild articles manifest")
+    print(f"{MANIFEST_PATH} écrit.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
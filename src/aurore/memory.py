@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+memory.py
+- Interface de stockage de la mémoire des URLs traitées (derrière
+  dedup.has_processed / mark_processed / get_processed_urls / save_processed_urls)
+- Opérations par lot natives : has_many (sous-ensemble des clés présentes),
+  mark_many (une seule transaction / une écriture par shard)
+- Implémentations : "memory" (dict du processus : tests, benchmarks),
+  "sqlite" (fichier local en WAL, runs auto-hébergés) ; "netlify" (blobs
+  distants, défaut) est dans dedup.py
+- Choix par site dans config.json : memory_backend, memory_path (sqlite),
+  memory_ttl_days (expiration, défaut 180)
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Sequence, Set
+
+from .config import Settings
+
+
+DEFAULT_TTL_DAYS = 180
+SQLITE_BATCH = 500  # paramètres par requête IN (limite SQLite : 999 sur les vieilles versions)
+
+
+class MemoryBackend(ABC):
+    """Clés = chaînes 'processed:<sha256>' (dedup._lookup_keys)."""
+
+    name = "base"
+
+    def __init__(self, ttl_days: float = DEFAULT_TTL_DAYS):
+        self.ttl_s = float(ttl_days) * 86400
+
+    @abstractmethod
+    def has_many(self, keys: Sequence[str]) -> Set[str]:
+        """Sous-ensemble des clés présentes (et non expirées)."""
+
+    @abstractmethod
+    def mark_many(self, keys: Iterable[str], url: Optional[str] = None, ts: Optional[float] = None) -> None:
+        """Marque les clés comme traitées."""
+
+    def processed_urls(self) -> Set[str]:
+        """URLs connues (quand le backend les conserve)."""
+        return set()
+
+    def compact(self) -> Dict[str, int]:
+        return {}
+
+    def has(self, key: str) -> bool:
+        return bool(self.has_many([key]))
+
+    def mark(self, key: str, url: Optional[str] = None) -> None:
+        self.mark_many([key], url)
+
+
+class InMemoryBackend(MemoryBackend):
+    name = "memory"
+
+    def __init__(self, ttl_days: float = DEFAULT_TTL_DAYS):
+        super().__init__(ttl_days)
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def has_many(self, keys: Sequence[str]) -> Set[str]:
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            return {k for k in keys if k in self._entries and self._entries[k][0] >= cutoff}
+
+    def mark_many(self, keys: Iterable[str], url: Optional[str] = None, ts: Optional[float] = None) -> None:
+        now = ts or time.time()
+        with self._lock:
+            for k in keys:
+                self._entries[k] = (now, url)
+
+    def processed_urls(self) -> Set[str]:
+        with self._lock:
+            return {u for _, u in self._entries.values() if u}
+
+    def compact(self) -> Dict[str, int]:
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            old = [k for k, (ts, _) in self._entries.items() if ts < cutoff]
+            for k in old:
+                del self._entries[k]
+        return {"expired": len(old)}
+
+
+class SQLiteBackend(MemoryBackend):
+    """
+    Table processed(key, ts, url), index sur ts. WAL : les lectures ne
+    bloquent pas l'écriture d'un autre processus ; une transaction par lot.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl_days: float = DEFAULT_TTL_DAYS):
+        super().__init__(ttl_days)
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS processed (key TEXT PRIMARY KEY, ts REAL NOT NULL, url TEXT)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS processed_ts ON processed (ts)")
+
+    def has_many(self, keys: Sequence[str]) -> Set[str]:
+        keys = list(dict.fromkeys(keys))
+        cutoff = time.time() - self.ttl_s
+        found: Set[str] = set()
+        with self._lock:
+            for i in range(0, len(keys), SQLITE_BATCH):
+                chunk = keys[i:i + SQLITE_BATCH]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key FROM processed WHERE ts >= ? AND key IN ({marks})", [cutoff, *chunk]
+                )
+                found.update(r[0] for r in rows)
+        return found
+
+    def mark_many(self, keys: Iterable[str], url: Optional[str] = None, ts: Optional[float] = None) -> None:
+        now = ts or time.time()
+        rows = [(k, now, url) for k in dict.fromkeys(keys)]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO processed (key, ts, url) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET ts = excluded.ts, url = COALESCE(excluded.url, processed.url)",
+                    rows,
+                )
+                self._conn.execute("DELETE FROM processed WHERE ts < ?", (now - self.ttl_s,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def processed_urls(self) -> Set[str]:
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT url FROM processed WHERE url IS NOT NULL AND ts >= ?", (cutoff,))
+            return {r[0] for r in rows}
+
+    def compact(self) -> Dict[str, int]:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM processed WHERE ts < ?", (time.time() - self.ttl_s,))
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired": cur.rowcount}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_backends: Dict[tuple, MemoryBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def open_backend(config: dict) -> MemoryBackend:
+    """Backend local ("memory" ou "sqlite") du site, partagé par le processus."""
+    kind = (config.get("memory_backend") or "memory").lower()
+    store = config.get("blob_store_name", "aurore-memory")
+    ttl_days = float(config.get("memory_ttl_days", DEFAULT_TTL_DAYS))
+    if kind == "sqlite":
+        path = config.get("memory_path") or os.path.join(Settings.CACHE_DIR, "memory", f"{store}.sqlite3")
+        ident = (kind, os.path.abspath(path))
+    elif kind == "memory":
+        path, ident = "", (kind, store)
+    else:
+        raise ValueError(f"memory_backend inconnu : {kind!r}")
+    with _backends_lock:
+        backend = _backends.get(ident)
+        if backend is None:
+            backend = _backends[ident] = SQLiteBackend(path, ttl_days) if kind == "sqlite" else InMemoryBackend(ttl_days)
+        return backend
+
+
+def reset() -> None:
+    """Oublie les backends ouverts (tests, benchmarks)."""
+    with _backends_lock:
+        for b in _backends.values():
+            if isinstance(b, SQLiteBackend):
+                b.close()
+        _backends.clear()
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py
+- Spans par étape du pipeline (fetch, resolve, extract, select, summarize,
+  render, publish, index, tweet) : durée, appels HTTP, octets, erreurs,
+  compteurs de cache (hits / misses -> ratio)
+- Attribution par thread : un appel HTTP (http_client) ou un compteur compte
+  pour le span le plus interne du thread qui l'émet ; à la sortie d'un span
+  imbriqué, ses compteurs remontent au parent. Les spans de même nom
+  s'additionnent (count = nombre de passages ; pour resolve/extract, exécutés
+  dans les workers, seconds est un temps cumulé par thread)
+- scope(site) : en mode multi-site, les spans du thread sont rangés sous
+  "site/étape" (étiquette site dans les sorties)
+- Sorties en fin de run :
+  * lignes JSON : AURORE_METRICS_JSONL (défaut CACHE_DIR/metrics/runs.jsonl,
+    conservé entre runs par le cache du workflow ; "-" = stdout), limité aux
+    AURORE_METRICS_KEEP_RUNS derniers runs (défaut 500)
+  * fichier texte Prometheus : AURORE_METRICS_PROM (node_exporter textfile)
+  * résumé de job GitHub Actions : GITHUB_STEP_SUMMARY (AURORE_JOB_SUMMARY=0 pour couper)
+Le trafic des SDK (PyGithub, Gemini, tweepy) n'est compté qu'en durée.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import Settings
+
+
+_local = threading.local()
+_lock = threading.Lock()
+_stages: Dict[str, Counter] = {}
+_totals: Counter = Counter()
+_labels: Dict[str, Any] = {}
+_started = time.time()
+_run_id = uuid.uuid4().hex[:12]
+_hooked = False
+
+
+def _stack() -> List[Counter]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _add(counters: Dict[str, float]) -> None:
+    stack = _stack()
+    if stack:
+        stack[-1].update(counters)
+    with _lock:
+        _totals.update(counters)
+
+
+def _on_http(event: Dict[str, Any]) -> None:
+    status = event.get("status")
+    _add({
+        "http_calls": 1,
+        "http_bytes": int(event.get("bytes") or 0),
+        "http_errors": int(bool(event.get("error")) or (status or 0) >= 400),
+    })
+
+
+def _ensure_hook() -> None:
+    global _hooked
+    if not _hooked:
+        # import différé : requests n'est chargé que si une étape est mesurée
+        from . import http_client
+
+        http_client.add_hook(_on_http)
+        _hooked = True
+
+
+@contextmanager
+def scope(name: str) -> Iterator[None]:
+    """Préfixe les spans ouverts par ce thread (ex. un site en mode --sites all)."""
+    previous = getattr(_local, "scope", None)
+    _local.scope = name
+    try:
+        yield
+    finally:
+        _local.scope = previous
+
+
+@contextmanager
+def span(name: str) -> Iterator[Counter]:
+    """Mesure une étape ; les spans de même nom s'additionnent."""
+    _ensure_hook()
+    prefix = getattr(_local, "scope", None)
+    if prefix:
+        name = f"{prefix}/{name}"
+    frame: Counter = Counter()
+    stack = _stack()
+    stack.append(frame)
+    t0 = time.perf_counter()
+    try:
+        yield frame
+    finally:
+        elapsed = time.perf_counter() - t0
+        stack.pop()
+        if stack:
+            stack[-1].update(frame)
+        with _lock:
+            agg = _stages.setdefault(name, Counter())
+            agg["count"] += 1
+            agg["seconds"] += elapsed
+            agg.update(frame)
+
+
+def incr(key: str, n: int = 1) -> None:
+    """Compteur libre (ex. http_cache_hits) attribué au span courant."""
+    _add({key: n})
+
+
+def annotate(**labels: Any) -> None:
+    """Étiquettes du run (site, outcome…) reprises dans toutes les sorties."""
+    with _lock:
+        _labels.update({k: v for k, v in labels.items() if v is not None})
+
+
+def reset() -> None:
+    global _started, _run_id
+    with _lock:
+        _stages.clear()
+        _totals.clear()
+        _labels.clear()
+        _started = time.time()
+        _run_id = uuid.uuid4().hex[:12]
+
+
+def _with_ratios(counters: Dict[str, float]) -> Dict[str, Any]:
+    out: Dict[str, Any] = dict(counters)
+    for key in list(counters):
+        if key.endswith("_hits"):
+            base = key[: -len("_hits")]
+            seen = counters[key] + counters.get(base + "_misses", 0)
+            if seen:
+                out[base + "_hit_ratio"] = round(counters[key] / seen, 3)
+    if "seconds" in out:
+        out["seconds"] = round(out["seconds"], 4)
+    return out
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        stages = {name: _with_ratios(c) for name, c in _stages.items()}
+        totals = _with_ratios(_totals)
+        labels = dict(_labels)
+    return {
+        "run_id": _run_id,
+        "ts": datetime.fromtimestamp(_started, tz=timezone.utc).isoformat(),
+        "duration_s": round(time.time() - _started, 3),
+        "labels": labels,
+        "stages": stages,
+        "totals": totals,
+    }
+
+
+# -----------------------------
+# Sorties
+# -----------------------------
+DEFAULT_KEEP_RUNS = 500
+
+
+def _jsonl_path() -> str:
+    return os.environ.get("AURORE_METRICS_JSONL") or os.path.join(Settings.CACHE_DIR, "metrics", "runs.jsonl")
+
+
+def write_jsonl(snap: Dict[str, Any], path: Optional[str] = None) -> None:
+    path = path or _jsonl_path()
+    head = {"run_id": snap["run_id"], "ts": snap["ts"], **snap["labels"]}
+    lines = [json.dumps({"type": "span", **head, **_stage_labels(name), **c}, ensure_ascii=False) for name, c in snap["stages"].items()]
+    lines.append(json.dumps({"type": "run", **head, "duration_s": snap["duration_s"], **snap["totals"]}, ensure_ascii=False))
+    if path == "-":
+        print("\n".join(lines))
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    keep = int(os.environ.get("AURORE_METRICS_KEEP_RUNS") or DEFAULT_KEEP_RUNS)
+    # rotation : les lignes des keep - 1 runs précédents, puis celles de ce run
+    runs: Dict[str, List[str]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rid = json.loads(line).get("run_id")
+                except ValueError:
+                    continue
+                runs.setdefault(str(rid), []).append(line.rstrip("\n"))
+    except FileNotFoundError:
+        pass
+    older = list(runs.values())[-(keep - 1):] if keep > 1 else []
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for run_lines in older:
+            f.write("\n".join(run_lines) + "\n")
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+
+def _stage_labels(name: str) -> Dict[str, str]:
+    site, _, stage = name.rpartition("/")
+    return {"site": site, "stage": stage} if site else {"stage": stage}
+
+
+def _prom_escape(value: Any) -> str:
+    # format texte Prometheus : \\, \" et \n dans les valeurs d'étiquettes
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels: Dict[str, Any]) -> str:
+    items = ",".join(f'{k}="{_prom_escape(v)}"' for k, v in sorted(labels.items()) if v not in (None, ""))
+    return "{" + items + "}" if items else ""
+
+
+def prometheus_text(snap: Dict[str, Any]) -> str:
+    base = {"site": snap["labels"].get("site", "")}
+    out = [
+        "# TYPE aurore_stage_duration_seconds gauge",
+        "# TYPE aurore_stage_http_requests gauge",
+        "# TYPE aurore_stage_http_bytes gauge",
+        "# TYPE aurore_stage_cache_hit_ratio gauge",
+    ]
+    for name, c in snap["stages"].items():
+        lb = dict(base, **_stage_labels(name))
+        out.append(f"aurore_stage_duration_seconds{_prom_labels(lb)} {c.get('seconds', 0)}")
+        out.append(f"aurore_stage_http_requests{_prom_labels(lb)} {c.get('http_calls', 0)}")
+        out.append(f"aurore_stage_http_bytes{_prom_labels(lb)} {c.get('http_bytes', 0)}")
+        for key, val in c.items():
+            if key.endswith("_hit_ratio"):
+                out.append(f"aurore_stage_cache_hit_ratio{_prom_labels(dict(lb, cache=key[:-len('_hit_ratio')]))} {val}")
+    run_lb = dict(base, outcome=snap["labels"].get("outcome", ""))
+    out += [
+        "# TYPE aurore_run_duration_seconds gauge",
+        f"aurore_run_duration_seconds{_prom_labels(run_lb)} {snap['duration_s']}",
+        "# TYPE aurore_run_timestamp_seconds gauge",
+        f"aurore_run_timestamp_seconds{_prom_labels(base)} {int(_started)}",
+    ]
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus(snap: Dict[str, Any], path: str) -> None:
+    # écriture atomique : node_exporter ne doit jamais lire un fichier partiel
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(snap))
+    os.replace(tmp, path)
+
+
+def summary_markdown(snap: Dict[str, Any]) -> str:
+    labels = snap["labels"]
+    title = " · ".join(str(labels[k]) for k in ("site", "outcome") if labels.get(k))
+    out = [
+        f"### Aurore {title}".rstrip(),
+        "",
+        f"Durée totale : {snap['duration_s']:.2f} s — {snap['totals'].get('http_calls', 0)} appels HTTP, "
+        f"{snap['totals'].get('http_bytes', 0) / 1024:.0f} Ko",
+        "",
+        "| étape | passages | durée (s) | HTTP | Ko | caches |",
+        "|---|---:|---:|---:|---:|---|",
+    ]
+    for name, c in snap["stages"].items():
+        ratios = ", ".join(f"{k[:-len('_hit_ratio')]} {v:.0%}" for k, v in c.items() if k.endswith("_hit_ratio"))
+        out.append(
+            f"| {name} | {c.get('count', 0)} | {c.get('seconds', 0):.2f} | {c.get('http_calls', 0)} | "
+            f"{c.get('http_bytes', 0) / 1024:.0f} | {ratios} |"
+        )
+    return "\n".join(out) + "\n"
+
+
+def emit(**labels: Any) -> Dict[str, Any]:
+    """Écrit les métriques du run dans les sorties configurées ; ne lève jamais."""
+    annotate(**labels)
+    snap = snapshot()
+    try:
+        write_jsonl(snap)
+    except Exception as e:
+        print(f"WARN métriques JSONL: {e}")
+
+    prom = os.environ.get("AURORE_METRICS_PROM")
+    if prom:
+        try:
+            write_prometheus(snap, prom)
+        except Exception as e:
+            print(f"WARN métriques Prometheus: {e}")
+
+    summary = os.environ.get("GITHUB_STEP_SUMMARY")
+    if summary and os.environ.get("AURORE_JOB_SUMMARY", "1") != "0":
+        try:
+            with open(summary, "a", encoding="utf-8") as f:
+                f.write(summary_markdown(snap))
+        except Exception as e:
+            print(f"WARN résumé de job: {e}")
+    return snap
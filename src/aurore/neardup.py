@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+neardup.py
+- Index persistant des sujets déjà publiés : « une histoire proche a-t-elle
+  été vue ces N derniers jours ? », même si l'URL (autre média) diffère
+- Une seule définition des termes, à l'ajout comme à la requête : le titre
+  (seul champ connu de tous les candidats, GNews compris), sans le suffixe
+  « - Média » de Google News, mots vides retirés, accents ôtés, mots ramenés
+  à leurs 6 premières lettres (pluriels, conjugaisons) ; les sigles (PSG,
+  OM, SNCF) sont gardés à part : deux titres à sigles tous différents ne
+  parlent pas de la même histoire (PSG-Bayern / OM-Bayern)
+- Signature MinHash à une seule permutation (un hash par terme, 64 cases,
+  densification des cases vides) ; LSH par bandes (32 bandes de 2 lignes) :
+  seuls les articles partageant une bande sont comparés, puis le Jaccard
+  exact des termes (hashs conservés avec l'entrée) décide
+- Mémoire bornée (max_entries, les plus anciens partent d'abord) et
+  expiration par âge ; fichier JSON sous CACHE_DIR/neardup/<store>.json
+Réglages par site (config.json) : neardup_days (défaut 3, 0 = désactivé),
+neardup_threshold (Jaccard des termes du titre, défaut 0.3, calé sur les
+titres de benchmarks/fixtures/neardup_stories.json avec
+benchmarks/neardup_bench.py). Métriques : neardup_hits / neardup_misses.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from . import metrics
+from .compress import STOPWORDS
+from .config import Settings
+
+
+NUM_SLOTS = 64
+BANDS = 32
+ROWS = NUM_SLOTS // BANDS
+STEM_CHARS = 6
+DEFAULT_DAYS = 3.0
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_MAX_ENTRIES = 5000
+INDEX_VERSION = 2  # termes du titre seul ; les index v1 (titre + texte) sont ignorés
+
+_EMPTY = 0xFFFFFFFF
+_ACRONYM_BIT = 0x80000000
+_WORD_RE = re.compile(r"\w+")
+# « Titre - Le Monde », « Titre | BFMTV » : suffixe ajouté par Google News
+_OUTLET_RE = re.compile(r"\s+[-–—|]\s+[^-–—|]{2,40}$")
+# mots de titres de presse qui ne disent rien du sujet
+_TITLE_NOISE = frozenset({"direct", "vidéo", "video", "info", "infos", "exclusif", "voici", "faut", "quand", "comment", "ce", "cela"})
+
+Signature = Tuple[int, ...]
+Terms = FrozenSet[int]
+
+
+def _fold(word: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", word) if not unicodedata.combining(c))
+
+
+def title_terms(title: str) -> List[str]:
+    """Termes normalisés du titre (ordre d'apparition, sans doublon) ; sigles en majuscules."""
+    title = _OUTLET_RE.sub("", (title or "").strip())
+    shouting = title.isupper()  # titre tout en capitales : pas de sigles repérables
+    out = []
+    for w in _WORD_RE.findall(title):
+        if w.isdigit():
+            term = w
+        elif not shouting and w.isalpha() and w.isupper() and 2 <= len(w) <= 5:
+            term = _fold(w)
+        elif len(w) < 3 or w.lower() in STOPWORDS or w.lower() in _TITLE_NOISE:
+            continue
+        else:
+            term = _fold(w.lower())[:STEM_CHARS]
+        if term not in out:
+            out.append(term)
+    return out
+
+
+def _h64(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def terms(title: str) -> Terms:
+    """Hashs 32 bits des termes du titre (comparaison exacte) ; bit de poids fort = sigle."""
+    return frozenset(
+        (_h64(t) & 0x7FFFFFFF) | (_ACRONYM_BIT if t.isupper() else 0) for t in title_terms(title)
+    )
+
+
+def jaccard(a: Terms, b: Terms) -> float:
+    """Jaccard des termes ; 0 si les deux titres ont des sigles et aucun en commun."""
+    if not a or not b:
+        return 0.0
+    acr_a = {h for h in a if h & _ACRONYM_BIT}
+    acr_b = {h for h in b if h & _ACRONYM_BIT}
+    if acr_a and acr_b and not acr_a & acr_b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def signature(title: str) -> Optional[Signature]:
+    """MinHash (64 cases, valeurs 32 bits) des termes du titre. None si aucun terme."""
+    slots = [_EMPTY] * NUM_SLOTS
+    for f in title_terms(title):
+        h = _h64(f)
+        i = h % NUM_SLOTS
+        v = (h >> 6) & 0xFFFFFFFE  # _EMPTY reste hors d'atteinte
+        if v < slots[i]:
+            slots[i] = v
+    if all(v == _EMPTY for v in slots):
+        return None
+    # densification : une case vide emprunte la case pleine suivante
+    filled = [i for i, v in enumerate(slots) if v != _EMPTY]
+    for i, v in enumerate(slots):
+        if v == _EMPTY:
+            j = next((k for k in filled if k > i), filled[0])
+            slots[i] = (slots[j] + (i - j) % NUM_SLOTS * 0x9E3779B1) & 0xFFFFFFFE
+    return tuple(slots)
+
+
+def _bands(sig: Signature) -> Iterable[Tuple[int, Signature]]:
+    for b in range(BANDS):
+        yield b, sig[b * ROWS:(b + 1) * ROWS]
+
+
+def _pack(sig: Signature) -> str:
+    return base64.b64encode(struct.pack(f">{NUM_SLOTS}I", *sig)).decode("ascii")
+
+
+def _unpack(s: str) -> Signature:
+    return struct.unpack(f">{NUM_SLOTS}I", base64.b64decode(s))
+
+
+class NearDupIndex:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        days: float = DEFAULT_DAYS,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_s = float(days) * 86400
+        self.threshold = float(threshold)
+        self.max_entries = int(max_entries)
+        # entrées dans l'ordre d'ajout (dict ordonné) : la plus ancienne part en premier
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._buckets: Dict[Tuple[int, Signature], List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _index(self, eid: int, sig: Signature) -> None:
+        for band in _bands(sig):
+            self._buckets.setdefault(band, []).append(eid)
+
+    def _drop(self, eid: int) -> None:
+        entry = self._entries.pop(eid)
+        for band in _bands(entry["sig"]):
+            ids = self._buckets.get(band)
+            if ids is not None:
+                ids.remove(eid)
+                if not ids:
+                    del self._buckets[band]
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Retire les entrées plus vieilles que la fenêtre ; renvoie leur nombre."""
+        cutoff = (now or time.time()) - self.ttl_s
+        with self._lock:
+            old = [eid for eid, e in self._entries.items() if e["ts"] < cutoff]
+            for eid in old:
+                self._drop(eid)
+            self.dirty = self.dirty or bool(old)
+        return len(old)
+
+    def query(self, sig: Optional[Signature], feats: Terms, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Entrée récente la plus proche au-dessus du seuil (avec 'similarity', Jaccard exact), sinon None."""
+        if sig is None:
+            return None
+        cutoff = (now or time.time()) - self.ttl_s
+        best, best_sim = None, 0.0
+        with self._lock:
+            seen = set()
+            for band in _bands(sig):
+                for eid in self._buckets.get(band, ()):
+                    if eid in seen:
+                        continue
+                    seen.add(eid)
+                    e = self._entries[eid]
+                    if e["ts"] < cutoff:
+                        continue
+                    sim = jaccard(feats, e["terms"])
+                    if sim >= self.threshold and sim > best_sim:
+                        best, best_sim = e, sim
+        if best is None:
+            return None
+        return {"url": best["url"], "title": best["title"], "ts": best["ts"], "similarity": best_sim}
+
+    def add(
+        self, sig: Optional[Signature], feats: Terms, url: str = "", title: str = "", ts: Optional[float] = None
+    ) -> None:
+        if sig is None:
+            return
+        with self._lock:
+            eid = self._next_id
+            self._next_id += 1
+            self._entries[eid] = {"sig": tuple(sig), "terms": frozenset(feats), "url": url, "title": title, "ts": ts or time.time()}
+            self._index(eid, self._entries[eid]["sig"])
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            self.dirty = True
+
+    # --- persistance ---
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": INDEX_VERSION,
+                "entries": [
+                    {"sig": _pack(e["sig"]), "terms": sorted(e["terms"]), "url": e["url"], "title": e["title"], "ts": e["ts"]}
+                    for e in self._entries.values()
+                ],
+            }
+
+    def load(self) -> "NearDupIndex":
+        if not self.path:
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self
+        except Exception as e:
+            print(f"WARN neardup (lecture): {e}")
+            return self
+        if data.get("version") != INDEX_VERSION:
+            return self
+        for e in sorted(data.get("entries") or [], key=lambda e: float(e.get("ts") or 0)):
+            try:
+                self.add(_unpack(e["sig"]), frozenset(e["terms"]), e.get("url") or "", e.get("title") or "", float(e["ts"]))
+            except Exception:
+                continue
+        self.expire()
+        self.dirty = False
+        return self
+
+    def save(self) -> None:
+        if not self.path or not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except Exception as e:
+            print(f"WARN neardup (écriture): {e}")
+
+
+def fingerprint(article: Dict[str, Any]) -> Tuple[Optional[Signature], Terms]:
+    """(signature LSH, termes) de l'article : titre seul, pour tous les appelants."""
+    title = article.get("title") or ""
+    return signature(title), terms(title)
+
+
+def check(article: Dict[str, Any], index: Optional[NearDupIndex]) -> Optional[Dict[str, Any]]:
+    """Histoire proche déjà vue pour cet article (ou None) ; compte hits / misses."""
+    if index is None:
+        return None
+    match = index.query(*fingerprint(article))
+    metrics.incr("neardup_hits" if match else "neardup_misses")
+    return match
+
+
+def remember(article: Dict[str, Any], index: Optional[NearDupIndex], ts: Optional[float] = None) -> None:
+    """Enregistre un article publié puis sauvegarde l'index."""
+    if index is None:
+        return
+    index.add(*fingerprint(article), (article.get("url") or "").strip(), article.get("title") or "", ts)
+    index.save()
+
+
+_indexes: Dict[str, NearDupIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(config: Dict[str, Any]) -> Optional[NearDupIndex]:
+    """Index du site (un par blob_store_name, chargé une fois par processus) ; None si désactivé."""
+    days = float(config.get("neardup_days", DEFAULT_DAYS))
+    if days <= 0:
+        return None
+    name = config.get("blob_store_name", "aurore-memory")
+    with _indexes_lock:
+        idx = _indexes.get(name)
+        if idx is None:
+            path = os.path.join(Settings.CACHE_DIR, "neardup", f"{name}.json")
+            threshold = float(config.get("neardup_threshold", DEFAULT_THRESHOLD))
+            idx = _indexes[name] = NearDupIndex(path, days=days, threshold=threshold).load()
+        return idx
@@ -2,27 +2,34 @@
 """
 news_fetch.py
 - Récupère des articles via RSS Google News (search OU topic)
-- Résout les liens Google News vers l'URL finale
+- Résout les liens Google News vers l'URL finale (table persistante, redirects.py)
 - Extrait un texte lisible depuis la page (HTML -> texte)
+- Enrichissement concurrent des candidats (pool de threads, plafond par hôte,
+  échéance globale)
+- Pipeline paresseux (iter_candidates) : tri + dédup avant tout téléchargement
 """
 from __future__ import annotations
 
 import time
 import html
-import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Callable, Iterator
 from urllib.parse import urlencode, quote, urlparse, parse_qs
 
-import requests
 import feedparser
-from bs4 import BeautifulSoup
 
+from . import canonical, extract, httpcache, metrics, pages, redirects
 
-UA = (
-    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-    "(KHTML, like Gecko) Chrome/123.0 Safari/537.36"
-)
+# Enrichissement (résolution + corps) : valeurs par défaut, surchargeables
+# par site via config.json (enrich_workers / enrich_per_host / enrich_deadline).
+ENRICH_WORKERS = 8
+ENRICH_PER_HOST = 2
+ENRICH_DEADLINE = 30.0
+# Pipeline paresseux : nombre de candidats téléchargés en parallèle par fenêtre
+LAZY_WINDOW = 2
 
 
 def _iso(dt_struct) -> str:
@@ -38,7 +45,8 @@ def _final_url(url: str, timeout: float = 10.0) -> str:
     """
     Résout les redirections Google News vers la source d'origine.
     - Si le lien contient ?url=, on renvoie ce param.
-    - Sinon on suit les redirections HTTP.
+    - Sinon table persistante (redirects.py), puis redirections HTTP suivies
+      jusqu'au premier saut hors de Google, sans télécharger la page.
     """
     if not url:
         return url
@@ -52,47 +60,23 @@ def _final_url(url: str, timeout: float = 10.0) -> str:
         pass
 
     try:
-        with requests.get(url, headers={"User-Agent": UA}, timeout=timeout, allow_redirects=True) as r:
-            r.raise_for_status()
-            return r.url
+        return redirects.resolve_cached(url, timeout=timeout)
     except Exception:
         return url
 
 
 def _extract_text_from_html(html_str: str) -> str:
     """Extraction simple : priorité aux <article>, sinon concat <p>."""
-    soup = BeautifulSoup(html_str, "html.parser")
-
-    for tag in soup(["script", "style", "noscript", "svg", "picture", "source"]):
-        tag.decompose()
-
-    # zone article prioritaire
-    main = soup.find("article")
-    if not main:
-        # fallback : gros container de contenu possible
-        main = soup.find("main") or soup.find("div", attrs={"role": "main"}) or soup
+    return extract.extract_text(html_str)
 
-    # récup paragraphes
-    paras = []
-    for p in main.find_all("p"):
-        txt = p.get_text(" ", strip=True)
-        if txt and len(txt) > 30:
-            paras.append(txt)
 
-    text = "\n\n".join(paras).strip()
-
-    # mini nettoyage
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text
+def _fetch_article_page(url: str, timeout: float = 12.0) -> Optional[pages.PageRecord]:
+    return pages.fetch_page(url, timeout=timeout)
 
 
 def _fetch_article_body(url: str, timeout: float = 12.0) -> str:
-    try:
-        with requests.get(url, headers={"User-Agent": UA}, timeout=timeout) as r:
-            r.raise_for_status()
-            return _extract_text_from_html(r.text)
-    except Exception:
-        return ""
+    page = _fetch_article_page(url, timeout=timeout)
+    return (page or {}).get("text") or ""
 
 
 def _domain(u: str) -> str:
@@ -102,6 +86,100 @@ def _domain(u: str) -> str:
         return ""
 
 
+class _HostLimiter:
+    """Limite le nombre de requêtes simultanées vers un même hôte."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, int(per_host))
+        self._lock = threading.Lock()
+        self._sems: Dict[str, threading.BoundedSemaphore] = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        host = _domain(url).lower()
+        with self._lock:
+            sem = self._sems.get(host)
+            if sem is None:
+                sem = self._sems[host] = threading.BoundedSemaphore(self.per_host)
+        with sem:
+            yield
+
+
+def _remaining(deadline: float, cap: float) -> float:
+    return max(0.0, min(cap, deadline - time.monotonic()))
+
+
+def _enrich_one(
+    link: str,
+    limiter: _HostLimiter,
+    deadline: float,
+    skip: Optional[Callable[[str], bool]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Résout le lien puis télécharge le corps, sans dépasser l'échéance."""
+    timeout = _remaining(deadline, 10.0)
+    if timeout <= 0:
+        return None
+    with limiter.slot(link), metrics.span("resolve"):
+        fin = _final_url(link, timeout=timeout)
+    if skip and skip(fin):
+        return {"url": fin, "content": "", "page": None, "skipped": True}
+
+    timeout = _remaining(deadline, 12.0)
+    if timeout <= 0:
+        return {"url": fin, "content": "", "page": None}
+    with limiter.slot(fin), metrics.span("extract"):
+        page = _fetch_article_page(fin, timeout=timeout)
+    return {"url": fin, "content": (page or {}).get("text") or "", "page": page}
+
+
+def _entry_fallback(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {"url": entry["link"], "content": "", "page": None}
+
+
+def _enrich_entries(
+    entries: List[Dict[str, Any]],
+    workers: int = ENRICH_WORKERS,
+    per_host: int = ENRICH_PER_HOST,
+    deadline_s: float = ENRICH_DEADLINE,
+    skip: Optional[Callable[[str], bool]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Enrichit les entrées en parallèle et renvoie les résultats dans l'ordre
+    des entrées. Une entrée qui n'a pas fini avant l'échéance garde son lien
+    RSS et un contenu vide (le résumé RSS prendra le relais).
+    `skip(url_finale)` permet d'abandonner une entrée avant son téléchargement.
+    """
+    if not entries:
+        return []
+
+    deadline = time.monotonic() + float(deadline_s)
+    limiter = _HostLimiter(per_host)
+    pool = ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(entries))))
+    try:
+        futures = [pool.submit(_enrich_one, e["link"], limiter, deadline, skip) for e in entries]
+        wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+
+        results: List[Dict[str, Any]] = []
+        late = 0
+        for e, fut in zip(entries, futures):
+            res = None
+            if fut.done() and not fut.cancelled():
+                try:
+                    res = fut.result()
+                except Exception:
+                    res = None
+            else:
+                late += 1
+            results.append(res or _entry_fallback(e))
+        if late:
+            print(f"WARN enrichissement: {late} entrée(s) hors délai, résumé RSS utilisé.")
+        return results
+    finally:
+        # on n'attend pas les retardataires : leurs timeouts réseau les bornent
+        pool.shutdown(wait=False, cancel_futures=True)
+        redirects.default_cache().save()
+
+
 def _build_rss_url_from_query(query: str, lang: str, country: str) -> str:
     # query arrive depuis config.json : les guillemets sont déjà échappés pour le JSON.
     q = query
@@ -123,6 +201,75 @@ def _build_rss_url_from_topic(topic: str, lang: str, country: str) -> str:
     )
 
 
+def _rss_url(vcfg: Dict[str, Any]) -> Optional[str]:
+    if vcfg.get("rss_url"):
+        # flux explicite (autre agrégateur, stand-in local des benchmarks)
+        return vcfg["rss_url"]
+    lang = (vcfg.get("gnews_lang") or "fr").lower()
+    country = (vcfg.get("gnews_country") or "FR").upper()
+    if vcfg.get("gnews_query"):
+        return _build_rss_url_from_query(vcfg["gnews_query"], lang, country)
+    if vcfg.get("gnews_topic"):
+        return _build_rss_url_from_topic(vcfg["gnews_topic"], lang, country)
+    return None
+
+
+def _rss_entries(vcfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Entrées RSS normalisées, dans l'ordre du flux (aucune page téléchargée)."""
+    rss_url = _rss_url(vcfg)
+    if not rss_url:
+        # Rien de configuré
+        return []
+
+    try:
+        with metrics.span("fetch"):
+            r = httpcache.cached_get(rss_url, timeout=15)
+            r.raise_for_status()
+            parsed = feedparser.parse(r.content)
+    except Exception as e:
+        print(f"WARN flux RSS: {e}")
+        return []
+
+    out: List[Dict[str, Any]] = []
+    for e in parsed.get("entries") or []:
+        link = (e.get("link") or "").strip()
+        title = html.unescape((e.get("title") or "").strip())
+        if not link or not title:
+            continue
+        pp = e.get("published_parsed")
+        out.append(
+            {
+                "link": link,
+                "title": title,
+                "publishedAt": _iso(pp),
+                "ts": time.mktime(pp) if pp else 0.0,
+                "summary": html.unescape((e.get("summary") or "").strip()),
+            }
+        )
+    return out
+
+
+def _to_item(e: Dict[str, Any], res: Dict[str, Any]) -> Dict[str, Any]:
+    fin = res["url"]
+    page = res.get("page") or {}
+    return {
+        "url": fin,
+        "title": e["title"],
+        "content": res["content"] or e["summary"],
+        "publishedAt": e["publishedAt"],
+        "source": _domain(fin),
+        "image": page.get("image"),
+        "canonical": page.get("canonical"),
+    }
+
+
+def _enrich_kwargs(vcfg: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "workers": int(vcfg.get("enrich_workers") or ENRICH_WORKERS),
+        "per_host": int(vcfg.get("enrich_per_host") or ENRICH_PER_HOST),
+    }
+
+
 def get_news_from_api(vcfg: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Retourne une liste d'articles normalisés:
@@ -132,52 +279,74 @@ def get_news_from_api(vcfg: Dict[str, Any]) -> List[Dict[str, Any]]:
         "title": "...",
         "content": "...",           # texte long extrait
         "publishedAt": "ISO8601",
-        "source": "domaine"
+        "source": "domaine",
+        "image": "..." | None,      # og:image / twitter:image de la page
+        "canonical": "..." | None   # <link rel=canonical> de la page
       },
       ...
     ]
     """
-    lang = (vcfg.get("gnews_lang") or "fr").lower()
-    country = (vcfg.get("gnews_country") or "FR").upper()
     max_results = int(vcfg.get("max_results") or 8)
+    selected = _rss_entries(vcfg)[:max_results]
+    enriched = _enrich_entries(
+        selected,
+        deadline_s=float(vcfg.get("enrich_deadline") or ENRICH_DEADLINE),
+        **_enrich_kwargs(vcfg),
+    )
+    return [_to_item(e, res) for e, res in zip(selected, enriched)]
 
-    rss_url: Optional[str] = None
-    if vcfg.get("gnews_query"):
-        rss_url = _build_rss_url_from_query(vcfg["gnews_query"], lang, country)
-    elif vcfg.get("gnews_topic"):
-        rss_url = _build_rss_url_from_topic(vcfg["gnews_topic"], lang, country)
-
-    items: List[Dict[str, Any]] = []
-
-    if not rss_url:
-        # Rien de configuré
-        return items
-
-    parsed = feedparser.parse(rss_url)
-    entries = parsed.get("entries") or []
-    if not entries:
-        return items
 
-    for e in entries[:max_results]:
-        link = (e.get("link") or "").strip()
-        title = html.unescape((e.get("title") or "").strip())
-        published = _iso(e.get("published_parsed"))
+def _cheap_url(link: str) -> str:
+    """
+    URL source lisible sans requête : param ?url= des liens Google News, ou
+    résolution d'un run précédent (redirects.py) ; sinon le lien RSS.
+    """
+    try:
+        qs = parse_qs(urlparse(link).query or "")
+        if qs.get("url"):
+            return qs["url"][0]
+    except Exception:
+        pass
+    return redirects.default_cache().peek(link) or link
 
-        if not link or not title:
-            continue
 
-        fin = _final_url(link)
-        text = _fetch_article_body(fin)
-        src = _domain(fin)
+def iter_candidates(
+    vcfg: Dict[str, Any],
+    seen_hashes: Optional[Set[str]] = None,
+    is_seen: Optional[Callable[[str], bool]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Variante paresseuse de get_news_from_api :
+    1. tri des entrées RSS par published_parsed (récent d'abord)
+    2. élimination des URLs déjà vues à partir du lien RSS (aucune requête)
+    3. résolution + téléchargement par petites fenêtres, dans l'ordre du tri,
+       en ré-écartant les URLs vues une fois résolues (avant le corps)
+    Le consommateur s'arrête au premier candidat publiable : les entrées
+    suivantes ne sont jamais téléchargées.
+    """
+    seen_hashes = seen_hashes or set()
 
-        items.append(
-            {
-                "url": fin,
-                "title": title,
-                "content": text or (html.unescape((e.get("summary") or "").strip())),
-                "publishedAt": published,
-                "source": src,
-            }
-        )
+    def _known(u: str) -> bool:
+        # mêmes clés que selection.pick_first_publishable (formats historiques compris)
+        if seen_hashes and not seen_hashes.isdisjoint(canonical.lookup_keys(u)):
+            return True
+        return bool(is_seen and is_seen(u))
 
-    return items
+    max_results = int(vcfg.get("max_results") or 8)
+    window = max(1, int(vcfg.get("lazy_window") or LAZY_WINDOW))
+    deadline = time.monotonic() + float(vcfg.get("enrich_deadline") or ENRICH_DEADLINE)
+
+    entries = sorted(_rss_entries(vcfg), key=lambda e: e["ts"], reverse=True)
+    fresh = [e for e in entries if not _known(_cheap_url(e["link"]))][:max_results]
+
+    for i in range(0, len(fresh), window):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print("WARN enrichissement: échéance atteinte, candidats restants ignorés.")
+            return
+        batch = fresh[i : i + window]
+        enriched = _enrich_entries(batch, deadline_s=remaining, skip=_known, **_enrich_kwargs(vcfg))
+        for e, res in zip(batch, enriched):
+            if res.get("skipped"):
+                continue
+            yield _to_item(e, res)
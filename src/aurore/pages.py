@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+pages.py
+- Télécharge une page source une seule fois et en tire un enregistrement :
+  texte, image og/twitter, lien canonique, date de publication, titre
+- Cache limité au run : image_search relit l'enregistrement sans refaire de GET
+- Sur disque, via httpcache : un 304 relit l'enregistrement sans ré-extraire
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional
+
+from . import extract, httpcache, metrics
+
+
+PageRecord = extract.PageRecord
+
+# à incrémenter quand l'extraction change : invalide les enregistrements sur disque
+RECORD_KIND = "page-v4"
+
+_cache: Dict[str, PageRecord] = {}
+_lock = threading.Lock()
+
+
+def parse_page(html_str: str, url: str = "") -> PageRecord:
+    """Un seul parse (moteur de extract.py) : texte et métadonnées ensemble."""
+    return extract.extract_page(html_str, url)
+
+
+def get_cached(url: str) -> Optional[PageRecord]:
+    with _lock:
+        return _cache.get(url)
+
+
+def remember(record: PageRecord, *urls: str) -> None:
+    with _lock:
+        for u in urls:
+            if u:
+                _cache[u] = record
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
+
+
+def fetch_page(url: str, timeout: float = 12.0) -> Optional[PageRecord]:
+    """Renvoie l'enregistrement de la page (depuis le cache du run si possible)."""
+    if not url:
+        return None
+    cached = get_cached(url)
+    if cached is not None:
+        metrics.incr("page_cache_hits")
+        return cached
+    metrics.incr("page_cache_misses")
+    cache = httpcache.default_cache()
+    try:
+        r = cache.get(url, timeout=timeout)
+        r.raise_for_status()
+    except Exception as e:
+        print(f"WARN page {url}: {e}")
+        return None
+
+    record = cache.load_derived(r.body_hash, RECORD_KIND) if r.not_modified else None
+    if record is None:
+        record = parse_page(r.text, r.url or url)
+        cache.save_derived(r.body_hash, RECORD_KIND, record)
+    remember(record, url, record["url"])
+    return record
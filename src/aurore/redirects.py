@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+redirects.py
+- Résolution des liens Google News sans télécharger la page de l'éditeur :
+  les redirections sont suivies une à une (allow_redirects=False, corps non
+  lu) et la résolution s'arrête au premier saut hors de Google
+- Table persistante lien Google News -> URL finale, avec TTL : les liens qui
+  reviennent d'un run à l'autre dans le flux ne coûtent plus aucune requête
+- Fichier JSON unique sous CACHE_DIR (à côté du cache HTTP), borné en nombre
+  d'entrées (les plus anciennes partent d'abord)
+- Enregistrée après l'enrichissement, puis de nouveau en fin de run (flush,
+  et à la sortie du processus, une fois les workers retardataires terminés)
+Réglages : AURORE_REDIRECT_TTL_H (défaut 72 h), AURORE_REDIRECT_MAX (défaut 5000).
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urljoin, urlparse
+
+from . import http_client, metrics
+from .config import Settings
+
+
+DEFAULT_TTL_S = 72 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+MAX_HOPS = 6
+GOOGLE_HOSTS = ("google.com", "google.fr", "googleusercontent.com", "gstatic.com")
+
+
+def is_google(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == h or host.endswith("." + h) for h in GOOGLE_HOSTS) or host.startswith("news.google.")
+
+
+def resolve(link: str, timeout: float = 10.0, max_hops: int = MAX_HOPS) -> str:
+    """
+    Suit les redirections tant qu'elles restent chez Google ; renvoie la
+    première URL hors Google sans la demander. Un saut qui répond sans
+    rediriger est l'URL finale (son corps n'est pas lu).
+    """
+    url = link
+    for _ in range(max_hops):
+        with http_client.get(url, timeout=timeout, allow_redirects=False, stream=True) as r:
+            location = r.headers.get("Location") if r.is_redirect else None
+            if not location:
+                r.raise_for_status()
+                return url
+        url = urljoin(url, location)
+        if not is_google(url):
+            return url
+    return url
+
+
+class RedirectCache:
+    def __init__(self, path: str, ttl_s: float = DEFAULT_TTL_S, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_s = float(ttl_s)
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        # appelé sous verrou
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = dict(json.load(f))
+            except FileNotFoundError:
+                self._entries = {}
+            except Exception as e:
+                print(f"WARN redirects (lecture): {e}")
+                self._entries = {}
+        return self._entries
+
+    def peek(self, link: str) -> Optional[str]:
+        """Comme get(), sans compter de hit / miss (pré-filtrage)."""
+        return self.get(link, count=False)
+
+    def get(self, link: str, count: bool = True) -> Optional[str]:
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(link)
+            if entry is not None and time.time() - float(entry.get("ts") or 0) > self.ttl_s:
+                del entries[link]
+                self._dirty = True
+                entry = None
+        if count:
+            metrics.incr("redirect_cache_hits" if entry else "redirect_cache_misses")
+        return entry["url"] if entry else None
+
+    def put(self, link: str, url: str) -> None:
+        with self._lock:
+            entries = self._load()
+            entries.pop(link, None)  # réinséré en fin : ordre = ancienneté
+            entries[link] = {"url": url, "ts": time.time()}
+            while len(entries) > self.max_entries:
+                entries.pop(next(iter(entries)))
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            now = time.time()
+            live = {k: v for k, v in self._entries.items() if now - float(v.get("ts") or 0) <= self.ttl_s}
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(live, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+                self._entries = live
+                self._dirty = False
+            except Exception as e:
+                print(f"WARN redirects (écriture): {e}")
+
+
+_default: Optional[RedirectCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> RedirectCache:
+    """Table du processus : Settings.CACHE_DIR/redirects.json."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                ttl_h = float(os.environ.get("AURORE_REDIRECT_TTL_H", "72"))
+                max_entries = int(os.environ.get("AURORE_REDIRECT_MAX", str(DEFAULT_MAX_ENTRIES)))
+                _default = RedirectCache(os.path.join(Settings.CACHE_DIR, "redirects.json"), ttl_s=ttl_h * 3600, max_entries=max_entries)
+                # les workers d'enrichissement sont joints avant les handlers atexit
+                atexit.register(flush)
+    return _default
+
+
+def flush() -> None:
+    """Enregistre la table du processus si elle a reçu des entrées depuis la dernière écriture."""
+    if _default is not None:
+        _default.save()
+
+
+def resolve_cached(link: str, timeout: float = 10.0) -> str:
+    """URL finale depuis la table, sinon resolve() puis mémorisation."""
+    cache = default_cache()
+    hit = cache.get(link)
+    if hit:
+        return hit
+    url = resolve(link, timeout=timeout)
+    if url and url != link:
+        cache.put(link, url)
+    return url
@@ -1,5 +1,11 @@
 import datetime as dt
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+from . import lazy
+from .config import Settings
 from .utils import canonical_slug
 import locale
 
@@ -8,9 +14,84 @@ try:
 except locale.Error:
     locale.setlocale(locale.LC_TIME, '')
 
+jinja2 = lazy.module("jinja2")
+
+# Environnements partagés par (dossier de templates, options) : chaque template
+# n'est compilé qu'une fois par processus, et le bytecode est conservé sur disque
+# (CACHE_DIR/jinja) d'un run à l'autre.
+_envs: Dict[Tuple, "jinja2.Environment"] = {}
+_envs_lock = threading.Lock()
+
+# Profil du pipeline (__main__.jinja_env) : templates du paquet, blocs compactés
+PIPELINE_TEMPLATES = os.path.join(os.path.dirname(__file__), "templates")
+PIPELINE_OPTIONS: Dict[str, Any] = {"trim_blocks": True, "lstrip_blocks": True}
+
+
+def _env_key(tpl_dir: str, autoescape: bool, options: Dict[str, Any]) -> Tuple:
+    return (os.path.abspath(tpl_dir), bool(autoescape), tuple(sorted(options.items())))
+
+
+def _bytecode_cache(key: Tuple) -> "jinja2.FileSystemBytecodeCache":
+    # Un dossier par jeu d'options : la clé de cache Jinja ne dépend que du
+    # template, pas de trim_blocks / autoescape.
+    profile = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+    directory = os.path.join(Settings.CACHE_DIR, "jinja", profile)
+    os.makedirs(directory, exist_ok=True)
+    return jinja2.FileSystemBytecodeCache(directory)
+
+
+def get_env(tpl_dir: str = "templates", autoescape: bool = True, **options: Any) -> "jinja2.Environment":
+    """Environnement Jinja partagé pour ce dossier et ces options."""
+    key = _env_key(tpl_dir, autoescape, options)
+    env = _envs.get(key)
+    if env is None:
+        with _envs_lock:
+            env = _envs.get(key)
+            if env is None:
+                try:
+                    bcc = _bytecode_cache(key)
+                except OSError as e:
+                    print(f"WARN cache bytecode Jinja: {e}")
+                    bcc = None
+                env = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(tpl_dir),
+                    autoescape=jinja2.select_autoescape(["html", "xml"]) if autoescape else False,
+                    bytecode_cache=bcc,
+                    **options,
+                )
+                _envs[key] = env
+    return env
+
+
+def precompile(tpl_dir: str = "templates", autoescape: bool = True, **options: Any) -> List[str]:
+    """Compile à l'avance tous les templates *.j2 (mémoire + bytecode sur disque)."""
+    env = get_env(tpl_dir, autoescape, **options)
+    names = env.list_templates(filter_func=lambda n: n.endswith(".j2"))
+    for name in names:
+        env.get_template(name)
+    return names
+
+
+def render_many(
+    jobs: Iterable[Tuple[str, Dict[str, Any]]],
+    tpl_dir: str = "templates",
+    autoescape: bool = True,
+    **options: Any,
+) -> List[str]:
+    """Rend une série de (template, contexte) avec un seul environnement chaud."""
+    env = get_env(tpl_dir, autoescape, **options)
+    templates = {}
+    out = []
+    for name, context in jobs:
+        tpl = templates.get(name)
+        if tpl is None:
+            tpl = templates[name] = env.get_template(name)
+        out.append(tpl.render(**context))
+    return out
+
+
 def render_article(tpl_dir: str, title: str, body_html: str, sources: list[str], category: str, bullets=None, meta=None, dek=None, image=None):
-    env = Environment(loader=FileSystemLoader(tpl_dir), autoescape=select_autoescape(["html", "xml"]))
-    tpl = env.get_template("article.html.j2")
+    tpl = get_env(tpl_dir).get_template("article.html.j2")
     now = dt.datetime.now(dt.timezone.utc)
     slug = canonical_slug(title)
     
@@ -30,3 +111,25 @@ def render_article(tpl_dir: str, title: str, body_html: str, sources: list[str],
     
     path = f"article/{slug}.html"
     return path, html, slug
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Précompile les templates Jinja (cache bytecode).")
+    parser.add_argument("--templates", default="templates")
+    args = parser.parse_args()
+    # profils de production : github_pr (sans autoescape), render_article, __main__
+    profiles = [
+        (args.templates, False, {}),
+        (args.templates, True, {}),
+        (PIPELINE_TEMPLATES, True, PIPELINE_OPTIONS),
+    ]
+    count = 0
+    for tpl_dir, autoescape, options in profiles:
+        count += len(precompile(tpl_dir, autoescape, **options))
+    print(f"{count} templates précompilés ({len(profiles)} profils) dans {os.path.join(Settings.CACHE_DIR, 'jinja')}")
+
+
+if __name__ == "__main__":
+    main()
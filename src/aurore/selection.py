@@ -1,50 +1,28 @@
 # -*- coding: utf-8 -*-
 """
 selection.py
-- Normalisation d'URL + hash
+- Hash d'URL (canonical.py : forme canonique partagée avec dedup)
 - Choix de l'article le plus récent non traité avec seuil de longueur souple
+- Variante paresseuse : premier candidat publiable d'un itérable trié
+- Option near_dups (neardup.py) : écarte aussi les histoires proches d'un
+  article publié récemment, même sous une autre URL
 """
 from __future__ import annotations
 
 import os
-import hashlib
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple, Set
-from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+from typing import Dict, Any, Optional, Tuple, Set, Iterable
 
+from . import canonical, neardup
 
-IGNORED_PARAMS = {
-    "utm_source",
-    "utm_medium",
-    "utm_campaign",
-    "utm_term",
-    "utm_content",
-    "gclid",
-    "fbclid",
-}
 
-
-def normalize_url(u: str) -> str:
-    try:
-        p = urlparse(u)
-        scheme = p.scheme.lower()
-        netloc = p.netloc.lower()
-
-        # tri des query params + suppression tracking
-        q = [(k, v) for (k, v) in parse_qsl(p.query, keep_blank_values=True) if k not in IGNORED_PARAMS]
-        q.sort()
-        query = urlencode(q, doseq=True)
-
-        # sans fragment
-        fragless = (scheme, netloc, p.path, p.params, query, "")
-        return urlunparse(fragless)
-    except Exception:
-        return u
+# Normalisation et clé : canonical.py (forme unique, partagée avec dedup)
+IGNORED_PARAMS = canonical.TRACKING_PARAMS
+normalize_url = canonical.normalize_url
 
 
-def hash_url(u: str) -> str:
-    n = normalize_url(u)
-    return hashlib.sha256(n.encode("utf-8")).hexdigest()
+def hash_url(u: str, canonical_link: Optional[str] = None) -> str:
+    return canonical.url_key(u, canonical_link)
 
 
 def _parse_iso(dt: str) -> float:
@@ -54,54 +32,80 @@ def _parse_iso(dt: str) -> float:
         return 0.0
 
 
+def _min_chars(min_chars: Optional[int]) -> int:
+    # seuil dynamique
+    if min_chars is not None:
+        return min_chars
+    try:
+        return int(os.getenv("MIN_CHARS", "280"))
+    except Exception:
+        return 280
+
+
+def is_publishable(content: str, min_chars: int) -> bool:
+    content = (content or "").strip()
+    if not content:
+        return False
+
+    # compactage léger
+    content_compact = " ".join(content.split())
+    length = len(content_compact)
+
+    # règle principale
+    if length >= min_chars:
+        return True
+
+    # règles bonus: texte pertinent même s'il est court
+    words = content_compact.split()
+    paras = [p for p in content.split("\n") if p.strip()]
+    return len(words) >= 120 or len(paras) >= 3
+
+
+def pick_first_publishable(
+    candidates: Iterable[Dict[str, Any]],
+    seen_hashes: Set[str],
+    min_chars: Optional[int] = None,
+    near_dups: Optional[neardup.NearDupIndex] = None,
+) -> Optional[Tuple[Dict[str, Any], str]]:
+    """
+    Consomme les candidats dans l'ordre fourni et s'arrête au premier
+    publiable : avec un générateur (news_fetch.iter_candidates), les
+    candidats suivants ne sont jamais téléchargés.
+    """
+    min_chars = _min_chars(min_chars)
+    for a in candidates:
+        u = (a.get("url") or "").strip()
+        if not u:
+            continue
+        h = hash_url(u, a.get("canonical"))
+        if seen_hashes and not seen_hashes.isdisjoint(canonical.lookup_keys(u, a.get("canonical"))):
+            continue
+        if not is_publishable(a.get("content") or "", min_chars):
+            continue
+        match = neardup.check(a, near_dups)
+        if match:
+            print(f"Histoire proche déjà publiée ({match['similarity']:.2f}) : {match['title'] or match['url']}")
+            continue
+        return a, h
+    return None
+
+
 def pick_freshest_unique(
     articles: list[Dict[str, Any]],
     seen_hashes: Set[str],
     min_chars: Optional[int] = None,
+    near_dups: Optional[neardup.NearDupIndex] = None,
 ) -> Optional[Tuple[Dict[str, Any], str]]:
     """
     Tri par date décroissante, retourne le premier article:
     - pas encore vu (hash URL)
     - contenu suffisant selon seuil souple
+    - sans histoire proche publiée récemment (si near_dups, cf. neardup.index_for)
     Le seuil peut être forcé via la variable d'env MIN_CHARS.
     """
-    # seuil dynamique
-    if min_chars is None:
-        try:
-            min_chars = int(os.getenv("MIN_CHARS", "280"))
-        except Exception:
-            min_chars = 280
-
     if not articles:
         return None
 
     # tri par date (récent d'abord)
     arts = sorted(articles, key=lambda a: _parse_iso(a.get("publishedAt", "")), reverse=True)
-
-    for a in arts:
-        u = (a.get("url") or "").strip()
-        if not u:
-            continue
-        h = hash_url(u)
-        if h in seen_hashes:
-            continue
-
-        content = (a.get("content") or "").strip()
-        if not content:
-            continue
-
-        # compactage léger
-        content_compact = " ".join(content.split())
-        length = len(content_compact)
-
-        # règle principale
-        if length >= min_chars:
-            return a, h
-
-        # règles bonus: texte pertinent même s'il est court
-        words = content_compact.split()
-        paras = [p for p in content.split("\n") if p.strip()]
-        if len(words) >= 120 or len(paras) >= 3:
-            return a, h
-
-    return None
+    return pick_first_publishable(arts, seen_hashes, min_chars, near_dups)
@@ -7,9 +7,11 @@ summarize.py
 from __future__ import annotations
 
 import re
-from typing import Tuple, Union, List, Any, Dict
+from typing import Tuple, Union, List, Any, Dict, Optional
 import os
 
+from . import compress, llm, llmcache, metrics
+
 
 def _join_prompt(prompt_cfg: Union[str, List[str]]) -> str:
     if isinstance(prompt_cfg, list):
@@ -49,40 +51,79 @@ def _first_lines_as_fallback(article_text: str) -> Tuple[str, str]:
     return title, summary
 
 
-def summarize_article(article_text: str, prompt_cfg: Union[str, List[str]]) -> Tuple[str, str]:
+SUMMARY_MODEL = "gemini-1.5-flash"
+SUMMARY_CONFIG = {
+    "temperature": 0.4,
+    "top_p": 0.95,
+    "max_output_tokens": 700,
+    "response_mime_type": "text/plain",
+}
+
+
+def summarize_article(
+    article_text: str,
+    prompt_cfg: Union[str, List[str]],
+    token_budget: Optional[int] = None,
+    cfg: Optional[Dict] = None,
+) -> Tuple[str, str]:
     """
     Retourne (title, summary).
+    - Texte source ramené au budget de tokens du site (compress.py) avant Gemini :
+      token_budget s'il est donné, sinon source_token_budget de cfg (config du site)
+    - Cache disque (llmcache) : même modèle, config, prompt et texte => pas de nouvel appel
     - Essaye Gemini si GEMINI_API_KEY est présent
     - Sinon fallback local
     """
-    key = os.environ.get("GEMINI_API_KEY")
-    if not key:
-        return _first_lines_as_fallback(article_text)
-
-    try:
-        import google.generativeai as genai
-
-        genai.configure(api_key=key)
-        model = genai.GenerativeModel(
-            "gemini-1.5-flash",
-            generation_config={
-                "temperature": 0.4,
-                "top_p": 0.95,
-                "max_output_tokens": 700,
-                "response_mime_type": "text/plain",
-            },
-        )
-
-        sys_prompt = _join_prompt(prompt_cfg)
-        prompt = f"{sys_prompt}\n\n<TEXTE_SOURCE>\n{article_text}\n</TEXTE_SOURCE>"
-        resp = model.generate_content(prompt)
-        out = (getattr(resp, "text", None) or "").strip()
-        title, summary = _extract_tags(out)
-        if not (title and summary):
-            # fallback si le modèle n'a pas respecté le format
-            return _first_lines_as_fallback(article_text)
-        return title, summary
-
-    except Exception as e:
-        print(f"WARN summarize (Gemini): {e}")
-        return _first_lines_as_fallback(article_text)
+    return summarize_many([article_text], prompt_cfg, token_budget=token_budget, cfg=cfg)[0]
+
+
+def summarize_many(
+    article_texts: List[str],
+    prompt_cfg: Union[str, List[str]],
+    deadline_s: Optional[float] = None,
+    token_budget: Optional[int] = None,
+    cfg: Optional[Dict] = None,
+) -> List[Tuple[str, str]]:
+    """
+    (title, summary) pour chaque texte, dans l'ordre. Les textes sont d'abord
+    compressés au budget (token_budget, sinon compress.budget_for(cfg) ;
+    0 = texte entier), puis ceux absents du cache sont résumés en parallèle
+    (llm.py : débit et concurrence bornés) ; un appel en échec ou hors délai
+    retombe sur le fallback local, calculé sur le texte d'origine.
+    """
+    if not os.environ.get("GEMINI_API_KEY"):
+        return [_first_lines_as_fallback(t) for t in article_texts]
+
+    budget = compress.budget_for(cfg) if token_budget is None else token_budget
+    # la clé de cache porte sur le texte compressé : changer le budget régénère
+    sources = [compress.compress_for_prompt(t, budget) for t in article_texts]
+    sys_prompt = _join_prompt(prompt_cfg)
+    cache = llmcache.default_cache()
+    keys = [llmcache.make_key(SUMMARY_MODEL, SUMMARY_CONFIG, sys_prompt, t) for t in sources]
+    results: List[Optional[Tuple[str, str]]] = [None] * len(article_texts)
+    todo: List[int] = []
+    for i, k in enumerate(keys):
+        cached = cache.get(k)
+        if cached and cached.get("title") and cached.get("summary"):
+            results[i] = (cached["title"], cached["summary"])
+        else:
+            todo.append(i)
+
+    if todo:
+        prompts = [f"{sys_prompt}\n\n<TEXTE_SOURCE>\n{sources[i]}\n</TEXTE_SOURCE>" for i in todo]
+        try:
+            with metrics.span("summarize"):
+                outs = llm.generate_many(SUMMARY_MODEL, SUMMARY_CONFIG, prompts, deadline_s)
+        except Exception as e:
+            outs = [e] * len(todo)
+        for i, out in zip(todo, outs):
+            if isinstance(out, BaseException):
+                print(f"WARN summarize (Gemini): {type(out).__name__} {out}")
+                continue
+            title, summary = _extract_tags(out)
+            # sinon fallback : le modèle n'a pas respecté le format
+            if title and summary:
+                cache.put(keys[i], {"title": title, "summary": summary})
+                results[i] = (title, summary)
+
+    return [r or _first_lines_as_fallback(t) for r, t in zip(results, article_texts)]